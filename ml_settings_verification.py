@@ -1,19 +1,58 @@
 # ml_settings_verification.py - Verify ML model settings and configurations
-import sqlite3
+import argparse
 import json
 import os
-import pandas as pd
 from datetime import datetime, timedelta
 import logging
 
+from ml_verification_startup import LazyModule
+from ml_verification_cache import DEFAULT_CACHE_TTL, ResultCache
+from ml_verification_changepoints import THRESHOLD_HISTORY_DAYS, analyze_threshold_history
+from ml_verification_db import (
+    QueryPlanAdvisor,
+    SQLiteConnectionManager,
+    open_connection_manager,
+    print_connection_stats,
+    print_query_plan_report,
+)
+from ml_verification_incremental import IncrementalConfidenceTracker, IncrementalStateStore
+from ml_verification_jsonfile import LearningDataError, print_learning_data_stats
+from ml_verification_perf import enable_profiling, instrumented, read_sql
+from ml_verification_scheduler import DEFAULT_CHECK_TIMEOUT, CheckRegistry, CheckScheduler, print_check_timings
+from ml_verification_thresholds import DEFAULT_MIN_TRADES, optimize_thresholds
+from ml_verification_stats import (
+    edges_to_ranges,
+    query_confidence_buckets,
+    ranges_to_edges,
+    stream_confidence_buckets,
+    summarize_bucket_aggregates,
+)
+
+# pandas loads on first use; the file-configuration check never needs it
+pd = LazyModule("pandas")
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class MLSettingsVerifier:
     """Verify ML model settings, confidence thresholds, and trading parameters"""
     
-    def __init__(self, db_path="memebot.db"):
+    # Confidence ranges used to judge threshold effectiveness
+    CONFIDENCE_RANGES = [
+        (0.5, 0.6, "50-60%"),
+        (0.6, 0.7, "60-70%"),
+        (0.7, 0.8, "70-80%"),
+        (0.8, 0.9, "80-90%"),
+        (0.9, 1.0, "90-100%")
+    ]
+    # Most recent change points shown per model in the report
+    MAX_PRINTED_CHANGE_POINTS = 5
+    
+    def __init__(self, db_path="memebot.db", connection_manager=None, state_store=None, result_cache=None):
         self.db_path = db_path
+        self.db = connection_manager or SQLiteConnectionManager(db_path)
+        self.state_store = state_store or IncrementalStateStore.for_database(db_path)
+        self.result_cache = result_cache
         self.config_files = [
             "config.json",
             "ml_config.json", 
@@ -22,87 +61,93 @@ class MLSettingsVerifier:
             "settings.json"
         ]
         
+    @instrumented
     def check_database_ml_configuration(self):
         """Check ML model configuration stored in database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get ML models configuration
-            models_query = """
-            SELECT name, model_type, accuracy, confidence_threshold, 
-                   is_active, last_trained, training_data_count,
-                   hyperparameters, feature_importance
-            FROM ml_models
-            ORDER BY accuracy DESC
-            """
-            
-            try:
-                models_df = pd.read_sql_query(models_query, conn)
-            except Exception as e:
-                logger.warning(f"ml_models table not found: {e}")
-                models_df = pd.DataFrame()
-            
-            config_check = {
-                "models_configured": len(models_df),
-                "active_models": len(models_df[models_df['is_active'] == 1]) if len(models_df) > 0 else 0,
-                "trained_models": len(models_df[models_df['last_trained'].notna()]) if len(models_df) > 0 else 0,
-                "model_details": []
-            }
+            planner = self.db.planner()
             
-            if len(models_df) > 0:
-                for _, model in models_df.iterrows():
-                    model_info = {
-                        "name": model['name'],
-                        "type": model.get('model_type', 'Unknown'),
-                        "accuracy": model.get('accuracy', 0),
-                        "confidence_threshold": model.get('confidence_threshold', 0),
-                        "is_active": bool(model.get('is_active', 0)),
-                        "last_trained": model.get('last_trained', 'Never'),
-                        "training_samples": model.get('training_data_count', 0)
-                    }
-                    
-                    # Parse hyperparameters if available
-                    if model.get('hyperparameters'):
-                        try:
-                            model_info["hyperparameters"] = json.loads(model['hyperparameters'])
-                        except:
-                            model_info["hyperparameters"] = str(model['hyperparameters'])
+            with self.db.connection() as conn:
+                
+                # Get ML models configuration; optional columns are only selected if present
+                if planner.has_table("ml_models"):
+                    model_columns = planner.existing_columns("ml_models", [
+                        "name", "model_type", "accuracy", "confidence_threshold",
+                        "is_active", "last_trained", "training_data_count",
+                        "hyperparameters", "feature_importance"
+                    ])
+                    order_by = "ORDER BY accuracy DESC" if "accuracy" in model_columns else ""
+                    models_query = f"""
+                    SELECT {', '.join(model_columns)}
+                    FROM ml_models
+                    {order_by}
+                    """
+                    models_df = read_sql(models_query, conn)
+                else:
+                    logger.warning("ml_models table not found")
+                    models_df = pd.DataFrame()
+                
+                config_check = {
+                    "models_configured": len(models_df),
+                    "active_models": len(models_df[models_df['is_active'] == 1]) if len(models_df) > 0 else 0,
+                    "trained_models": len(models_df[models_df['last_trained'].notna()]) if len(models_df) > 0 else 0,
+                    "model_details": []
+                }
+                
+                if len(models_df) > 0:
+                    for _, model in models_df.iterrows():
+                        model_info = {
+                            "name": model['name'],
+                            "type": model.get('model_type', 'Unknown'),
+                            "accuracy": model.get('accuracy', 0),
+                            "confidence_threshold": model.get('confidence_threshold', 0),
+                            "is_active": bool(model.get('is_active', 0)),
+                            "last_trained": model.get('last_trained', 'Never'),
+                            "training_samples": model.get('training_data_count', 0)
+                        }
+                        
+                        # Parse hyperparameters if available
+                        if model.get('hyperparameters'):
+                            try:
+                                model_info["hyperparameters"] = json.loads(model['hyperparameters'])
+                            except:
+                                model_info["hyperparameters"] = str(model['hyperparameters'])
+                        
+                        config_check["model_details"].append(model_info)
                     
-                    config_check["model_details"].append(model_info)
+                    # Check confidence threshold distribution
+                    thresholds = models_df['confidence_threshold'].dropna()
+                    if len(thresholds) > 0:
+                        config_check["confidence_stats"] = {
+                            "min_threshold": float(thresholds.min()),
+                            "max_threshold": float(thresholds.max()),
+                            "avg_threshold": float(thresholds.mean()),
+                            "threshold_diversity": float(thresholds.std()),
+                            "proper_range": all(0.5 <= t <= 0.95 for t in thresholds)
+                        }
                 
-                # Check confidence threshold distribution
-                thresholds = models_df['confidence_threshold'].dropna()
-                if len(thresholds) > 0:
-                    config_check["confidence_stats"] = {
-                        "min_threshold": float(thresholds.min()),
-                        "max_threshold": float(thresholds.max()),
-                        "avg_threshold": float(thresholds.mean()),
-                        "threshold_diversity": float(thresholds.std()),
-                        "proper_range": all(0.5 <= t <= 0.95 for t in thresholds)
+                # Check trading parameters
+                if planner.has_columns("trading_parameters", "parameter_name", "parameter_value", "last_updated"):
+                    trading_params_query = """
+                    SELECT parameter_name, parameter_value, last_updated
+                    FROM trading_parameters
+                    ORDER BY last_updated DESC
+                    """
+                    trading_params = read_sql(trading_params_query, conn)
+                    
+                    config_check["trading_parameters"] = {
+                        param['parameter_name']: param['parameter_value'] 
+                        for _, param in trading_params.iterrows()
                     }
-            
-            # Check trading parameters
-            try:
-                trading_params_query = """
-                SELECT parameter_name, parameter_value, last_updated
-                FROM trading_parameters
-                ORDER BY last_updated DESC
-                """
-                trading_params = pd.read_sql_query(trading_params_query, conn)
+                else:
+                    config_check["trading_parameters"] = {}
                 
-                config_check["trading_parameters"] = {
-                    param['parameter_name']: param['parameter_value'] 
-                    for _, param in trading_params.iterrows()
-                }
-            except:
-                config_check["trading_parameters"] = {}
-            
-            conn.close()
             return config_check
             
         except Exception as e:
             return {"error": f"Database configuration check failed: {e}"}
     
+    @instrumented
     def check_file_configurations(self):
         """Check configuration files for ML and trading settings"""
         file_configs = {}
@@ -130,231 +175,308 @@ class MLSettingsVerifier:
         
         return file_configs
     
+    @instrumented
     def verify_ml_data_pipeline(self):
         """Verify the ML data pipeline from exchanges to models"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            pipeline_check = {
-                "data_collection": False,
-                "feature_engineering": False,
-                "model_training": False,
-                "prediction_generation": False,
-                "trade_execution": False
-            }
+            # Choose each stage's table from the schema instead of probing with failing queries
+            planner = self.db.planner()
+            since = self.db.dialect.relative_time()
             
-            # 1. Check data collection (price data from exchanges)
-            data_collection_query = """
-            SELECT COUNT(*) as count, MAX(timestamp) as latest_data
-            FROM price_data 
-            WHERE timestamp > datetime('now', '-1 day')
-            """
-            
-            try:
-                data_collection = pd.read_sql_query(data_collection_query, conn)
-                if data_collection.iloc[0]['count'] > 0:
-                    pipeline_check["data_collection"] = True
-                    pipeline_check["latest_data_collection"] = data_collection.iloc[0]['latest_data']
-            except:
-                # Try alternative table
-                try:
-                    alt_query = """
+            with self.db.connection() as conn:
+                
+                pipeline_check = {
+                    "data_collection": False,
+                    "feature_engineering": False,
+                    "model_training": False,
+                    "prediction_generation": False,
+                    "trade_execution": False
+                }
+                
+                # 1. Check data collection (price data from exchanges, else paper trades)
+                price_source = planner.price_source()
+                if price_source is not None:
+                    data_collection_query = f"""
                     SELECT COUNT(*) as count, MAX(timestamp) as latest_data
-                    FROM paper_trades 
-                    WHERE timestamp > datetime('now', '-1 day')
+                    FROM {price_source['table']} 
+                    WHERE timestamp > {since}
                     """
-                    data_collection = pd.read_sql_query(alt_query, conn)
+                    data_collection = read_sql(data_collection_query, conn, params=["-1 day"])
                     if data_collection.iloc[0]['count'] > 0:
                         pipeline_check["data_collection"] = True
                         pipeline_check["latest_data_collection"] = data_collection.iloc[0]['latest_data']
-                except:
-                    pass
-            
-            # 2. Check feature engineering (calculated features in database)
-            try:
-                features_query = """
-                SELECT COUNT(*) as count
-                FROM ml_features 
-                WHERE timestamp > datetime('now', '-1 day')
-                """
-                features = pd.read_sql_query(features_query, conn)
-                if features.iloc[0]['count'] > 0:
-                    pipeline_check["feature_engineering"] = True
-            except:
-                # Check if features are embedded in other tables
-                try:
-                    # Check for feature columns in arbitrage_opportunities
-                    arb_query = """
+                
+                # 2. Check feature engineering (ml_features, else feature columns in arbitrage_opportunities)
+                feature_source = planner.feature_source()
+                if feature_source is not None:
+                    feature_condition = f"AND ({feature_source['condition']})" if feature_source['condition'] else ""
+                    features_query = f"""
                     SELECT COUNT(*) as count
-                    FROM arbitrage_opportunities 
-                    WHERE timestamp > datetime('now', '-1 day')
-                    AND (spread_pct IS NOT NULL OR volume_24h IS NOT NULL)
+                    FROM {feature_source['table']} 
+                    WHERE timestamp > {since}
+                    {feature_condition}
                     """
-                    arb_data = pd.read_sql_query(arb_query, conn)
-                    if arb_data.iloc[0]['count'] > 0:
+                    features = read_sql(features_query, conn, params=["-1 day"])
+                    if features.iloc[0]['count'] > 0:
                         pipeline_check["feature_engineering"] = True
-                except:
-                    pass
-            
-            # 3. Check model training (recent training timestamps)
-            try:
-                training_query = """
-                SELECT COUNT(*) as count, MAX(last_trained) as latest_training
-                FROM ml_models 
-                WHERE last_trained > datetime('now', '-7 days')
-                """
-                training = pd.read_sql_query(training_query, conn)
-                if training.iloc[0]['count'] > 0:
-                    pipeline_check["model_training"] = True
-                    pipeline_check["latest_model_training"] = training.iloc[0]['latest_training']
-            except:
-                pass
-            
-            # 4. Check prediction generation
-            try:
-                prediction_query = """
-                SELECT COUNT(*) as count, MAX(timestamp) as latest_prediction
-                FROM ml_predictions 
-                WHERE timestamp > datetime('now', '-1 day')
-                """
-                predictions = pd.read_sql_query(prediction_query, conn)
-                if predictions.iloc[0]['count'] > 0:
-                    pipeline_check["prediction_generation"] = True
-                    pipeline_check["latest_prediction"] = predictions.iloc[0]['latest_prediction']
-            except:
-                # Check for predictions in other tables
-                try:
-                    alt_pred_query = """
+                
+                # 3. Check model training (recent training timestamps)
+                if planner.has_columns("ml_models", "last_trained"):
+                    training_query = f"""
+                    SELECT COUNT(*) as count, MAX(last_trained) as latest_training
+                    FROM ml_models 
+                    WHERE last_trained > {since}
+                    """
+                    training = read_sql(training_query, conn, params=["-7 days"])
+                    if training.iloc[0]['count'] > 0:
+                        pipeline_check["model_training"] = True
+                        pipeline_check["latest_model_training"] = training.iloc[0]['latest_training']
+                
+                # 4. Check prediction generation (ml_predictions, else scored paper trades)
+                if planner.has_columns("ml_predictions", "timestamp"):
+                    prediction_query = f"""
+                    SELECT COUNT(*) as count, MAX(timestamp) as latest_prediction
+                    FROM ml_predictions 
+                    WHERE timestamp > {since}
+                    """
+                    predictions = read_sql(prediction_query, conn, params=["-1 day"])
+                    if predictions.iloc[0]['count'] > 0:
+                        pipeline_check["prediction_generation"] = True
+                        pipeline_check["latest_prediction"] = predictions.iloc[0]['latest_prediction']
+                elif planner.has_columns("paper_trades", "timestamp", "confidence_score"):
+                    alt_pred_query = f"""
                     SELECT COUNT(*) as count
                     FROM paper_trades 
-                    WHERE timestamp > datetime('now', '-1 day')
+                    WHERE timestamp > {since}
                     AND confidence_score IS NOT NULL
                     """
-                    alt_predictions = pd.read_sql_query(alt_pred_query, conn)
+                    alt_predictions = read_sql(alt_pred_query, conn, params=["-1 day"])
                     if alt_predictions.iloc[0]['count'] > 0:
                         pipeline_check["prediction_generation"] = True
-                except:
-                    pass
-            
-            # 5. Check trade execution based on ML
-            try:
-                trade_query = """
-                SELECT COUNT(*) as count, AVG(confidence_score) as avg_confidence
-                FROM paper_trades 
-                WHERE timestamp > datetime('now', '-1 day')
-                AND confidence_score >= 0.5
-                """
-                trades = pd.read_sql_query(trade_query, conn)
-                if trades.iloc[0]['count'] > 0:
-                    pipeline_check["trade_execution"] = True
-                    pipeline_check["avg_trade_confidence"] = trades.iloc[0]['avg_confidence']
-            except:
-                pass
-            
-            conn.close()
+                
+                # 5. Check trade execution based on ML
+                if planner.has_columns("paper_trades", "timestamp", "confidence_score"):
+                    trade_query = f"""
+                    SELECT COUNT(*) as count, AVG(confidence_score) as avg_confidence
+                    FROM paper_trades 
+                    WHERE timestamp > {since}
+                    AND confidence_score >= 0.5
+                    """
+                    trades = read_sql(trade_query, conn, params=["-1 day"])
+                    if trades.iloc[0]['count'] > 0:
+                        pipeline_check["trade_execution"] = True
+                        pipeline_check["avg_trade_confidence"] = trades.iloc[0]['avg_confidence']
+                
             return pipeline_check
             
         except Exception as e:
             return {"error": f"Pipeline verification failed: {e}"}
     
-    def verify_confidence_threshold_implementation(self):
+    @instrumented
+    def verify_confidence_threshold_implementation(self, incremental=False, window_days=7,
+                                                   confidence_ranges=None, chunk_size=None):
         """Verify confidence threshold system is properly implemented"""
+        confidence_ranges = confidence_ranges or self.CONFIDENCE_RANGES
+        edges, labels = ranges_to_edges(confidence_ranges)
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            confidence_verification = {
-                "threshold_system_active": False,
-                "trades_filtered_by_confidence": False,
-                "dynamic_threshold_adjustment": False,
-                "threshold_effectiveness": {}
-            }
-            
-            # Check if trades have confidence scores
-            confidence_query = """
-            SELECT confidence_score, profit, timestamp
-            FROM paper_trades 
-            WHERE confidence_score IS NOT NULL
-            AND timestamp > datetime('now', '-7 days')
-            ORDER BY timestamp DESC
-            """
+            planner = self.db.planner()
             
-            try:
-                confidence_trades = pd.read_sql_query(confidence_query, conn)
+            with self.db.connection() as conn:
                 
-                if len(confidence_trades) > 0:
-                    confidence_verification["threshold_system_active"] = True
-                    confidence_verification["total_trades_with_confidence"] = len(confidence_trades)
-                    
-                    # Check if trades are filtered by confidence (no very low confidence trades)
-                    low_confidence_trades = len(confidence_trades[confidence_trades['confidence_score'] < 0.3])
-                    if low_confidence_trades < len(confidence_trades) * 0.1:  # Less than 10% low confidence
-                        confidence_verification["trades_filtered_by_confidence"] = True
-                    
-                    # Analyze threshold effectiveness
-                    confidence_ranges = [
-                        (0.5, 0.6, "50-60%"),
-                        (0.6, 0.7, "60-70%"),
-                        (0.7, 0.8, "70-80%"),
-                        (0.8, 0.9, "80-90%"),
-                        (0.9, 1.0, "90-100%")
-                    ]
-                    
-                    for min_conf, max_conf, label in confidence_ranges:
-                        range_trades = confidence_trades[
-                            (confidence_trades['confidence_score'] >= min_conf) & 
-                            (confidence_trades['confidence_score'] < max_conf)
-                        ]
-                        
-                        if len(range_trades) > 0:
-                            success_rate = (range_trades['profit'] > 0).mean()
-                            avg_profit = range_trades['profit'].mean()
-                            
-                            confidence_verification["threshold_effectiveness"][label] = {
-                                "trade_count": len(range_trades),
-                                "success_rate": success_rate,
-                                "avg_profit": avg_profit
+                confidence_verification = {
+                    "threshold_system_active": False,
+                    "trades_filtered_by_confidence": False,
+                    "dynamic_threshold_adjustment": False,
+                    "threshold_effectiveness": {}
+                }
+                
+                try:
+                    if not planner.has_columns("paper_trades", "confidence_score", "profit", "timestamp"):
+                        total_trades, low_confidence_trades = 0, 0
+                    elif incremental:
+                        # Only trades newer than the stored watermark are read
+                        tracker = IncrementalConfidenceTracker(
+                            self.state_store, "confidence_threshold_implementation",
+                            confidence_ranges, window_days=window_days
+                        )
+                        window = tracker.refresh(conn)
+                        total_trades = window["total_trades"]
+                        low_confidence_trades = window["low_confidence_trades"]
+                        confidence_verification["threshold_effectiveness"] = {
+                            label: {key: stats[key] for key in ("trade_count", "success_rate", "avg_profit")}
+                            for label, stats in window["bucket_summary"].items()
+                        }
+                        confidence_verification["incremental"] = window["incremental"]
+                    else:
+                        confidence_source = f"""
+                        SELECT confidence_score, profit
+                        FROM paper_trades 
+                        WHERE confidence_score IS NOT NULL
+                        AND timestamp > {self.db.dialect.relative_time()}
+                        """
+                        if chunk_size:
+                            # Stream the window in fixed-size chunks into running statistics
+                            cursor = self.db.dialect.stream(
+                                conn, confidence_source, [f"-{window_days} days"], chunk_size
+                            )
+                            aggregates, totals, profit_stats = stream_confidence_buckets(
+                                cursor, edges, labels, chunk_size=chunk_size
+                            )
+                            confidence_verification["streaming"] = {
+                                "chunk_size": chunk_size,
+                                "chunks": totals["chunks"]
                             }
+                        else:
+                            # Bucket every trade with a confidence score in one GROUP BY pass
+                            aggregates, totals = query_confidence_buckets(
+                                conn, edges, labels, confidence_source, [f"-{window_days} days"]
+                            )
+                            profit_stats = None
+                        total_trades = totals["total"]
+                        low_confidence_trades = totals["low_confidence"]
+                        
+                        # Analyze threshold effectiveness
+                        confidence_verification["threshold_effectiveness"] = {
+                            label: {key: stats[key] for key in ("trade_count", "success_rate", "avg_profit")}
+                            for label, stats in summarize_bucket_aggregates(aggregates, labels).items()
+                        }
+                        if profit_stats:
+                            for label, stats in confidence_verification["threshold_effectiveness"].items():
+                                stats["profit_std"] = profit_stats[label].std
                     
-                    # Check for dynamic threshold adjustment (changing thresholds over time)
-                    try:
-                        threshold_history_query = """
-                        SELECT name, confidence_threshold, last_updated
-                        FROM ml_model_history
-                        WHERE last_updated > datetime('now', '-30 days')
-                        ORDER BY last_updated
-                        """
-                        threshold_history = pd.read_sql_query(threshold_history_query, conn)
+                    if total_trades > 0:
+                        confidence_verification["threshold_system_active"] = True
+                        confidence_verification["total_trades_with_confidence"] = total_trades
                         
-                        if len(threshold_history) > 1:
-                            # Check if thresholds have changed
-                            for model_name in threshold_history['name'].unique():
-                                model_history = threshold_history[threshold_history['name'] == model_name]
-                                if len(model_history) > 1:
-                                    threshold_changes = model_history['confidence_threshold'].nunique()
-                                    if threshold_changes > 1:
-                                        confidence_verification["dynamic_threshold_adjustment"] = True
-                                        break
-                    except:
-                        pass
-            
-            except Exception as e:
-                confidence_verification["error"] = str(e)
-            
-            conn.close()
+                        # Check if trades are filtered by confidence (no very low confidence trades)
+                        if low_confidence_trades < total_trades * 0.1:  # Less than 10% low confidence
+                            confidence_verification["trades_filtered_by_confidence"] = True
+                        
+                        # Check for dynamic threshold adjustment (changing thresholds over time)
+                        if planner.has_columns("ml_model_history", "name", "confidence_threshold", "last_updated"):
+                            threshold_history_query = f"""
+                            SELECT name, confidence_threshold, last_updated
+                            FROM ml_model_history
+                            WHERE last_updated > {self.db.dialect.relative_time()}
+                            ORDER BY last_updated
+                            """
+                            history_window = [f"-{THRESHOLD_HISTORY_DAYS} days"]
+                            threshold_history = read_sql(threshold_history_query, conn, params=history_window)
+                            
+                            if len(threshold_history) > 1:
+                                # Trades are only needed to judge change points, so skip them if nothing changed
+                                linked_trades = None
+                                if (threshold_history['confidence_threshold'].nunique() > 1
+                                        and planner.has_columns("paper_trades", "ml_model", "timestamp", "profit")):
+                                    linked_trades = read_sql(f"""
+                                    SELECT ml_model, timestamp, profit
+                                    FROM paper_trades
+                                    WHERE ml_model IS NOT NULL
+                                    AND timestamp > {self.db.dialect.relative_time()}
+                                    """, conn, params=history_window)
+                                
+                                # One grouped pass over every model's history
+                                history_analysis = analyze_threshold_history(threshold_history, linked_trades)
+                                confidence_verification["threshold_history"] = history_analysis
+                                confidence_verification["dynamic_threshold_adjustment"] = (
+                                    history_analysis["models_adjusting"] > 0
+                                )
+                
+                except Exception as e:
+                    confidence_verification["error"] = str(e)
+                
             return confidence_verification
             
         except Exception as e:
             return {"error": f"Confidence threshold verification failed: {e}"}
     
-    def generate_settings_report(self):
+    @instrumented
+    def optimize_confidence_thresholds(self, min_trades=DEFAULT_MIN_TRADES):
+        """Find each model's profit-maximizing confidence threshold over the full trade history"""
+        try:
+            planner = self.db.planner()
+            if not planner.has_columns("paper_trades", "confidence_score", "profit", "timestamp"):
+                return {"error": "Threshold optimization failed: paper_trades has no confidence_score/profit"}
+            
+            columns = ["confidence_score", "profit"]
+            if planner.has_columns("paper_trades", "ml_model"):
+                columns.append("ml_model")
+            with self.db.connection() as conn:
+                # Time order, so the drawdowns follow the trades as they happened
+                trades = read_sql(f"""
+                SELECT {', '.join(columns)}
+                FROM paper_trades
+                WHERE confidence_score IS NOT NULL
+                ORDER BY timestamp
+                """, conn)
+                
+                current_thresholds = {}
+                if planner.has_columns("ml_models", "name", "confidence_threshold"):
+                    current_thresholds = {
+                        name: threshold for name, threshold in conn.execute(
+                            "SELECT name, confidence_threshold FROM ml_models WHERE confidence_threshold IS NOT NULL"
+                        ).fetchall()
+                    }
+            
+            return optimize_thresholds(trades, current_thresholds, min_trades=min_trades)
+            
+        except Exception as e:
+            return {"error": f"Threshold optimization failed: {e}"}
+    
+    def database_checks(self):
+        """The database-only checks, by name, as zero-argument callables"""
+        return {
+            "check_database_ml_configuration": self.check_database_ml_configuration,
+            "verify_ml_data_pipeline": self.verify_ml_data_pipeline,
+            "verify_confidence_threshold_implementation": self.verify_confidence_threshold_implementation,
+            "optimize_confidence_thresholds": self.optimize_confidence_thresholds
+        }
+    
+    def check_registry(self, incremental=False, window_days=7, confidence_ranges=None,
+                       chunk_size=None, timeout=None, min_threshold_trades=DEFAULT_MIN_TRADES):
+        """The report's checks with the tables they read; DB checks wait for the schema catalog"""
+        registry = CheckRegistry()
+        # Loading the catalog once up front keeps the checks from racing to fill its cache
+        registry.register("schema", self.db.schema, timeout=timeout)
+        registry.register("database_config", self.check_database_ml_configuration,
+                          needs=("ml_models", "trading_parameters"), depends_on=("schema",), timeout=timeout,
+                          params={})
+        # Config files change independently of the database, so this one is never cached
+        registry.register("file_configs", self.check_file_configurations, timeout=timeout)
+        registry.register("pipeline_check", self.verify_ml_data_pipeline,
+                          needs=("price_data", "ml_features", "ml_model_history", "ml_predictions", "paper_trades"),
+                          depends_on=("schema",), timeout=timeout, params={})
+        confidence_params = {
+            "incremental": incremental, "window_days": window_days,
+            "confidence_ranges": confidence_ranges, "chunk_size": chunk_size
+        }
+        registry.register("confidence_check", lambda: self.verify_confidence_threshold_implementation(
+            **confidence_params
+        ), needs=("paper_trades", "ml_model_history"), depends_on=("schema",), timeout=timeout,
+            params=confidence_params)
+        optimizer_params = {"min_trades": min_threshold_trades}
+        registry.register("threshold_optimizer", lambda: self.optimize_confidence_thresholds(
+            **optimizer_params
+        ), needs=("paper_trades", "ml_models"), depends_on=("schema",), timeout=timeout, params=optimizer_params)
+        return registry
+    
+    def generate_settings_report(self, incremental=False, window_days=7, confidence_ranges=None,
+                                 chunk_size=None, check_timeout=DEFAULT_CHECK_TIMEOUT,
+                                 min_threshold_trades=DEFAULT_MIN_TRADES):
         """Generate comprehensive settings verification report"""
         print("⚙️ ML MODEL SETTINGS & CONFIGURATION VERIFICATION")
         print("=" * 60)
         
+        # Independent checks run concurrently; sections are printed in order afterwards
+        scheduler = CheckScheduler(max_workers=self.db.pool_size, default_timeout=check_timeout,
+                                   cache=self.result_cache)
+        results = scheduler.run(self.check_registry(incremental, window_days, confidence_ranges, chunk_size,
+                                                    min_threshold_trades=min_threshold_trades))
+        
         # 1. Database ML Configuration
         print("\n1. 🗄️ DATABASE ML CONFIGURATION")
         print("-" * 40)
-        db_config = self.check_database_ml_configuration()
+        db_config = results["database_config"]
         
         if "error" in db_config:
             print(f"❌ {db_config['error']}")
@@ -382,10 +504,14 @@ class MLSettingsVerifier:
         # 2. File Configurations
         print("\n2. 📁 FILE CONFIGURATIONS")
         print("-" * 40)
-        file_configs = self.check_file_configurations()
+        file_configs = results["file_configs"]
         
         for filename, config in file_configs.items():
-            if config.get('status') == 'not_found':
+            if filename == '_perf':
+                continue
+            elif filename == 'error':
+                print(f"❌ {config}")
+            elif config.get('status') == 'not_found':
                 print(f"⚠️ {filename}: Not found")
             elif 'error' in config:
                 print(f"❌ {filename}: {config['error']}")
@@ -406,7 +532,7 @@ class MLSettingsVerifier:
         # 3. ML Data Pipeline
         print("\n3. 🔄 ML DATA PIPELINE")
         print("-" * 40)
-        pipeline_check = self.verify_ml_data_pipeline()
+        pipeline_check = results["pipeline_check"]
         
         if "error" in pipeline_check:
             print(f"❌ {pipeline_check['error']}")
@@ -432,7 +558,7 @@ class MLSettingsVerifier:
         # 4. Confidence Threshold Implementation
         print("\n4. 🎯 CONFIDENCE THRESHOLD IMPLEMENTATION")
         print("-" * 40)
-        confidence_check = self.verify_confidence_threshold_implementation()
+        confidence_check = results["confidence_check"]
         
         if "error" in confidence_check:
             print(f"❌ {confidence_check['error']}")
@@ -444,18 +570,79 @@ class MLSettingsVerifier:
             if confidence_check.get('total_trades_with_confidence'):
                 print(f"   • Total Trades with Confidence: {confidence_check['total_trades_with_confidence']}")
             
+            if confidence_check.get('incremental'):
+                inc = confidence_check['incremental']
+                print(f"   • Incremental: {inc['new_rows']} new trades merged "
+                      f"(watermark rowid {inc['watermark_rowid']}, {inc['partitions']} hourly partitions)")
+            
+            if confidence_check.get('streaming'):
+                streaming = confidence_check['streaming']
+                print(f"   • Streamed: {streaming['chunks']} chunks of up to {streaming['chunk_size']} trades")
+            
             if confidence_check.get('threshold_effectiveness'):
                 print(f"\n📈 Threshold Effectiveness:")
                 for range_label, stats in confidence_check['threshold_effectiveness'].items():
                     print(f"   • {range_label}: {stats['trade_count']} trades, "
                           f"{stats['success_rate']:.1%} success, "
-                          f"${stats['avg_profit']:.2f} avg profit")
+                          f"${stats['avg_profit']:.2f} avg profit"
+                          + (f" (±${stats['profit_std']:.2f})" if 'profit_std' in stats else ""))
+            
+            history = confidence_check.get('threshold_history')
+            if history:
+                print(f"\n📜 Threshold History ({THRESHOLD_HISTORY_DAYS} days): {history['models_with_history']} models, "
+                      f"{history['models_adjusting']} adjusting, {history['threshold_changes']} changes, "
+                      f"{history['change_points']} change points")
+                for name, model in history['models'].items():
+                    if not model['change_points']:
+                        continue
+                    print(f"   • {name}: {model['threshold_changes']} changes ({model['changes_per_day']:.2f}/day), "
+                          f"now {model['current_threshold']:.3f}")
+                    for change in model['change_points'][-self.MAX_PRINTED_CHANGE_POINTS:]:
+                        line = (f"     📍 {change['at']}: {change['threshold_before']:.3f} → "
+                                f"{change['threshold_after']:.3f}")
+                        if 'avg_profit_change' in change:
+                            before, after = change['before'], change['after']
+                            line += (f" (success {before['success_rate']:.1%} → {after['success_rate']:.1%}, "
+                                     f"avg ${before['avg_profit']:.2f} → ${after['avg_profit']:.2f} "
+                                     f"over {before['trades']}/{after['trades']} trades)")
+                        elif 'before' in change:
+                            line += (f" (too few trades to judge: "
+                                     f"{change['before']['trades']}/{change['after']['trades']})")
+                        print(line)
+        
+        # 5. Threshold Optimization
+        print("\n5. 🧮 CONFIDENCE THRESHOLD OPTIMIZATION")
+        print("-" * 40)
+        threshold_optimizer = results["threshold_optimizer"]
+        
+        if "error" in threshold_optimizer:
+            print(f"❌ {threshold_optimizer['error']}")
+        elif not threshold_optimizer["models"]:
+            print("⚠️ No trades with confidence scores to optimize over")
+        else:
+            for name, model in threshold_optimizer["models"].items():
+                if not model["trades"]:
+                    print(f"⚠️ {name}: no trades")
+                    continue
+                print(f"🤖 {name}: {model['trades']} trades, {model['cutoffs_evaluated']} cutoffs evaluated "
+                      f"(drawdown at {model['drawdown_cutoffs_evaluated']}: the curve, current and best)")
+                for key, label in [("current", "Current"), ("recommended", "Best")]:
+                    point = model.get(key)
+                    if point:
+                        print(f"   • {label} {point['threshold']:.3f}: {point['trades']} trades, "
+                              f"{point['hit_rate']:.1%} hit rate, ${point['total_profit']:.2f} total, "
+                              f"${point['max_drawdown']:.2f} max drawdown")
+                if "recommended" not in model:
+                    print(f"   ⚠️ Fewer than {threshold_optimizer['min_trades']} trades at any cutoff")
+        
+        print_check_timings(scheduler.timings, results)
         
         return {
             "database_config": db_config,
             "file_configs": file_configs,
             "pipeline_check": pipeline_check,
-            "confidence_check": confidence_check
+            "confidence_check": confidence_check,
+            "threshold_optimizer": threshold_optimizer
         }
     
     def generate_settings_recommendations(self, verification_results):
@@ -478,7 +665,21 @@ class MLSettingsVerifier:
         if confidence_stats.get("threshold_diversity", 0) < 0.05:
             recommendations.append("🎯 Increase confidence threshold diversity between models")
         
-        if not confidence_stats.get("proper_range", True):
+        # Concrete per-model thresholds when the trade history supports them
+        optimized = verification_results.get("threshold_optimizer", {}).get("models", {})
+        threshold_changes = []
+        for name, model in optimized.items():
+            if model.get("should_change"):
+                current, best = model["current"], model["recommended"]
+                direction = "Raise" if best["threshold"] > current["threshold"] else "Lower"
+                threshold_changes.append(
+                    f"🎯 {direction} {name} confidence_threshold {current['threshold']:.3f} → {best['threshold']:.3f} "
+                    f"(+${model['profit_gain']:.2f} over {best['trades']} historical trades, "
+                    f"${best['max_drawdown']:.2f} max drawdown)"
+                )
+        recommendations.extend(threshold_changes)
+        
+        if not confidence_stats.get("proper_range", True) and not threshold_changes:
             recommendations.append("⚖️ Adjust confidence thresholds to optimal range (0.5-0.95)")
         
         # Pipeline recommendations
@@ -494,6 +695,18 @@ class MLSettingsVerifier:
         if not confidence_check.get("dynamic_threshold_adjustment", False):
             recommendations.append("🔄 Implement dynamic threshold adjustment based on performance")
         
+        # Threshold changes that were followed by worse trading
+        history_models = confidence_check.get("threshold_history", {}).get("models", {})
+        for name, model in history_models.items():
+            worse = [change for change in model["change_points"] if change.get("worse_after")]
+            if worse:
+                change = worse[-1]
+                recommendations.append(
+                    f"↩️ Review {name} threshold change on {change['at']} "
+                    f"({change['threshold_before']:.3f} → {change['threshold_after']:.3f}): avg profit fell "
+                    f"${change['before']['avg_profit']:.2f} → ${change['after']['avg_profit']:.2f}"
+                )
+        
         if not confidence_check.get("trades_filtered_by_confidence", False):
             recommendations.append("🛡️ Strengthen confidence filtering to reject low-quality trades")
         
@@ -514,9 +727,68 @@ class MLSettingsVerifier:
         
         return recommendations
 
-def main():
+def parse_args(argv=None):
+    """Command line options for the settings verification"""
+    parser = argparse.ArgumentParser(description="Verify ML model settings and configurations")
+    parser.add_argument("--db-path", default="memebot.db", help="SQLite database to verify")
+    parser.add_argument("--database-url", metavar="URL",
+                        help="Verify a PostgreSQL deployment (e.g. $DATABASE_URL) instead of --db-path")
+    parser.add_argument("--learning-data", metavar="PATH",
+                        help="Verify the json-file storage (ml_learning_data.json) instead of --db-path")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only read trades added since the last run (state kept next to the database)")
+    parser.add_argument("--window-days", type=float, default=7,
+                        help="Days of trades to evaluate threshold effectiveness over")
+    parser.add_argument("--confidence-edges", type=float, nargs="+",
+                        help="Custom confidence bucket edges, e.g. 0.5 0.6 0.7 0.8 0.9 1.0")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Stream the trade window in chunks of this many rows instead of one GROUP BY")
+    parser.add_argument("--min-threshold-trades", type=int, default=DEFAULT_MIN_TRADES,
+                        help="Fewest historical trades a recommended confidence threshold must keep")
+    parser.add_argument("--check-timeout", type=float, default=DEFAULT_CHECK_TIMEOUT,
+                        help="Seconds before a single check is reported as timed out")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+                        help="Reuse check results for this many seconds while the database is unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="Always rerun every check")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write a cProfile .pstats file per check into DIR (checks then run one at a time)")
+    parser.add_argument("--explain", action="store_true",
+                        help="Show EXPLAIN QUERY PLAN for every verifier query and suggest indexes")
+    parser.add_argument("--create-indexes", action="store_true",
+                        help="With --explain, create the suggested indexes and re-time each check")
+    args = parser.parse_args(argv)
+    if args.database_url and (args.incremental or args.explain):
+        parser.error("--incremental and --explain only work on the SQLite database (--db-path)")
+    if args.database_url and args.learning_data:
+        parser.error("--database-url and --learning-data are different storage modes; pass one")
+    return args
+
+def main(argv=None):
     """Run complete ML settings verification"""
-    verifier = MLSettingsVerifier()
+    args = parse_args(argv)
+    enable_profiling(args.profile)
+    db = open_connection_manager(args.db_path, args.database_url, args.learning_data)
+    db_path = args.db_path
+    if args.learning_data:
+        # The json file is verified through its SQLite mirror, which the cache and state follow
+        try:
+            print_learning_data_stats(db.sync())
+        except LearningDataError as e:
+            raise SystemExit(f"❌ {e}")
+        db_path = db.db_path
+    # The result cache versions entries by the SQLite file, so it only applies there
+    result_cache = None if args.no_cache or args.database_url else ResultCache.for_database(
+        db_path, ttl_seconds=args.cache_ttl
+    )
+    verifier = MLSettingsVerifier(db_path=db_path, connection_manager=db, result_cache=result_cache)
+    
+    if args.explain:
+        report = QueryPlanAdvisor(verifier.db).report(
+            verifier.database_checks(), create_indexes=args.create_indexes
+        )
+        print_query_plan_report(report)
+        verifier.db.close()
+        return report
     
     print("🔍 Starting ML Model Settings Verification...")
     print("This will check your ML configurations, confidence thresholds,")
@@ -524,7 +796,12 @@ def main():
     print("\n" + "="*60)
     
     # Run verification
-    verification_results = verifier.generate_settings_report()
+    confidence_ranges = edges_to_ranges(args.confidence_edges) if args.confidence_edges else None
+    verification_results = verifier.generate_settings_report(
+        incremental=args.incremental, window_days=args.window_days, confidence_ranges=confidence_ranges,
+        chunk_size=args.chunk_size, check_timeout=args.check_timeout,
+        min_threshold_trades=args.min_threshold_trades
+    )
     
     # Generate recommendations
     recommendations = verifier.generate_settings_recommendations(verification_results)
@@ -534,6 +811,14 @@ def main():
     print(f"📊 {len(recommendations)} recommendations generated")
     print(f"💾 Results saved to verification log")
     
+    # Report database connection usage
+    db_stats = verifier.db.stats()
+    print_connection_stats(db_stats)
+    verification_results["db_connections"] = db_stats
+    verifier.db.close()
+    if result_cache is not None:
+        result_cache.close()
+    
     return verification_results
 
 if __name__ == "__main__":
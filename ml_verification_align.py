@@ -0,0 +1,121 @@
+# ml_verification_align.py - Align live exchange quotes with the database rows nearest in time
+import logging
+
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+logger = logging.getLogger(__name__)
+
+# A database row further than this from the quote is not a match at all; the
+# same as the 10 minutes of prices the live checks load
+DEFAULT_ALIGN_TOLERANCE_SECONDS = 600
+ALIGN_PERCENTILES = (50, 90, 99)
+
+
+def epoch_seconds(timestamps):
+    """Database timestamps (UTC text) as float seconds since the epoch; unparseable ones become NaN"""
+    parsed = pd.to_datetime(pd.Series(timestamps), utc=True, errors="coerce")
+    return (parsed - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+
+
+def quotes_frame(quotes):
+    """DataFrame of live quotes from (exchange, symbol, ticker) triples
+
+    The exchange's own ticker timestamp is used when it has one, otherwise
+    the time the response arrived.
+    """
+    rows = []
+    for exchange, symbol, ticker in quotes:
+        quote_ms = ticker.get("timestamp") or ticker.get("received_at")
+        rows.append({
+            "exchange": exchange,
+            "symbol": symbol,
+            "live_price": ticker.get("last_price"),
+            "quote_time": quote_ms / 1000.0 if quote_ms else np.nan,
+            "exchange_timestamp": bool(ticker.get("timestamp"))
+        })
+    # Typed columns even with no rows, so merge_asof accepts an empty frame
+    return pd.DataFrame(rows, columns=["exchange", "symbol", "live_price", "quote_time", "exchange_timestamp"]).astype(
+        {"exchange": str, "symbol": str, "live_price": float, "quote_time": float, "exchange_timestamp": bool}
+    )
+
+
+def align_quotes(quotes, db_prices, tolerance_seconds=DEFAULT_ALIGN_TOLERANCE_SECONDS):
+    """As-of join every quote to the same pair's database row nearest in time
+
+    quotes comes from quotes_frame(); db_prices needs exchange, symbol,
+    mid_price and timestamp columns. One merge_asof covers every exchange and
+    symbol at once. Quotes without a database row within tolerance_seconds
+    keep NaN in the db_* columns.
+    """
+    db = pd.DataFrame({
+        "exchange": db_prices["exchange"].astype(str),
+        "symbol": db_prices["symbol"].astype(str),
+        "db_mid_price": db_prices["mid_price"].astype(float),
+        "db_time": epoch_seconds(db_prices["timestamp"].to_numpy()).to_numpy()
+    }).dropna(subset=["db_time"])
+    left = quotes.dropna(subset=["quote_time"]).astype({"exchange": str, "symbol": str})
+    aligned = pd.merge_asof(
+        left.sort_values("quote_time"),
+        db.sort_values("db_time"),
+        left_on="quote_time", right_on="db_time", by=["exchange", "symbol"],
+        direction="nearest", tolerance=float(tolerance_seconds)
+    )
+    aligned["time_offset_seconds"] = aligned["db_time"] - aligned["quote_time"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        aligned["price_difference_pct"] = np.where(
+            aligned["db_mid_price"] > 0,
+            (aligned["live_price"] - aligned["db_mid_price"]).abs() / aligned["db_mid_price"] * 100,
+            np.nan
+        )
+    return aligned
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    stats = {f"p{p}": float(v) for p, v in zip(ALIGN_PERCENTILES, np.percentile(values, ALIGN_PERCENTILES))}
+    stats["max"] = float(values.max())
+    return stats
+
+
+def summarize_alignment(aligned, quotes_total, max_price_diff_pct=5):
+    """Match counts and percentiles of price difference and timestamp distance"""
+    matched = aligned.dropna(subset=["price_difference_pct"])
+    return {
+        "quotes": quotes_total,
+        "matched": len(matched),
+        "unmatched": quotes_total - len(matched),
+        "synchronized": int((matched["price_difference_pct"] < max_price_diff_pct).sum()),
+        "price_difference_pct": _percentiles(matched["price_difference_pct"]),
+        "time_offset_seconds": _percentiles(matched["time_offset_seconds"].abs()),
+        "quotes_without_exchange_timestamp": int((~aligned["exchange_timestamp"].astype(bool)).sum())
+    }
+
+
+def aligned_by_pair(aligned):
+    """{(exchange, symbol): match details} for the per-pair results"""
+    matches = {}
+    for row in aligned.itertuples(index=False):
+        if row.price_difference_pct != row.price_difference_pct:
+            continue
+        matches[(row.exchange, row.symbol)] = {
+            "db_mid_price": float(row.db_mid_price),
+            "price_difference_pct": float(row.price_difference_pct),
+            "time_offset_seconds": float(row.time_offset_seconds)
+        }
+    return matches
+
+
+def format_alignment(summary):
+    """One-line description of summarize_alignment() for the reports"""
+    line = f"{summary['matched']}/{summary['quotes']} quotes matched to a database row"
+    if summary["price_difference_pct"]:
+        diff, offset = summary["price_difference_pct"], summary["time_offset_seconds"]
+        line += (f"; price diff p50 {diff['p50']:.2f}% p90 {diff['p90']:.2f}% max {diff['max']:.2f}%"
+                 f"; rows {offset['p50']:.0f}s p50 / {offset['p90']:.0f}s p90 from the quote")
+    return line
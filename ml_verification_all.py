@@ -0,0 +1,142 @@
+# ml_verification_all.py - Run the settings and data-source verifiers together on one snapshot
+import argparse
+import asyncio
+import logging
+
+from ml_verification_cache import DEFAULT_CACHE_TTL, ResultCache
+from ml_verification_db import open_connection_manager, print_connection_stats
+from ml_verification_incremental import IncrementalStateStore
+from ml_verification_jsonfile import LearningDataError, print_learning_data_stats
+from ml_verification_perf import enable_profiling
+from ml_verification_replay import replay_exchanges
+from ml_verification_scheduler import DEFAULT_CHECK_TIMEOUT
+from ml_verification_snapshot import SnapshotConnectionManager, print_snapshot_stats
+from ml_verification_stats import edges_to_ranges
+from ml_settings_verification import MLSettingsVerifier
+from ml_verification_suite import MLDataSourceVerifier
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def parse_args(argv=None):
+    """Command line options for the combined verification run"""
+    parser = argparse.ArgumentParser(description="Verify ML settings and data sources in one run")
+    parser.add_argument("--db-path", default="memebot.db", help="SQLite database to verify")
+    parser.add_argument("--database-url", metavar="URL",
+                        help="Verify a PostgreSQL deployment (e.g. $DATABASE_URL) instead of --db-path")
+    parser.add_argument("--learning-data", metavar="PATH",
+                        help="Verify the json-file storage (ml_learning_data.json) instead of --db-path")
+    parser.add_argument("--window-days", type=float, default=7,
+                        help="Days of trades the settings confidence check evaluates")
+    parser.add_argument("--no-snapshot", action="store_true",
+                        help="Query memebot.db directly instead of loading one shared snapshot")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only read trades added since the last run (state kept next to the database)")
+    parser.add_argument("--confidence-edges", type=float, nargs="+",
+                        help="Custom confidence bucket edges for the settings report")
+    parser.add_argument("--chunk-size", type=int,
+                        help="Stream the settings trade window in chunks of this many rows")
+    parser.add_argument("--check-timeout", type=float, default=DEFAULT_CHECK_TIMEOUT,
+                        help="Seconds before a single check is reported as timed out")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+                        help="Reuse check results for this many seconds while the database is unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="Always rerun every check")
+    parser.add_argument("--skip-exchanges", action="store_true", help="Run only the database checks")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Use exchange responses recorded with ml_verification_suite.py --record")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Check every symbol (or --symbols) on every exchange concurrently")
+    parser.add_argument("--symbols", nargs="+", help="Symbols for the sweep")
+    parser.add_argument("--max-concurrency", type=int, default=8,
+                        help="Maximum in-flight exchange requests during the sweep")
+    parser.add_argument("--profile", metavar="DIR", help="Write a cProfile .pstats file per check into DIR")
+    args = parser.parse_args(argv)
+    if args.database_url and args.incremental:
+        parser.error("--incremental only works on the SQLite database (--db-path)")
+    if args.database_url and args.learning_data:
+        parser.error("--database-url and --learning-data are different storage modes; pass one")
+    return args
+
+
+async def main(argv=None):
+    """Run both verification reports against one windowed snapshot of the database"""
+    args = parse_args(argv)
+    enable_profiling(args.profile)
+
+    db_path = args.db_path
+    if args.learning_data:
+        # The json file is verified through its SQLite mirror, which already holds only the trades
+        db = open_connection_manager(learning_data=args.learning_data)
+        try:
+            print_learning_data_stats(db.sync())
+        except LearningDataError as e:
+            raise SystemExit(f"❌ {e}")
+        db_path = db.db_path
+    elif args.database_url or args.no_snapshot:
+        # The in-memory snapshot is built with SQLite's ATTACH, so PostgreSQL is always queried live
+        db = open_connection_manager(args.db_path, args.database_url)
+    else:
+        # Every table is read once, with the widest window any check needs;
+        # paper_trades is copied whole so the threshold optimizer (and its
+        # shared cache entry) sees the same history as a standalone run
+        db = SnapshotConnectionManager(args.db_path)
+
+    state_store = IncrementalStateStore.for_database(db_path)
+    result_cache = None if args.no_cache or args.database_url else ResultCache.for_database(
+        db_path, ttl_seconds=args.cache_ttl
+    )
+    if isinstance(db, SnapshotConnectionManager):
+        if result_cache is not None:
+            # Results computed from the snapshot are cached under the version read before it was copied
+            result_cache.pin_version()
+        print_snapshot_stats(db.load())
+    settings_verifier = MLSettingsVerifier(db_path, connection_manager=db, state_store=state_store,
+                                           result_cache=result_cache)
+    data_verifier = MLDataSourceVerifier(db_path, connection_manager=db, state_store=state_store,
+                                         result_cache=result_cache)
+
+    if args.replay:
+        await data_verifier.initialize_exchanges(replay=replay_exchanges(args.replay))
+    elif not args.skip_exchanges:
+        print("🔌 Connecting to exchanges for verification...")
+        await data_verifier.initialize_exchanges()
+
+    print("\n" + "=" * 60)
+    confidence_ranges = edges_to_ranges(args.confidence_edges) if args.confidence_edges else None
+    settings_results = settings_verifier.generate_settings_report(
+        incremental=args.incremental, window_days=args.window_days, confidence_ranges=confidence_ranges,
+        chunk_size=args.chunk_size, check_timeout=args.check_timeout
+    )
+    recommendations = settings_verifier.generate_settings_recommendations(settings_results)
+
+    print("\n" + "=" * 60)
+    data_results = data_verifier.generate_verification_report(
+        incremental=args.incremental, check_timeout=args.check_timeout
+    )
+    if data_verifier.exchanges:
+        data_results.update(await data_verifier.run_live_report(
+            sweep=args.sweep, symbols=args.symbols, max_concurrency=args.max_concurrency
+        ))
+    final_verdict = data_verifier.generate_final_verdict(data_results)
+
+    for exchange in data_verifier.exchanges.values():
+        await exchange.close()
+
+    db_stats = db.stats()
+    print_connection_stats(db_stats)
+    db.close()
+    if result_cache is not None:
+        result_cache.close()
+
+    return {
+        "settings": settings_results,
+        "recommendations": recommendations,
+        "data_sources": data_results,
+        "snapshot": getattr(db, "load_stats", None),
+        "db_connections": db_stats
+    }, final_verdict
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
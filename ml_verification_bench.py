@@ -0,0 +1,577 @@
+# ml_verification_bench.py - Synthetic memebot.db generator and verifier benchmark harness
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+import logging
+from datetime import datetime, timedelta
+
+from ml_verification_startup import LazyModule
+from ml_verification_db import SUGGESTED_INDEXES, SQLiteConnectionManager, open_connection_manager, quote_identifier
+from ml_verification_postgres import redact_url
+
+np = LazyModule("numpy")
+psycopg2 = LazyModule("psycopg2")
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_SCHEMA = """
+CREATE TABLE ml_models (
+    name TEXT PRIMARY KEY, model_type TEXT, accuracy REAL, confidence_threshold REAL,
+    is_active INTEGER, last_trained TEXT, training_data_count INTEGER,
+    hyperparameters TEXT, feature_importance TEXT
+);
+CREATE TABLE ml_model_history (name TEXT, confidence_threshold REAL, accuracy REAL, last_updated TEXT);
+CREATE TABLE trading_parameters (parameter_name TEXT, parameter_value TEXT, last_updated TEXT);
+CREATE TABLE price_data (
+    exchange TEXT, symbol TEXT, timestamp TEXT, bid REAL, ask REAL, mid_price REAL,
+    spread_pct REAL, volume_24h REAL
+);
+CREATE TABLE paper_trades (
+    symbol TEXT, exchange TEXT, buy_exchange TEXT, sell_exchange TEXT, buy_price REAL, sell_price REAL,
+    amount REAL, profit REAL, confidence_score REAL, ml_model TEXT, timestamp TEXT
+);
+CREATE TABLE arbitrage_opportunities (
+    timestamp TEXT, symbol TEXT, buy_exchange TEXT, sell_exchange TEXT, spread_pct REAL,
+    volume_24h REAL, quality_score REAL, confidence REAL, ml_prediction REAL
+);
+CREATE TABLE ml_predictions (timestamp TEXT, symbol TEXT, model TEXT, prediction REAL, confidence REAL);
+CREATE TABLE ml_features (timestamp TEXT, symbol TEXT, feature TEXT, value REAL);
+"""
+
+SYNTHETIC_MODELS = ["lstm", "xgboost", "random_forest", "logistic", "gradient_boost", "ensemble"]
+SYNTHETIC_EXCHANGES = ["kraken", "binanceus", "cryptocom", "coinbase"]
+SYNTHETIC_SYMBOLS = {
+    "DOGE/USDT": 0.12, "SHIB/USDT": 0.000022, "PEPE/USDT": 0.0000095, "FLOKI/USDT": 0.00015,
+    "BONK/USDT": 0.000021, "WIF/USDT": 2.1, "BTC/USDT": 64000.0, "ETH/USDT": 3100.0,
+}
+FEATURE_NAMES = ["spread_pct", "volume_ratio", "volatility_1h", "momentum_15m", "orderbook_imbalance"]
+
+# Rows relative to the requested size; price_data and paper_trades are the big tables
+TABLE_RATIOS = {
+    "price_data": 1.0,
+    "paper_trades": 1.0,
+    "arbitrage_opportunities": 0.1,
+    "ml_predictions": 0.1,
+    "ml_features": 0.1,
+}
+# Rows are generated and inserted in fixed-size chunks, each from its own seeded
+# generator, so a given seed and size always yield the same database
+CHUNK_ROWS = 200_000
+# Column types when a synthetic database is copied into PostgreSQL; the
+# timestamp text becomes real TIMESTAMP columns as in the production schema
+POSTGRES_TYPES = {"TEXT": "TEXT", "REAL": "DOUBLE PRECISION", "INTEGER": "BIGINT"}
+POSTGRES_TIME_COLUMNS = {"timestamp", "last_trained", "last_updated"}
+DEFAULT_SPAN_DAYS = 30
+DEFAULT_RESULTS_PATH = "ml_verification_bench.json"
+
+
+def _timestamps(anchor, start_index, count, total, span_seconds, rng):
+    """Chronological timestamps (oldest first) spread over the span ending at anchor"""
+    position = (np.arange(start_index, start_index + count) + rng.random(count)) / total
+    offsets = ((1.0 - position) * span_seconds).astype("int64")
+    stamps = np.datetime64(anchor, "s") - offsets.astype("timedelta64[s]")
+    return np.char.replace(np.datetime_as_string(stamps, unit="s"), "T", " ").tolist()
+
+
+def _price_rows(rng, anchor, start, count, total, span_seconds):
+    symbols = list(SYNTHETIC_SYMBOLS)
+    symbol_index = rng.integers(0, len(symbols), count)
+    base = np.array([SYNTHETIC_SYMBOLS[s] for s in symbols])[symbol_index]
+    mid = base * np.exp(rng.normal(0, 0.01, count))
+    spread_pct = rng.gamma(2.0, 0.05, count)
+    half_spread = mid * spread_pct / 200
+    return zip(
+        np.array(SYNTHETIC_EXCHANGES)[rng.integers(0, len(SYNTHETIC_EXCHANGES), count)].tolist(),
+        np.array(symbols)[symbol_index].tolist(),
+        _timestamps(anchor, start, count, total, span_seconds, rng),
+        (mid - half_spread).tolist(), (mid + half_spread).tolist(), mid.tolist(),
+        spread_pct.tolist(), rng.lognormal(13, 1.5, count).tolist()
+    )
+
+
+def _trade_rows(rng, anchor, start, count, total, span_seconds):
+    symbols = np.array(list(SYNTHETIC_SYMBOLS))
+    exchanges = np.array(SYNTHETIC_EXCHANGES)
+    symbol = symbols[rng.integers(0, len(symbols), count)]
+    buy_exchange = exchanges[rng.integers(0, len(exchanges), count)]
+    sell_exchange = exchanges[rng.integers(0, len(exchanges), count)]
+    base = np.array([SYNTHETIC_SYMBOLS[s] for s in symbol.tolist()])
+    buy_price = base * np.exp(rng.normal(0, 0.01, count))
+    sell_price = buy_price * (1 + rng.normal(0.001, 0.004, count))
+    # Higher confidence trades are more profitable, so the threshold checks have a signal to find
+    confidence = rng.beta(4, 3, count)
+    amount = rng.uniform(10, 500, count)
+    profit = amount * rng.normal((confidence - 0.45) * 0.02, 0.02)
+    # A few trades never got scored
+    confidence_values = np.where(rng.random(count) < 0.02, np.nan, confidence)
+    return zip(
+        symbol.tolist(), buy_exchange.tolist(), buy_exchange.tolist(), sell_exchange.tolist(),
+        buy_price.tolist(), sell_price.tolist(), amount.tolist(), profit.tolist(),
+        [None if c != c else c for c in confidence_values.tolist()],
+        np.array(SYNTHETIC_MODELS)[rng.integers(0, len(SYNTHETIC_MODELS), count)].tolist(),
+        _timestamps(anchor, start, count, total, span_seconds, rng)
+    )
+
+
+def _opportunity_rows(rng, anchor, start, count, total, span_seconds):
+    symbols = np.array(list(SYNTHETIC_SYMBOLS))
+    exchanges = np.array(SYNTHETIC_EXCHANGES)
+    return zip(
+        _timestamps(anchor, start, count, total, span_seconds, rng),
+        symbols[rng.integers(0, len(symbols), count)].tolist(),
+        exchanges[rng.integers(0, len(exchanges), count)].tolist(),
+        exchanges[rng.integers(0, len(exchanges), count)].tolist(),
+        rng.gamma(2.0, 0.2, count).tolist(), rng.lognormal(13, 1.5, count).tolist(),
+        rng.beta(2, 2, count).tolist(), rng.beta(4, 3, count).tolist(), rng.normal(0, 1, count).tolist()
+    )
+
+
+def _prediction_rows(rng, anchor, start, count, total, span_seconds):
+    symbols = np.array(list(SYNTHETIC_SYMBOLS))
+    return zip(
+        _timestamps(anchor, start, count, total, span_seconds, rng),
+        symbols[rng.integers(0, len(symbols), count)].tolist(),
+        np.array(SYNTHETIC_MODELS)[rng.integers(0, len(SYNTHETIC_MODELS), count)].tolist(),
+        rng.normal(0, 1, count).tolist(), rng.beta(4, 3, count).tolist()
+    )
+
+
+def _feature_rows(rng, anchor, start, count, total, span_seconds):
+    symbols = np.array(list(SYNTHETIC_SYMBOLS))
+    return zip(
+        _timestamps(anchor, start, count, total, span_seconds, rng),
+        symbols[rng.integers(0, len(symbols), count)].tolist(),
+        np.array(FEATURE_NAMES)[rng.integers(0, len(FEATURE_NAMES), count)].tolist(),
+        rng.normal(0, 1, count).tolist()
+    )
+
+
+TABLE_GENERATORS = {
+    "price_data": (_price_rows, 8),
+    "paper_trades": (_trade_rows, 11),
+    "arbitrage_opportunities": (_opportunity_rows, 9),
+    "ml_predictions": (_prediction_rows, 5),
+    "ml_features": (_feature_rows, 4),
+}
+
+
+def _insert_small_tables(conn, rng, anchor):
+    fmt = "%Y-%m-%d %H:%M:%S"
+    for i, name in enumerate(SYNTHETIC_MODELS):
+        threshold = round(float(rng.uniform(0.55, 0.85)), 2)
+        accuracy = float(rng.uniform(0.5, 0.8))
+        conn.execute(
+            "INSERT INTO ml_models VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, "classifier", accuracy, threshold, int(i < len(SYNTHETIC_MODELS) - 1),
+             (anchor - timedelta(hours=int(rng.integers(1, 72)))).strftime(fmt),
+             int(rng.integers(1000, 50000)), json.dumps({"learning_rate": 0.05}),
+             json.dumps({feature: float(w) for feature, w in zip(FEATURE_NAMES, rng.dirichlet(np.ones(5)))}))
+        )
+        # Thresholds drift daily, so the dynamic-adjustment checks see changes
+        for day in range(DEFAULT_SPAN_DAYS, 0, -1):
+            threshold = float(np.clip(threshold + rng.normal(0, 0.01), 0.5, 0.95))
+            conn.execute(
+                "INSERT INTO ml_model_history VALUES (?, ?, ?, ?)",
+                (name, round(threshold, 3), float(np.clip(accuracy + rng.normal(0, 0.02), 0, 1)),
+                 (anchor - timedelta(days=day)).strftime(fmt))
+            )
+    for name, value in [("min_confidence", "0.6"), ("max_position_usd", "500"), ("min_spread_pct", "0.3")]:
+        conn.execute("INSERT INTO trading_parameters VALUES (?, ?, ?)",
+                     (name, value, (anchor - timedelta(days=1)).strftime(fmt)))
+
+
+def generate_synthetic_db(path, rows=10_000, seed=42, anchor=None, span_days=DEFAULT_SPAN_DAYS,
+                          create_indexes=False):
+    """Build a deterministic memebot.db-shaped database at path
+
+    rows sizes price_data and paper_trades (the other time-series tables get
+    a tenth of that). Timestamps cover span_days ending at anchor (default:
+    now, to the minute) so the verifiers' datetime('now') windows see data;
+    the same seed and anchor always produce the same rows.
+    """
+    anchor = anchor or datetime.utcnow().replace(second=0, microsecond=0)
+    span_seconds = int(span_days * 86400)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".synthetic-", suffix=".db", dir=directory)
+    os.close(fd)
+    started = time.perf_counter()
+    counts = {}
+    try:
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SYNTHETIC_SCHEMA)
+        conn.execute("BEGIN")
+        _insert_small_tables(conn, np.random.default_rng([seed, 0]), anchor)
+
+        for table_number, (table, (make_rows, width)) in enumerate(TABLE_GENERATORS.items(), start=1):
+            total = max(1, int(rows * TABLE_RATIOS[table]))
+            insert = f"INSERT INTO {table} VALUES ({', '.join('?' * width)})"
+            for chunk_number, start in enumerate(range(0, total, CHUNK_ROWS)):
+                count = min(CHUNK_ROWS, total - start)
+                rng = np.random.default_rng([seed, table_number, chunk_number])
+                conn.executemany(insert, make_rows(rng, anchor, start, count, total, span_seconds))
+            counts[table] = total
+        conn.execute("COMMIT")
+
+        if create_indexes:
+            for table, indexes in SUGGESTED_INDEXES.items():
+                for index_name, columns in indexes:
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} ON {quote_identifier(table)} "
+                        f"({', '.join(quote_identifier(c) for c in columns)})"
+                    )
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return {
+        "path": path,
+        "rows": rows,
+        "seed": seed,
+        "anchor": anchor.isoformat(),
+        "span_days": span_days,
+        "indexed": create_indexes,
+        "table_rows": counts,
+        "generation_seconds": time.perf_counter() - started
+    }
+
+
+def load_into_postgres(sqlite_path, database_url, create_indexes=False):
+    """Copy every table of a synthetic database into PostgreSQL, replacing tables of the same name"""
+    started = time.perf_counter()
+    source = sqlite3.connect(sqlite_path)
+    target = psycopg2.connect(database_url)
+    counts = {}
+    table_columns = {}
+    try:
+        tables = [row[0] for row in source.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+        )]
+        with target, target.cursor() as cursor:
+            for table in tables:
+                columns = [(row[1], row[2].upper()) for row in source.execute(
+                    f"PRAGMA table_info({quote_identifier(table)})"
+                )]
+                table_columns[table] = {name for name, _ in columns}
+                column_list = ", ".join(quote_identifier(name) for name, _ in columns)
+                definitions = ", ".join(
+                    f"{quote_identifier(name)} "
+                    f"{'TIMESTAMP' if name in POSTGRES_TIME_COLUMNS else POSTGRES_TYPES.get(kind, 'TEXT')}"
+                    for name, kind in columns
+                )
+                cursor.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+                cursor.execute(f"CREATE TABLE {quote_identifier(table)} ({definitions})")
+
+                rows = source.execute(f"SELECT {column_list} FROM {quote_identifier(table)}")
+                counts[table] = 0
+                while True:
+                    chunk = rows.fetchmany(CHUNK_ROWS)
+                    if not chunk:
+                        break
+                    buffer = io.StringIO()
+                    csv.writer(buffer).writerows(chunk)
+                    buffer.seek(0)
+                    cursor.copy_expert(
+                        f"COPY {quote_identifier(table)} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer
+                    )
+                    counts[table] += len(chunk)
+
+            if create_indexes:
+                for table, indexes in SUGGESTED_INDEXES.items():
+                    for index_name, index_columns in indexes:
+                        if set(index_columns) <= table_columns.get(table, set()):
+                            cursor.execute(
+                                f"CREATE INDEX {quote_identifier(index_name)} ON {quote_identifier(table)} "
+                                f"({', '.join(quote_identifier(c) for c in index_columns)})"
+                            )
+            cursor.execute("ANALYZE")
+    finally:
+        source.close()
+        target.close()
+    return {
+        "database": redact_url(database_url),
+        "indexed": create_indexes,
+        "table_rows": counts,
+        "load_seconds": time.perf_counter() - started
+    }
+
+
+def _git_revision():
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        return completed.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def benchmark_checks(db_path, repeats=3, connection_manager=None):
+    """Time every database check of both verifiers against db_path (or connection_manager)
+
+    The first call is reported as cold (empty pool, schema cache and SQLite
+    page cache); the median of the following repeats as warm.
+    """
+    from ml_settings_verification import MLSettingsVerifier
+    from ml_verification_suite import MLDataSourceVerifier
+
+    results = {}
+    with connection_manager or SQLiteConnectionManager(db_path) as db:
+        verifiers = [MLDataSourceVerifier(db_path, connection_manager=db),
+                     MLSettingsVerifier(db_path, connection_manager=db)]
+        for verifier in verifiers:
+            for name, check in verifier.database_checks().items():
+                samples = []
+                result = None
+                for _ in range(repeats + 1):
+                    started = time.perf_counter()
+                    result = check()
+                    samples.append(time.perf_counter() - started)
+                perf = result.get("_perf", {}) if isinstance(result, dict) else {}
+                results[f"{type(verifier).__name__}.{name}"] = {
+                    "cold_seconds": samples[0],
+                    "warm_seconds": statistics.median(samples[1:]) if repeats else None,
+                    "statement_count": perf.get("statement_count"),
+                    "rows_returned": perf.get("rows_returned"),
+                    "dataframe_bytes": perf.get("dataframe_bytes"),
+                    "error": result.get("error") if isinstance(result, dict) else None
+                }
+    return results
+
+
+def run_benchmark(sizes=(10_000, 100_000), seed=42, repeats=3, work_dir="bench_dbs",
+                  create_indexes=False, reuse=False, database_url=None):
+    """Generate one synthetic database per size and benchmark the checks on each
+
+    With database_url, each database is also copied into PostgreSQL and the
+    same checks are timed there for comparison.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+    run = {
+        "revision": _git_revision(),
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "seed": seed,
+        "repeats": repeats,
+        "indexed": create_indexes,
+        "postgres": redact_url(database_url) if database_url else None,
+        "sizes": {}
+    }
+    for rows in sizes:
+        db_path = os.path.join(work_dir, f"synthetic_{rows}_{seed}{'_indexed' if create_indexes else ''}.db")
+        if reuse and os.path.exists(db_path):
+            generation = {"path": db_path, "rows": rows, "reused": True}
+        else:
+            logger.info(f"Generating {rows:,} row synthetic database at {db_path}")
+            generation = generate_synthetic_db(db_path, rows=rows, seed=seed, create_indexes=create_indexes)
+        logger.info(f"Benchmarking checks on {db_path}")
+        run["sizes"][str(rows)] = {
+            "database": generation,
+            "checks": benchmark_checks(db_path, repeats=repeats)
+        }
+        if database_url:
+            logger.info(f"Copying {db_path} into {redact_url(database_url)}")
+            load = load_into_postgres(db_path, database_url, create_indexes=create_indexes)
+            run["sizes"][str(rows)]["postgres"] = {
+                "load": load,
+                "checks": benchmark_checks(
+                    db_path, repeats=repeats, connection_manager=open_connection_manager(database_url=database_url)
+                )
+            }
+    return run
+
+
+async def benchmark_live(db_path, recording_path, concurrency_levels=(1, 2, 4, 8, 16), repeats=3,
+                         symbols=None, **replay_options):
+    """Time the live sweep against recorded exchange responses at several concurrency caps"""
+    from ml_verification_replay import replay_exchanges
+    from ml_verification_suite import MLDataSourceVerifier
+
+    results = {}
+    with SQLiteConnectionManager(db_path) as db:
+        for max_concurrency in concurrency_levels:
+            # Fresh replay exchanges per level so each one sees the same responses and failures
+            verifier = MLDataSourceVerifier(db_path, connection_manager=db)
+            await verifier.initialize_exchanges(replay=replay_exchanges(recording_path, **replay_options))
+            samples, requests, errors = [], 0, 0
+            for _ in range(repeats):
+                sweep = await verifier.verify_real_time_data_sweep(symbols=symbols, max_concurrency=max_concurrency)
+                samples.append(sweep["wall_clock_seconds"])
+                requests += sweep["request_count"]
+                errors += sum("error" in result for per_exchange in sweep["results"].values()
+                              for result in per_exchange.values())
+            wall = statistics.median(samples)
+            results[str(max_concurrency)] = {
+                "wall_seconds": wall,
+                "requests_per_sweep": requests // repeats,
+                "requests_per_second": (requests / repeats) / wall if wall else None,
+                "errors": errors
+            }
+    return results
+
+
+def print_live_benchmark(results):
+    print("\n🌐 LIVE SWEEP BENCHMARK (replayed exchanges)")
+    print("-" * 50)
+    for max_concurrency, timing in results.items():
+        print(f"   • concurrency {max_concurrency}: {timing['wall_seconds'] * 1000:.0f}ms per sweep, "
+              f"{timing['requests_per_second'] or 0:.1f} req/s, {timing['errors']} errors")
+
+
+def load_results(path=DEFAULT_RESULTS_PATH):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_run(run, path=DEFAULT_RESULTS_PATH):
+    """Append run to the results file (replaced atomically)"""
+    runs = load_results(path)
+    runs.append(run)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".ml-bench-", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(runs, f, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return runs
+
+
+def compare_runs(previous, current, tolerance=1.2, min_delta_seconds=0.005):
+    """Checks whose warm time grew by more than tolerance between two runs, per size
+
+    Slowdowns smaller than min_delta_seconds are timer noise and not reported.
+    """
+    regressions = []
+    for size, current_size in current["sizes"].items():
+        previous_checks = previous.get("sizes", {}).get(size, {}).get("checks", {})
+        for name, timing in current_size["checks"].items():
+            before = previous_checks.get(name, {}).get("warm_seconds")
+            after = timing.get("warm_seconds")
+            if before and after and after > before * tolerance and after - before >= min_delta_seconds:
+                regressions.append({"size": size, "check": name, "before": before, "after": after,
+                                    "ratio": after / before})
+    return regressions
+
+
+def print_benchmark(run, previous=None, tolerance=1.2):
+    """Print a benchmark run, flagging regressions against previous"""
+    print(f"\n📏 VERIFIER BENCHMARK (revision {run['revision'] or 'unknown'}, "
+          f"{run['repeats']} warm repeats, indexed={run['indexed']})")
+    print("=" * 60)
+    for size, data in run["sizes"].items():
+        print(f"\n📦 {int(size):,} rows")
+        for name, timing in data["checks"].items():
+            warm = f"{timing['warm_seconds'] * 1000:.1f}ms" if timing["warm_seconds"] is not None else "-"
+            status = f"❌ {timing['error']}" if timing["error"] else "✅"
+            print(f"   {status} {name}: cold {timing['cold_seconds'] * 1000:.1f}ms, warm {warm}, "
+                  f"{timing['rows_returned']} rows")
+        if "postgres" in data:
+            print(f"   🐘 PostgreSQL (loaded in {data['postgres']['load']['load_seconds']:.1f}s):")
+            for name, timing in data["postgres"]["checks"].items():
+                warm = f"{timing['warm_seconds'] * 1000:.1f}ms" if timing["warm_seconds"] is not None else "-"
+                sqlite_warm = data["checks"].get(name, {}).get("warm_seconds")
+                versus = f" ({timing['warm_seconds'] / sqlite_warm:.1f}x SQLite)" \
+                    if timing["warm_seconds"] and sqlite_warm else ""
+                status = f"❌ {timing['error']}" if timing["error"] else "✅"
+                print(f"      {status} {name}: cold {timing['cold_seconds'] * 1000:.1f}ms, warm {warm}{versus}")
+    if previous:
+        regressions = compare_runs(previous, run, tolerance)
+        print(f"\n🔁 Compared with revision {previous.get('revision') or 'unknown'} ({previous.get('started_at')}):")
+        if not regressions:
+            print(f"   ✅ No check slowed down by more than {tolerance - 1:.0%}")
+        for regression in regressions:
+            print(f"   ⚠️ {regression['check']} @ {int(regression['size']):,} rows: "
+                  f"{regression['before'] * 1000:.1f}ms → {regression['after'] * 1000:.1f}ms "
+                  f"({regression['ratio']:.2f}x)")
+
+
+def parse_args(argv=None):
+    """Command line options for the generator and benchmark"""
+    parser = argparse.ArgumentParser(description="Synthetic memebot.db generator and verifier benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="Write one synthetic database")
+    generate.add_argument("--output", default="synthetic_memebot.db")
+    generate.add_argument("--rows", type=int, default=10_000, help="Rows in price_data and paper_trades")
+    generate.add_argument("--seed", type=int, default=42)
+    generate.add_argument("--span-days", type=float, default=DEFAULT_SPAN_DAYS)
+    generate.add_argument("--create-indexes", action="store_true", help="Also create the suggested indexes")
+
+    bench = commands.add_parser("run", help="Benchmark every database check across sizes")
+    bench.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    bench.add_argument("--seed", type=int, default=42)
+    bench.add_argument("--repeats", type=int, default=3)
+    bench.add_argument("--work-dir", default="bench_dbs", help="Where the synthetic databases are kept")
+    bench.add_argument("--reuse", action="store_true", help="Reuse databases generated by an earlier run")
+    bench.add_argument("--create-indexes", action="store_true", help="Benchmark with the suggested indexes")
+    bench.add_argument("--results", default=DEFAULT_RESULTS_PATH, help="JSON file runs are appended to")
+    bench.add_argument("--tolerance", type=float, default=1.2,
+                       help="Flag checks whose warm time grew by more than this factor")
+    bench.add_argument("--database-url", metavar="URL",
+                       help="Also copy each database into this PostgreSQL database and time the checks there")
+
+    live = commands.add_parser("live", help="Benchmark the live sweep against a --record recording")
+    live.add_argument("--recording", required=True, help="File written by ml_verification_suite.py --record")
+    live.add_argument("--db-path", default="memebot.db", help="Database the live prices are compared with")
+    live.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    live.add_argument("--repeats", type=int, default=3)
+    live.add_argument("--symbols", nargs="+", help="Symbols to sweep; defaults to all in price_data")
+    live.add_argument("--latency", type=float, help="Fixed response latency in seconds")
+    live.add_argument("--latency-scale", type=float, default=1.0)
+    live.add_argument("--error-rate", type=float, default=0.0)
+    live.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "generate":
+        info = generate_synthetic_db(args.output, rows=args.rows, seed=args.seed,
+                                     span_days=args.span_days, create_indexes=args.create_indexes)
+        print(f"✅ Wrote {args.output} in {info['generation_seconds']:.1f}s: "
+              + ", ".join(f"{table} {count:,}" for table, count in info["table_rows"].items()))
+        return info
+
+    if args.command == "live":
+        results = asyncio.run(benchmark_live(
+            args.db_path, args.recording, concurrency_levels=args.concurrency, repeats=args.repeats,
+            symbols=args.symbols, latency=args.latency, latency_scale=args.latency_scale,
+            error_rate=args.error_rate, seed=args.seed
+        ))
+        print_live_benchmark(results)
+        return results
+
+    previous_runs = [r for r in load_results(args.results) if r.get("indexed") == args.create_indexes]
+    run = run_benchmark(sizes=args.sizes, seed=args.seed, repeats=args.repeats, work_dir=args.work_dir,
+                        create_indexes=args.create_indexes, reuse=args.reuse, database_url=args.database_url)
+    save_run(run, args.results)
+    print_benchmark(run, previous_runs[-1] if previous_runs else None, args.tolerance)
+    print(f"\n💾 Results appended to {args.results}")
+    return run
+
+
+if __name__ == "__main__":
+    main()
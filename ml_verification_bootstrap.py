@@ -0,0 +1,197 @@
+# ml_verification_bootstrap.py - Bootstrap and permutation tests for confidence bucket effectiveness
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from ml_verification_startup import LazyModule
+from ml_verification_stats import comparison_labels
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESAMPLES = 10000
+DEFAULT_CONFIDENCE_LEVEL = 0.95
+# Fixed by default so reruns on unchanged data print the same intervals
+DEFAULT_BOOTSTRAP_SEED = 0
+# Rows of each resampling index matrix; also the unit of work sent to a worker
+BATCH_RESAMPLES = 250
+# Buckets up to this size are resampled trade by trade; larger ones from profit atoms
+EXACT_MAX_TRADES = 2048
+# Quantile atoms per profit sign for large buckets
+PROFIT_ATOMS = 256
+# Below this many draws in total a process pool costs more than it saves
+PARALLEL_MIN_DRAWS = 20_000_000
+
+
+def compress_profits(profit, max_exact=EXACT_MAX_TRADES, atoms=PROFIT_ATOMS):
+    """(values, counts) a bucket's profits are resampled from
+
+    Small buckets keep every trade (all counts 1). Larger ones are reduced
+    to quantile atoms: the sorted profits of each sign are cut into equal
+    runs, each stood in for by its mean. Resampling atom counts from a
+    multinomial then has the same distribution as resampling trades. The
+    success rate stays exact, and the mean profit is exact up to the
+    spread within each run. That spread is lost, though, so profit
+    intervals come out narrower than trade-level resampling gives when a
+    few trades dominate; bootstrap_buckets() flags these buckets as
+    approximate.
+    """
+    profit = np.asarray(profit, dtype=float)
+    if len(profit) <= max_exact:
+        return profit, np.ones(len(profit), dtype=np.int64)
+    values, counts = [], []
+    for part in (np.sort(profit[profit <= 0]), np.sort(profit[profit > 0])):
+        if len(part) == 0:
+            continue
+        bounds = np.unique(np.linspace(0, len(part), min(atoms, len(part)) + 1).astype(np.int64))
+        sizes = np.diff(bounds)
+        values.append(np.add.reduceat(part, bounds[:-1]) / sizes)
+        counts.append(sizes)
+    return np.concatenate(values), np.concatenate(counts)
+
+
+def _resample_means(rng, values, counts, resamples):
+    """(mean profit, success rate) of `resamples` bootstrap samples of one bucket"""
+    n = int(counts.sum())
+    if len(values) == n:
+        # Exact: one row of trade indices per resample
+        draws = values[rng.integers(0, n, size=(resamples, n))]
+        return draws.mean(axis=1), (draws > 0).mean(axis=1)
+    weights = rng.multinomial(n, counts / n, size=resamples)
+    return weights @ values / n, weights[:, values > 0].sum(axis=1) / n
+
+
+def _permuted_differences(rng, high, low, resamples):
+    """High-minus-low (mean profit, success rate) with the bucket labels shuffled"""
+    values = np.concatenate([high[0], low[0]])
+    counts = np.concatenate([high[1], low[1]])
+    n_high, n_low = int(high[1].sum()), int(low[1].sum())
+    total = values @ counts
+    total_success = counts[values > 0].sum()
+    if len(values) == n_high + n_low:
+        # Exact: a shuffled index row per resample, the first n_high go to "high"
+        order = rng.permuted(np.tile(np.arange(len(values)), (resamples, 1)), axis=1)[:, :n_high]
+        picked = values[order]
+        high_sum, high_success = picked.sum(axis=1), (picked > 0).sum(axis=1)
+    else:
+        weights = rng.multivariate_hypergeometric(counts, n_high, size=resamples)
+        high_sum, high_success = weights @ values, weights[:, values > 0].sum(axis=1)
+    profit_diff = high_sum / n_high - (total - high_sum) / n_low
+    success_diff = high_success / n_high - (total_success - high_success) / n_low
+    return profit_diff, success_diff
+
+
+def _resample_batch(buckets, pair, resamples, seed):
+    """One batch of bootstrap and permutation resamples; runs in a worker process"""
+    rng = np.random.default_rng(seed)
+    profit = np.empty((len(buckets), resamples))
+    success = np.empty((len(buckets), resamples))
+    for i, (values, counts) in enumerate(buckets):
+        profit[i], success[i] = _resample_means(rng, values, counts, resamples)
+    permuted = None
+    if pair is not None:
+        permuted = _permuted_differences(rng, buckets[pair[0]], buckets[pair[1]], resamples)
+    return profit, success, permuted
+
+
+def _interval(samples, level):
+    tail = (1 - level) / 2 * 100
+    low, high = np.percentile(samples, [tail, 100 - tail])
+    return [float(low), float(high)]
+
+
+def bootstrap_buckets(confidence, profit, edges, labels, resamples=DEFAULT_RESAMPLES,
+                      level=DEFAULT_CONFIDENCE_LEVEL, seed=None, workers=None):
+    """Bootstrap intervals per confidence bucket and a permutation test of high against low
+
+    Trades are resampled within their bucket. Every bucket and the
+    high-minus-low difference (the buckets confidence_correlates_with_success
+    compares) come from the same resamples. Resamples run in batches, each
+    with its own child of the seed, so a given seed gives the same intervals
+    whatever the number of workers.
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    profit = np.nan_to_num(np.asarray(profit, dtype=float))
+    bucket_index = np.digitize(confidence, edges) - 1
+
+    present = [i for i in range(len(labels)) if (bucket_index == i).any()]
+    observed = {}
+    buckets = []
+    for i in present:
+        bucket_profit = profit[bucket_index == i]
+        observed[labels[i]] = (len(bucket_profit), float(bucket_profit.mean()), float((bucket_profit > 0).mean()))
+        buckets.append(compress_profits(bucket_profit))
+    names = [labels[i] for i in present]
+    high_label, low_label = comparison_labels(labels, names)
+    pair = None
+    if high_label in names and low_label in names and high_label != low_label:
+        pair = (names.index(high_label), names.index(low_label))
+
+    batches = [BATCH_RESAMPLES] * (resamples // BATCH_RESAMPLES)
+    if resamples % BATCH_RESAMPLES:
+        batches.append(resamples % BATCH_RESAMPLES)
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    draws = resamples * sum(len(values) for values, _ in buckets)
+    workers = min(workers or os.cpu_count() or 1, len(batches))
+    if workers > 1 and draws >= PARALLEL_MIN_DRAWS:
+        # spawn, not fork: checks run on scheduler threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            results = list(pool.map(_resample_batch, [buckets] * len(batches), [pair] * len(batches),
+                                    batches, seeds))
+    else:
+        workers = 1
+        results = [_resample_batch(buckets, pair, size, child) for size, child in zip(batches, seeds)]
+
+    if buckets:
+        profit_samples = np.concatenate([r[0] for r in results], axis=1)
+        success_samples = np.concatenate([r[1] for r in results], axis=1)
+    summary = {}
+    for i, label in enumerate(names):
+        count, avg_profit, success_rate = observed[label]
+        summary[label] = {
+            "trade_count": count,
+            "success_rate": success_rate,
+            "success_rate_ci": _interval(success_samples[i], level),
+            "avg_profit": avg_profit,
+            "avg_profit_ci": _interval(profit_samples[i], level),
+            # Profit resampled from quantile atoms: the profit interval is narrower
+            # than trade-by-trade resampling gives for heavy-tailed profits
+            "approximate": len(buckets[i][0]) < count,
+            "profit_atoms": len(buckets[i][0])
+        }
+
+    result = {
+        "resamples": resamples,
+        "confidence_level": level,
+        "seed": seed,
+        "workers": workers,
+        "buckets": summary,
+        "approximate_buckets": [label for label in names if summary[label]["approximate"]]
+    }
+    if pair is not None:
+        high, low = pair
+        success_diff = success_samples[high] - success_samples[low]
+        profit_diff = profit_samples[high] - profit_samples[low]
+        permuted_profit = np.concatenate([r[2][0] for r in results])
+        permuted_success = np.concatenate([r[2][1] for r in results])
+        observed_success = summary[high_label]["success_rate"] - summary[low_label]["success_rate"]
+        observed_profit = summary[high_label]["avg_profit"] - summary[low_label]["avg_profit"]
+        difference = {
+            "high": high_label,
+            "low": low_label,
+            "success_rate": observed_success,
+            "success_rate_ci": _interval(success_diff, level),
+            # One-sided: how often shuffled labels do at least as well as the real ones
+            "success_rate_p_value": float((1 + (permuted_success >= observed_success).sum()) / (1 + resamples)),
+            "avg_profit": observed_profit,
+            "avg_profit_ci": _interval(profit_diff, level),
+            "avg_profit_p_value": float((1 + (permuted_profit >= observed_profit).sum()) / (1 + resamples)),
+            "approximate": summary[high_label]["approximate"] or summary[low_label]["approximate"]
+        }
+        difference["significant"] = (
+            difference["success_rate_ci"][0] > 0 and difference["success_rate_p_value"] < 1 - level
+        )
+        result["difference"] = difference
+    return result
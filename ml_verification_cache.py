@@ -0,0 +1,257 @@
+# ml_verification_cache.py - Check result cache keyed on the database's change version
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import logging
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
+
+# Bump when the shape of cached results changes so old entries are ignored
+CACHE_FORMAT = 2
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_CACHE_MAX_ENTRIES = 256
+
+
+def json_default(value):
+    """Serialize numpy scalars, timestamps and anything else the checks return"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class DatabaseVersion:
+    """Identity and change version of a SQLite file, for telling whether anything was written
+
+    The file stats cover every committed write: rollback-journal commits
+    touch the database file and WAL commits touch the -wal file. PRAGMA
+    data_version on a long-lived probe connection also catches writes that
+    land within the filesystem's timestamp resolution. Its value only means
+    something to that one connection, so it is folded in as a count of such
+    writes rather than stored directly.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._probe = None
+        self._last_stat = None
+        self._last_data_version = None
+        self._hidden_writes = 0
+        self._lock = threading.Lock()
+
+    def _wal_stat(self):
+        try:
+            st = os.stat(f"{self.db_path}-wal")
+        except FileNotFoundError:
+            return None
+        # SQLite creates and deletes an empty -wal as connections come and go
+        return [st.st_size, st.st_mtime_ns] if st.st_size else None
+
+    def _data_version(self):
+        try:
+            if self._probe is None:
+                uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+                self._probe = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return self._probe.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.debug(f"data_version probe on {self.db_path} failed: {e}")
+            return None
+
+    def current(self):
+        """Version token for the database as it is right now"""
+        with self._lock:
+            st = os.stat(self.db_path)
+            file_stat = {
+                "path": os.path.realpath(self.db_path),
+                "device": st.st_dev,
+                "inode": st.st_ino,
+                "db": [st.st_size, st.st_mtime_ns],
+                "wal": self._wal_stat(),
+            }
+            data_version = self._data_version()
+            if (file_stat == self._last_stat and data_version is not None
+                    and self._last_data_version is not None and data_version != self._last_data_version):
+                self._hidden_writes += 1
+            self._last_stat = file_stat
+            self._last_data_version = data_version
+            return dict(file_stat, hidden_writes=self._hidden_writes)
+
+    def close(self):
+        with self._lock:
+            if self._probe is not None:
+                self._probe.close()
+                self._probe = None
+
+
+class ResultCache:
+    """Check results stored as JSON on disk, valid while the database version and parameters match
+
+    JSON rather than pickle: the cache directory sits next to memebot.db,
+    and loading a pickle from it would run whatever code was written there.
+
+    Entries older than ttl_seconds are never returned: most checks look at a
+    window ending "now", so even an unchanged database drifts out of date.
+    When the directory holds more than max_bytes or max_entries, the least
+    recently used entries are removed first.
+    """
+
+    def __init__(self, directory, db_path, ttl_seconds=DEFAULT_CACHE_TTL,
+                 max_bytes=DEFAULT_CACHE_MAX_BYTES, max_entries=DEFAULT_CACHE_MAX_ENTRIES):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.database_version = DatabaseVersion(db_path)
+        self._pinned_version = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def for_database(cls, db_path, **options):
+        return cls(f"{db_path}.verify-cache", db_path, **options)
+
+    def version(self):
+        if self._pinned_version is not None:
+            return self._pinned_version
+        return self.database_version.current()
+
+    def pin_version(self):
+        """Key every later lookup and store on the database version as it is now
+
+        For checks that run against a copy of the database: read the version
+        before the copy is made, so a write landing during or after the copy
+        can never be cached as the data the checks saw.
+        """
+        self._pinned_version = self.database_version.current()
+        return self._pinned_version
+
+    def _entry_path(self, name, params):
+        key = json.dumps([CACHE_FORMAT, name, params], sort_keys=True, default=str)
+        return os.path.join(self.directory, f"{name}-{hashlib.sha256(key.encode()).hexdigest()[:16]}.json")
+
+    def get(self, name, params, version):
+        """Return (result, age_seconds) for a still-valid entry, else None"""
+        path = self._entry_path(name, params)
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+            age = time.time() - entry["stored_at"]
+            stored_version = entry["version"]
+            result = entry["result"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+        # Compared as JSON, the form the version was stored in
+        if stored_version != json.loads(json.dumps(version)) or age > self.ttl_seconds:
+            return None
+        try:
+            # The file's mtime doubles as its last-used time for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return result, age
+
+    def put(self, name, params, version, result):
+        """Store a result; the entry is written atomically, then the cache is trimmed"""
+        entry = {"name": name, "params": params, "version": version, "stored_at": time.time(), "result": result}
+        try:
+            payload = json.dumps(entry, default=json_default)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Not caching {name}: result cannot be stored as JSON ({e})")
+            return
+        fd, tmp_path = tempfile.mkstemp(prefix=".verify-cache-", dir=self.directory)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._entry_path(name, params))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size limits"""
+        with self._lock:
+            entries = []
+            now = time.time()
+            for item in os.scandir(self.directory):
+                if item.name.endswith(".pickle"):
+                    # Entries from before the JSON format are never loaded
+                    try:
+                        os.unlink(item.path)
+                    except FileNotFoundError:
+                        pass
+                    continue
+                if not item.name.endswith(".json"):
+                    continue
+                try:
+                    st = item.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, item.path))
+
+            removed = 0
+            entries.sort()
+            total_bytes = sum(size for _, size, _ in entries)
+            for used_at, size, path in entries:
+                expired = now - used_at > self.ttl_seconds
+                if not expired and total_bytes <= self.max_bytes and len(entries) - removed <= self.max_entries:
+                    continue
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                removed += 1
+                total_bytes -= size
+            return removed
+
+    def lookup(self, name, params, version):
+        """A cached result marked with its age under "_cache", or None on a miss"""
+        cached = self.get(name, params, version)
+        if cached is None:
+            return None
+        result, age = cached
+        if isinstance(result, dict):
+            result["_cache"] = {"hit": True, "age_seconds": age}
+        return result
+
+    def compute(self, name, params, version, func):
+        """Run func() and cache its result unless it reports an error"""
+        result = func()
+        # Errors are usually transient (locks, timeouts) and are not worth keeping
+        if isinstance(result, dict) and "error" not in result:
+            self.put(name, params, version, result)
+            result["_cache"] = {"hit": False, "age_seconds": 0.0}
+        return result
+
+    def cached_call(self, name, params, version, func):
+        """Return func()'s result from cache when possible; the result says whether it was"""
+        result = self.lookup(name, params, version)
+        return result if result is not None else self.compute(name, params, version, func)
+
+    def close(self):
+        self.database_version.close()
+
+
+def cache_status(result):
+    """The _cache marker of a check result, or None if the check was not cached"""
+    return result.get("_cache") if isinstance(result, dict) else None
+
+
+def format_age(seconds):
+    """Short human readable age, e.g. 45s, 3m 20s, 2h 5m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m"
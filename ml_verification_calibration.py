@@ -0,0 +1,195 @@
+# ml_verification_calibration.py - Reliability curves, Brier score and ECE for trade confidence
+import logging
+
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CALIBRATION_BINS = 10
+# Calibration needs far more trades than the last 1000 the bucket check reads
+DEFAULT_CALIBRATION_WINDOW_DAYS = 30
+# Groups with fewer trades are reported but not judged
+MIN_CALIBRATION_TRADES = 50
+# Expected calibration error above which confidence is reported as miscalibrated
+MAX_CALIBRATED_ECE = 0.1
+
+
+def grouped_calibration(confidence, outcome, group_codes, n_groups, n_bins=DEFAULT_CALIBRATION_BINS,
+                        presorted=False):
+    """Adaptive-bin calibration statistics for every group in one sort and a handful of bincounts
+
+    Trades are sorted by (group, confidence), and each group is cut into
+    n_bins bins of equal trade count. Sparse confidence ranges therefore
+    never leave a bin with a handful of trades. Returns per-group arrays;
+    the bin arrays have shape (n_groups, n_bins). With presorted, the
+    inputs are already in confidence order.
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    outcome = np.asarray(outcome, dtype=float)
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+
+    order = None if presorted else np.argsort(confidence, kind="stable")
+    if n_groups > 1:
+        # A stable sort by group keeps confidence order within each group;
+        # codes that fit 16 bits are radix sorted in linear time
+        codes = group_codes if order is None else group_codes[order]
+        by_group = np.argsort(codes.astype(np.min_scalar_type(n_groups)), kind="stable")
+        order = by_group if order is None else order[by_group]
+    if order is None:
+        conf, hit, group = confidence, outcome, group_codes
+    else:
+        conf, hit, group = confidence[order], outcome[order], group_codes[order]
+    sizes = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    rank = np.arange(len(conf)) - starts[group]
+    bins = np.minimum(rank * n_bins // np.maximum(sizes[group], 1), n_bins - 1)
+
+    # Cells are (group, bin) pairs; they come out in ascending order from the sort
+    cell = group * n_bins + bins
+    cells = n_groups * n_bins
+    count = np.bincount(cell, minlength=cells)
+    conf_sum = np.bincount(cell, weights=conf, minlength=cells)
+    hit_sum = np.bincount(cell, weights=hit, minlength=cells)
+    first = np.searchsorted(cell, np.arange(cells), side="left")
+    last = np.searchsorted(cell, np.arange(cells), side="right") - 1
+    occupied = count > 0
+    lower = np.where(occupied, conf[np.minimum(first, len(conf) - 1)], np.nan)
+    upper = np.where(occupied, conf[np.maximum(last, 0)], np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_conf = conf_sum / count
+        observed = hit_sum / count
+        gap = np.abs(observed - mean_conf)
+        # count * |observed - mean confidence| summed over bins, per trade
+        ece = np.abs(hit_sum - conf_sum).reshape(n_groups, n_bins).sum(axis=1) / sizes
+        mce = np.where(occupied, gap, -np.inf).reshape(n_groups, n_bins).max(axis=1)
+        brier = np.bincount(group, weights=(conf - hit) ** 2, minlength=n_groups) / sizes
+        base_rate = np.bincount(group, weights=hit, minlength=n_groups) / sizes
+        mean_confidence = np.bincount(group, weights=conf, minlength=n_groups) / sizes
+        # Skill against always predicting the group's own success rate
+        brier_skill = 1 - brier / (base_rate * (1 - base_rate))
+
+    shape = (n_groups, n_bins)
+    return {
+        "trades": sizes,
+        "brier": brier,
+        "brier_skill": brier_skill,
+        "ece": ece,
+        "mce": np.where(np.isfinite(mce), mce, np.nan),
+        "base_rate": base_rate,
+        "mean_confidence": mean_confidence,
+        "bin_trades": count.reshape(shape),
+        "bin_lower": lower.reshape(shape),
+        "bin_upper": upper.reshape(shape),
+        "bin_confidence": mean_conf.reshape(shape),
+        "bin_observed": observed.reshape(shape)
+    }
+
+
+def _finite(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def _group_summary(stats, i, with_curve):
+    trades = int(stats["trades"][i])
+    if trades == 0:
+        return {"trades": 0}
+    summary = {
+        "trades": trades,
+        "brier": _finite(stats["brier"][i]),
+        "brier_skill": _finite(stats["brier_skill"][i]),
+        "ece": _finite(stats["ece"][i]),
+        "mce": _finite(stats["mce"][i]),
+        "success_rate": _finite(stats["base_rate"][i]),
+        "mean_confidence": _finite(stats["mean_confidence"][i]),
+        "enough_trades": trades >= MIN_CALIBRATION_TRADES
+    }
+    if with_curve:
+        summary["curve"] = [
+            {
+                "lower": float(stats["bin_lower"][i, b]),
+                "upper": float(stats["bin_upper"][i, b]),
+                "trades": int(stats["bin_trades"][i, b]),
+                "mean_confidence": float(stats["bin_confidence"][i, b]),
+                "observed_rate": float(stats["bin_observed"][i, b])
+            }
+            for b in range(stats["bin_trades"].shape[1]) if stats["bin_trades"][i, b] > 0
+        ]
+    return summary
+
+
+def calibrate_by(confidence, outcome, keys, n_bins=DEFAULT_CALIBRATION_BINS, names=(), with_curve=True,
+                 order=None):
+    """{key: calibration summary} for every distinct key, plus every name in names
+
+    names lists groups to report even when they have no trades, such as the
+    models registered in ml_models. Missing keys are grouped as "unknown".
+    order, when given, is the permutation that sorted confidence and outcome;
+    keys are still in their original order and are factorized before it is
+    applied.
+    """
+    codes, uniques = pd.factorize(keys)
+    uniques = [str(key) for key in uniques]
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(uniques), codes)
+        uniques.append("unknown")
+    if order is not None:
+        codes = codes[order]
+    stats = grouped_calibration(confidence, outcome, codes, len(uniques), n_bins, presorted=order is not None)
+    results = {}
+    for i, key in enumerate(uniques):
+        results[key] = _group_summary(stats, i, with_curve)
+    for name in names:
+        results.setdefault(str(name), {"trades": 0})
+    return results
+
+
+def calibrate_trades(trades, n_bins=DEFAULT_CALIBRATION_BINS, models=()):
+    """Overall, per-model and per-symbol calibration of confidence_score against profit > 0
+
+    trades needs confidence_score and profit columns; ml_model and symbol
+    breakdowns are added when those columns are present.
+    """
+    confidence = trades["confidence_score"].to_numpy(dtype=float)
+    out_of_range = int(((confidence < 0) | (confidence > 1)).sum())
+    # One confidence sort is shared by the overall curve and every breakdown
+    order = np.argsort(confidence, kind="stable")
+    confidence = np.clip(confidence[order], 0.0, 1.0)
+    outcome = (trades["profit"].to_numpy(dtype=float)[order] > 0).astype(float)
+
+    result = {
+        "trades": len(confidence),
+        "bins": n_bins,
+        "out_of_range_confidence": out_of_range,
+        "overall": {"trades": 0},
+        "well_calibrated": False
+    }
+    if len(confidence) == 0:
+        return result
+    overall = grouped_calibration(confidence, outcome, np.zeros(len(confidence), dtype=np.int64), 1, n_bins,
+                                  presorted=True)
+    result["overall"] = _group_summary(overall, 0, with_curve=True)
+    if "ml_model" in trades:
+        result["by_model"] = calibrate_by(confidence, outcome, trades["ml_model"].to_numpy(), n_bins,
+                                          names=models, order=order)
+    if "symbol" in trades:
+        result["by_symbol"] = calibrate_by(confidence, outcome, trades["symbol"].to_numpy(), n_bins,
+                                           with_curve=False, order=order)
+    ece = result["overall"].get("ece")
+    result["well_calibrated"] = ece is not None and ece <= MAX_CALIBRATED_ECE
+    return result
+
+
+def format_calibration(summary):
+    """One-line description of a calibration summary for the reports"""
+    if not summary.get("trades"):
+        return "no trades"
+    line = (f"{summary['trades']} trades, ECE {summary['ece']:.3f}, Brier {summary['brier']:.3f}, "
+            f"{summary['mean_confidence']:.1%} confidence vs {summary['success_rate']:.1%} success")
+    if not summary["enough_trades"]:
+        line += " (too few trades to judge)"
+    return line
@@ -0,0 +1,235 @@
+# ml_verification_changepoints.py - Per-model threshold history: changes, CUSUM change points and their trades
+import logging
+
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+logger = logging.getLogger(__name__)
+
+# How far back ml_model_history (and the trades linked to it) is read
+THRESHOLD_HISTORY_DAYS = 30
+# 95% point of the supremum of a Brownian bridge: the CUSUM critical value
+CUSUM_CRITICAL = 1.358
+# Level shifts smaller than this are not reported as change points
+MIN_THRESHOLD_SHIFT = 0.01
+# Fewest history rows on each side of a change point
+MIN_SEGMENT_ROWS = 2
+# Rounds of binary segmentation; each can split every segment once
+MAX_SEGMENT_ROUNDS = 32
+# Before/after comparisons with fewer trades on either side are not judged
+MIN_LINKED_TRADES = 20
+# A change is flagged when average profit after it falls by more than this fraction
+MIN_PROFIT_DROP = 0.1
+# Time offsets within one model's key; 2**33 seconds is over 270 years
+_KEY_SPAN = 2 ** 33
+
+
+def _epoch_seconds(values):
+    """int64 UTC seconds for SQLite timestamp text or PostgreSQL datetimes; NaT as the int64 minimum"""
+    times = pd.to_datetime(pd.Series(values), utc=True, errors="coerce").dt.tz_convert(None)
+    return times.to_numpy(dtype="datetime64[s]").astype(np.int64)
+
+
+def _timestamp(seconds):
+    return str(np.datetime64(int(seconds), "s")).replace("T", " ")
+
+
+def _sort_by_group(codes, seconds, n_groups):
+    """Permutation ordering rows by group, then time (a stable radix sort on the small codes)"""
+    order = np.argsort(seconds, kind="stable")
+    return order[np.argsort(codes[order].astype(np.min_scalar_type(max(n_groups, 1))), kind="stable")]
+
+
+def detect_change_points(values, group, n_groups, critical=CUSUM_CRITICAL, min_shift=MIN_THRESHOLD_SHIFT,
+                         min_segment=MIN_SEGMENT_ROWS):
+    """Indices where a new threshold level starts, for every group at once
+
+    values are sorted by group, then time. Binary segmentation with the
+    CUSUM statistic: each round centers every segment on its mean, and the
+    largest cumulative deviation inside a segment is its most likely change
+    point. It splits when that deviation, scaled by the group's noise and
+    sqrt(segment length), exceeds the Brownian-bridge critical value and
+    the two sides differ by at least min_shift. Every round is a handful of
+    O(n) array passes over all segments of all groups.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    sizes = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    seg_start = np.zeros(n, dtype=bool)
+    seg_start[starts[sizes > 0]] = True
+    statistics = np.zeros(n)
+    if n < 2:
+        return np.zeros(0, dtype=np.int64), statistics
+
+    # Noise per group from successive differences, which level shifts barely inflate
+    same = group[1:] == group[:-1]
+    squared = np.where(same, np.diff(values), 0.0) ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sigma = np.sqrt(np.bincount(group[1:], weights=squared, minlength=n_groups)
+                        / (2 * np.maximum(sizes - 1, 1)))
+    cum_values = np.concatenate(([0.0], np.cumsum(values)))
+    positions = np.arange(n)
+
+    for _ in range(MAX_SEGMENT_ROUNDS):
+        seg_id = np.cumsum(seg_start) - 1
+        seg_starts = np.flatnonzero(seg_start)
+        seg_len = np.diff(np.append(seg_starts, n))
+        seg_group = group[seg_starts]
+        seg_mean = (cum_values[seg_starts + seg_len] - cum_values[seg_starts]) / seg_len
+
+        # Cumulative deviation from the segment mean up to and including each row
+        left_len = positions - seg_starts[seg_id] + 1
+        left_sum = cum_values[positions + 1] - cum_values[seg_starts][seg_id]
+        cusum = left_sum - left_len * seg_mean[seg_id]
+        right_len = seg_len[seg_id] - left_len
+        score = np.where((left_len >= min_segment) & (right_len >= min_segment), np.abs(cusum), -1.0)
+
+        best = np.maximum.reduceat(score, seg_starts)
+        at = np.minimum.reduceat(np.where(score == best[seg_id], positions, n), seg_starts)
+        candidate = best >= 0
+        at = np.where(candidate, at, seg_starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            statistic = best / (sigma[seg_group] * np.sqrt(seg_len))
+            left_mean = (cum_values[at + 1] - cum_values[seg_starts]) / left_len[at]
+            right_mean = (cum_values[seg_starts + seg_len] - cum_values[at + 1]) / right_len[at]
+        split = candidate & (np.abs(right_mean - left_mean) >= min_shift) & ~(statistic <= critical)
+        if not split.any():
+            break
+        seg_start[at[split] + 1] = True
+        statistics[at[split] + 1] = np.where(np.isfinite(statistic[split]), statistic[split], np.inf)
+
+    group_start = np.zeros(n, dtype=bool)
+    group_start[starts[sizes > 0]] = True
+    return np.flatnonzero(seg_start & ~group_start), statistics
+
+
+def _performance(count, hits, profit):
+    if not count:
+        return {"trades": 0}
+    return {"trades": int(count), "success_rate": hits / count, "avg_profit": profit / count,
+            "total_profit": float(profit)}
+
+
+def analyze_threshold_history(history, trades=None, critical=CUSUM_CRITICAL, min_shift=MIN_THRESHOLD_SHIFT):
+    """Threshold changes, change frequency and change points per model, in one pass over the history
+
+    history has name, confidence_threshold and last_updated columns. trades,
+    when given, has ml_model, timestamp and profit columns; each change point
+    is then linked to the trades of that model made under the old threshold
+    level (from the previous change point) and under the new one (up to the
+    next).
+    """
+    history = history.dropna(subset=["name", "confidence_threshold", "last_updated"])
+    seconds = _epoch_seconds(history["last_updated"].to_numpy())
+    valid = seconds != np.iinfo(np.int64).min
+    codes, names = pd.factorize(history["name"].astype(str).to_numpy()[valid])
+    names = list(names)
+    seconds = seconds[valid]
+    n_groups = len(names)
+    if not n_groups:
+        return {"models": {}, "models_with_history": 0, "models_adjusting": 0, "threshold_changes": 0,
+                "change_points": 0, "trades_linked": False}
+    order = _sort_by_group(codes, seconds, n_groups)
+    group, when = codes[order], seconds[order]
+    value = history["confidence_threshold"].to_numpy(dtype=float)[valid][order]
+
+    sizes = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    ends = starts + sizes - 1
+    changed = np.zeros(len(value), dtype=bool)
+    if len(value) > 1:
+        changed[1:] = (group[1:] == group[:-1]) & (np.abs(np.diff(value)) > 1e-9)
+    change_counts = np.bincount(group[changed], minlength=n_groups)
+    points, statistics = detect_change_points(value, group, n_groups, critical, min_shift)
+
+    # Segment boundaries in time: each change point's level runs until the next one
+    boundary = np.zeros(len(value), dtype=bool)
+    boundary[starts[sizes > 0]] = True
+    boundary[points] = True
+    boundaries = np.flatnonzero(boundary)
+    rank = np.searchsorted(boundaries, points)
+    previous = boundaries[rank - 1]
+    following = np.append(boundaries, len(value))[rank + 1]
+    cum_values = np.concatenate(([0.0], np.cumsum(value)))
+    level_before = (cum_values[points] - cum_values[previous]) / (points - previous)
+    level_after = (cum_values[following] - cum_values[points]) / (following - points)
+
+    linked = None
+    if trades is not None and len(points) and {"ml_model", "timestamp", "profit"} <= set(trades.columns):
+        linked = _link_trades(trades, names, group, when, points, previous, following)
+
+    models = {}
+    for g, name in enumerate(names):
+        if not sizes[g]:
+            continue
+        span_days = (when[ends[g]] - when[starts[g]]) / 86400
+        models[name] = {
+            "snapshots": int(sizes[g]),
+            "first": _timestamp(when[starts[g]]),
+            "last": _timestamp(when[ends[g]]),
+            "current_threshold": float(value[ends[g]]),
+            "threshold_changes": int(change_counts[g]),
+            "changes_per_day": change_counts[g] / span_days if span_days > 0 else 0.0,
+            "change_points": []
+        }
+    for k, at in enumerate(points):
+        change = {
+            "at": _timestamp(when[at]),
+            "threshold_before": float(level_before[k]),
+            "threshold_after": float(level_after[k]),
+            "statistic": float(statistics[at]) if np.isfinite(statistics[at]) else None
+        }
+        if linked is not None:
+            change["before"] = _performance(*linked[0][k])
+            change["after"] = _performance(*linked[1][k])
+            if min(change["before"]["trades"], change["after"]["trades"]) >= MIN_LINKED_TRADES:
+                change["avg_profit_change"] = change["after"]["avg_profit"] - change["before"]["avg_profit"]
+                change["success_rate_change"] = change["after"]["success_rate"] - change["before"]["success_rate"]
+                change["worse_after"] = (
+                    change["avg_profit_change"] < -MIN_PROFIT_DROP * abs(change["before"]["avg_profit"])
+                )
+        models[names[group[at]]]["change_points"].append(change)
+
+    return {
+        "models": models,
+        "models_with_history": len(models),
+        "models_adjusting": int((change_counts > 0).sum()),
+        "threshold_changes": int(change_counts.sum()),
+        "change_points": len(points),
+        "trades_linked": linked is not None
+    }
+
+
+def _link_trades(trades, names, group, when, points, previous, following):
+    """(count, hits, profit) per change point before and after it, from one sort of the trades"""
+    codes = pd.Categorical(trades["ml_model"].astype(str), categories=names).codes.astype(np.int64)
+    seconds = _epoch_seconds(trades["timestamp"].to_numpy())
+    keep = (codes >= 0) & (seconds != np.iinfo(np.int64).min)
+    codes, seconds = codes[keep], seconds[keep]
+    profit = np.nan_to_num(trades["profit"].to_numpy(dtype=float)[keep])
+    order = _sort_by_group(codes, seconds, len(names))
+
+    # One sorted key per trade: the model in the high bits, its time offset in the low ones
+    origin = min(seconds.min(initial=when.min()), when.min())
+    trade_keys = codes[order] * _KEY_SPAN + (seconds[order] - origin)
+    cum_count = np.arange(len(trade_keys) + 1)
+    cum_hits = np.concatenate(([0], np.cumsum(profit[order] > 0)))
+    cum_profit = np.concatenate(([0.0], np.cumsum(profit[order])))
+
+    def key(rows):
+        return group[points] * _KEY_SPAN + (when[rows] - origin)
+
+    # The last level of a model runs to the end of its trades
+    last = following >= len(group)
+    following = np.minimum(following, len(group) - 1)
+    end_keys = np.where(last | (group[following] != group[points]),
+                        (group[points] + 1) * _KEY_SPAN, key(following))
+    lo, mid, hi = (np.searchsorted(trade_keys, keys) for keys in (key(previous), key(points), end_keys))
+
+    def window(a, b):
+        return list(zip((cum_count[b] - cum_count[a]).tolist(), (cum_hits[b] - cum_hits[a]).tolist(),
+                        (cum_profit[b] - cum_profit[a]).tolist()))
+    return window(lo, mid), window(mid, hi)
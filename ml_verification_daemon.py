@@ -0,0 +1,257 @@
+# ml_verification_daemon.py - Long-running verification with warm connections and exchange clients
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import tempfile
+import time
+from datetime import datetime
+
+from ml_verification_cache import DEFAULT_CACHE_TTL, ResultCache, json_default
+from ml_verification_db import SQLiteConnectionManager
+from ml_verification_incremental import IncrementalStateStore
+from ml_verification_replay import replay_exchanges
+from ml_verification_scheduler import DEFAULT_CHECK_TIMEOUT, CheckScheduler
+from ml_settings_verification import MLSettingsVerifier
+from ml_verification_suite import MLDataSourceVerifier
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def write_json_atomic(path, payload):
+    """Write payload to path so readers never see a partially written file"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".ml-verification-", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(payload, f, default=json_default)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class VerificationDaemon:
+    """Re-run the verification checks on a schedule, keeping every connection warm"""
+
+    def __init__(self, db_path="memebot.db", output_path="ml_verification_status.json",
+                 db_interval=60, live_interval=300, incremental=True,
+                 use_exchanges=True, sweep=False, symbols=None,
+                 socket_path=None, port=None, replay=None, cache_ttl=DEFAULT_CACHE_TTL,
+                 check_timeout=DEFAULT_CHECK_TIMEOUT):
+        # One connection pool and one state store shared by both verifiers
+        self.db = SQLiteConnectionManager(db_path)
+        state_store = IncrementalStateStore.for_database(db_path)
+        # Cycles that find the database unchanged reuse the previous results
+        self.result_cache = ResultCache.for_database(db_path, ttl_seconds=cache_ttl) if cache_ttl else None
+        self.data_verifier = MLDataSourceVerifier(db_path, connection_manager=self.db, state_store=state_store)
+        self.settings_verifier = MLSettingsVerifier(db_path, connection_manager=self.db, state_store=state_store)
+
+        self.output_path = output_path
+        self.db_interval = db_interval
+        self.live_interval = live_interval
+        self.incremental = incremental
+        self.check_timeout = check_timeout
+        self.use_exchanges = use_exchanges
+        self.sweep = sweep
+        self.symbols = symbols
+        self.socket_path = socket_path
+        self.port = port
+        self.replay = replay
+
+        self.latest = {
+            "started_at": datetime.now().isoformat(),
+            "cycles": {"db": 0, "live": 0}
+        }
+        self._stop = None
+
+    def check_registry(self):
+        """Both verifiers' report registries as one, so results match the reports and share cache entries"""
+        registry = self.settings_verifier.check_registry(incremental=self.incremental, timeout=self.check_timeout)
+        for check in self.data_verifier.check_registry(incremental=self.incremental, timeout=self.check_timeout):
+            # Both start from the same schema catalog check
+            if check.name != "schema":
+                registry.register(check.name, check.func, needs=check.needs, depends_on=check.depends_on,
+                                  timeout=check.timeout, params=check.params)
+        return registry
+
+    def run_db_checks(self):
+        """Run every database check of both verifiers (blocking)"""
+        started = time.perf_counter()
+        scheduler = CheckScheduler(max_workers=self.db.pool_size, default_timeout=self.check_timeout,
+                                   cache=self.result_cache)
+        results = scheduler.run(self.check_registry())
+        # The catalog is an input to the other checks, not a result
+        results.pop("schema", None)
+        return {
+            "completed_at": datetime.now().isoformat(),
+            "duration_seconds": time.perf_counter() - started,
+            "results": results,
+            "timings": scheduler.timings
+        }
+
+    async def run_live_checks(self):
+        """Compare live exchange data with the database over the warm exchange clients"""
+        started = time.perf_counter()
+        if self.sweep:
+            result = await self.data_verifier.verify_real_time_data_sweep(symbols=self.symbols)
+            depth_symbols = result.get("symbols_requested")
+        else:
+            result = await self.data_verifier.verify_real_time_data_flow()
+            depth_symbols = [result["symbol_tested"]]
+        depth = await self.data_verifier.verify_order_book_depth(symbols=depth_symbols)
+        return {
+            "completed_at": datetime.now().isoformat(),
+            "duration_seconds": time.perf_counter() - started,
+            "results": result,
+            "order_book_depth": depth
+        }
+
+    def publish(self):
+        """Write the latest results for the dashboard"""
+        self.latest["updated_at"] = datetime.now().isoformat()
+        self.latest["db_connections"] = self.db.stats()
+        if self.output_path:
+            write_json_atomic(self.output_path, self.latest)
+
+    async def _serve_latest(self, reader, writer):
+        # Each client gets one JSON document with the latest results, then EOF
+        try:
+            writer.write(json.dumps(self.latest, default=json_default).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _start_servers(self):
+        servers = []
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            servers.append(await asyncio.start_unix_server(self._serve_latest, path=self.socket_path))
+            logger.info(f"Serving latest results on {self.socket_path}")
+        if self.port:
+            servers.append(await asyncio.start_server(self._serve_latest, host="127.0.0.1", port=self.port))
+            logger.info(f"Serving latest results on 127.0.0.1:{self.port}")
+        return servers
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, max_cycles=None):
+        """Schedule DB and live checks on their own intervals until stopped"""
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+            except (NotImplementedError, RuntimeError):
+                pass  # Not supported on Windows event loops; Ctrl+C still raises
+
+        if self.replay is not None:
+            await self.data_verifier.initialize_exchanges(replay=self.replay)
+        elif self.use_exchanges:
+            await self.data_verifier.initialize_exchanges()
+        servers = await self._start_servers()
+
+        next_db = next_live = loop.time()
+        cycles = 0
+        try:
+            while not self._stop.is_set():
+                now = loop.time()
+                if now >= next_db:
+                    # Database checks block, so run them off the event loop
+                    self.latest["db_checks"] = await loop.run_in_executor(None, self.run_db_checks)
+                    self.latest["cycles"]["db"] += 1
+                    next_db = loop.time() + self.db_interval
+                    self.publish()
+                if self.data_verifier.exchanges and now >= next_live:
+                    try:
+                        self.latest["live_checks"] = await self.run_live_checks()
+                    except Exception as e:
+                        # One failing exchange or analysis must not end the daemon
+                        logger.exception("Live checks failed")
+                        self.latest["live_checks"] = {"completed_at": datetime.now().isoformat(), "error": str(e)}
+                    self.latest["cycles"]["live"] += 1
+                    next_live = loop.time() + self.live_interval
+                    self.publish()
+
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+
+                wake_at = next_db if not self.data_verifier.exchanges else min(next_db, next_live)
+                try:
+                    await asyncio.wait_for(self._stop.wait(), timeout=max(wake_at - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for server in servers:
+                server.close()
+                await server.wait_closed()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            for exchange in self.data_verifier.exchanges.values():
+                await exchange.close()
+            self.db.close()
+            if self.result_cache is not None:
+                self.result_cache.close()
+
+        return self.latest
+
+
+def parse_args(argv=None):
+    """Command line options for the verification daemon"""
+    parser = argparse.ArgumentParser(description="Continuously verify ML models and data sources")
+    parser.add_argument("--db-path", default="memebot.db", help="SQLite database to verify")
+    parser.add_argument("--output", default="ml_verification_status.json",
+                        help="File the latest results are atomically written to")
+    parser.add_argument("--socket", help="Unix socket serving the latest results")
+    parser.add_argument("--port", type=int, help="Localhost TCP port serving the latest results")
+    parser.add_argument("--db-interval", type=float, default=60,
+                        help="Seconds between database check runs")
+    parser.add_argument("--live-interval", type=float, default=300,
+                        help="Seconds between live exchange check runs")
+    parser.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=True,
+                        help="Only read trades added since the previous cycle")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+                        help="Reuse database check results for this many seconds while memebot.db is unchanged "
+                             "(0 disables the cache)")
+    parser.add_argument("--check-timeout", type=float, default=DEFAULT_CHECK_TIMEOUT,
+                        help="Seconds before a single database check is abandoned")
+    parser.add_argument("--skip-exchanges", action="store_true", help="Run only the database checks")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Run live checks against exchange responses recorded with ml_verification_suite.py --record")
+    parser.add_argument("--sweep", action="store_true", help="Live checks sweep all symbols")
+    parser.add_argument("--symbols", nargs="+", help="Symbols for the sweep")
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    """Run the verification daemon until interrupted"""
+    args = parse_args(argv)
+    daemon = VerificationDaemon(
+        db_path=args.db_path,
+        output_path=args.output,
+        db_interval=args.db_interval,
+        live_interval=args.live_interval,
+        incremental=args.incremental,
+        use_exchanges=not args.skip_exchanges,
+        sweep=args.sweep,
+        symbols=args.symbols,
+        socket_path=args.socket,
+        port=args.port,
+        replay=replay_exchanges(args.replay) if args.replay else None,
+        cache_ttl=args.cache_ttl,
+        check_timeout=args.check_timeout
+    )
+    print(f"🔁 ML verification daemon: DB checks every {args.db_interval:g}s, "
+          f"live checks every {args.live_interval:g}s → {args.output}")
+    return await daemon.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,638 @@
+# ml_verification_db.py - Shared database access for the ML verification scripts
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from queue import LifoQueue, Empty, Full
+from urllib.parse import quote
+
+from ml_verification_perf import InstrumentedConnection
+
+logger = logging.getLogger(__name__)
+
+# Pragmas applied to every pooled connection. The bot keeps writing memebot.db
+# while the verifiers run, so connections are read-only, autocommit (no long
+# lived read snapshot that would stall WAL checkpoints) and wait on locks
+# instead of failing immediately.
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024
+DEFAULT_CACHE_SIZE_KB = 64 * 1024
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+# Prepared statements kept per connection (sqlite3's own default is 128)
+DEFAULT_STATEMENT_CACHE_SIZE = 256
+# How many SQLite VM steps run between time budget checks
+PROGRESS_STEPS = 10000
+
+
+class SQLiteDialect:
+    """SQL fragments that differ between storage backends, in SQLite's spelling
+
+    Verifier queries are written with `?` placeholders and build the few
+    backend-specific expressions through the connection manager's dialect,
+    so the same check runs on SQLite and PostgreSQL.
+    """
+
+    name = "sqlite"
+    now = "'now'"
+
+    def relative_time(self):
+        """Now shifted by one bound SQLite-style modifier such as '-7 days'"""
+        return "datetime('now', ?)"
+
+    def julian_day(self, expression):
+        return f"julianday({expression})"
+
+    def floor_int(self, expression):
+        """Integer part of a non-negative expression"""
+        return f"CAST({expression} AS INTEGER)"
+
+    def in_values(self, column):
+        """`column IN (...)` over one parameter holding every value (see values_param)
+
+        The SQL text is the same however many values are passed, so a batch
+        of any size reuses one prepared statement instead of preparing a new
+        `IN (?, ?, ...)` for every length.
+        """
+        return f"{column} IN (SELECT value FROM json_each(?))"
+
+    def values_param(self, values):
+        """The parameter for an in_values() condition"""
+        return json.dumps(list(values))
+
+    def stream(self, conn, sql, params, chunk_size):
+        """Cursor to fetchmany() a large result from; SQLite already steps through rows lazily"""
+        return conn.execute(sql, params)
+
+    @contextmanager
+    def time_budget(self, conn, seconds):
+        """Interrupt statements on conn that run longer than seconds (see is_interrupted)"""
+        deadline = time.perf_counter() + seconds
+        conn.set_progress_handler(lambda: time.perf_counter() > deadline, PROGRESS_STEPS)
+        try:
+            yield
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    def is_interrupted(self, error):
+        # pandas re-raises sqlite3's "interrupted" OperationalError as its own DatabaseError
+        return "interrupted" in str(error)
+
+
+SQLITE = SQLiteDialect()
+
+
+class PooledConnectionManager:
+    """Connection pool and lease accounting shared by the storage backends
+
+    Subclasses open connections in _open() and register them with
+    _register(). _lease() and _unlease() wrap or prepare a connection
+    around each lease, and _recycle() decides whether a returned
+    connection can go back to the pool. Any per-connection figures from
+    _connection_extras() are summed into stats() under the same keys.
+    """
+
+    dialect = SQLITE
+    extra_stat_fields = ()
+
+    def __init__(self, db_path, pool_size=4):
+        self.db_path = db_path
+        self.pool_size = pool_size
+
+        self._idle = LifoQueue(maxsize=pool_size)
+        self._lock = threading.Lock()
+        self._connection_stats = {}
+        self._connections_opened = 0
+        self._closed = False
+
+    def _open(self):
+        raise NotImplementedError
+
+    def _closed_error(self):
+        return RuntimeError("Connection manager has been closed")
+
+    def _register(self, conn):
+        with self._lock:
+            self._connections_opened += 1
+            self._connection_stats[id(conn)] = {
+                "connection_number": self._connections_opened,
+                "opened_at": time.time(),
+                "leases": 0,
+                "held_seconds": 0.0,
+                "max_hold_seconds": 0.0
+            }
+        logger.debug(f"Opened read-only connection #{self._connections_opened} to {self.db_path}")
+        return conn
+
+    def _acquire(self):
+        if self._closed:
+            raise self._closed_error()
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            return self._open()
+
+    def _recycle(self, conn):
+        return True
+
+    def _release(self, conn):
+        if self._closed or not self._recycle(conn):
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except Full:
+            # More threads than pool slots: drop the surplus connection
+            conn.close()
+
+    def _lease(self, conn):
+        return conn
+
+    def _unlease(self, conn):
+        pass
+
+    @contextmanager
+    def connection(self):
+        """Lease a pooled connection; it is returned to the pool even on errors"""
+        conn = self._acquire()
+        leased = self._lease(conn)
+        leased_at = time.perf_counter()
+        try:
+            yield leased
+        finally:
+            held = time.perf_counter() - leased_at
+            self._unlease(conn)
+            with self._lock:
+                stats = self._connection_stats.get(id(conn))
+                if stats is not None:
+                    stats["leases"] += 1
+                    stats["held_seconds"] += held
+                    stats["max_hold_seconds"] = max(stats["max_hold_seconds"], held)
+            self._release(conn)
+
+    def planner(self):
+        """Query planner backed by the current schema catalog"""
+        return VerifierQueryPlanner(self.schema())
+
+    def _connection_extras(self, conn_id):
+        return {}
+
+    def stats(self):
+        """Report how many connections were opened and how long each was held"""
+        with self._lock:
+            per_connection = sorted(
+                (dict(conn_stats, **self._connection_extras(conn_id))
+                 for conn_id, conn_stats in self._connection_stats.items()),
+                key=lambda s: s["connection_number"]
+            )
+        stats = {
+            "db_path": self.db_path,
+            "connections_opened": self._connections_opened,
+            "total_leases": sum(s["leases"] for s in per_connection),
+            "total_held_seconds": sum(s["held_seconds"] for s in per_connection)
+        }
+        for field in self.extra_stat_fields:
+            stats[field] = sum(s[field] for s in per_connection)
+        stats["connections"] = per_connection
+        return stats
+
+    def _close_idle(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except Empty:
+                break
+
+    def reset(self):
+        """Drop idle connections so the next lease sees a freshly loaded schema"""
+        self._close_idle()
+
+    def close(self):
+        """Close every idle connection; leased ones are closed on release"""
+        self._closed = True
+        self._close_idle()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class SQLiteConnectionManager(PooledConnectionManager):
+    """Pooled, read-only SQLite connections shared by the verifier classes"""
+
+    dialect = SQLITE
+    # Estimated from repeats of the SQL text (see StatementCacheStats)
+    extra_stat_fields = ("estimated_statements_prepared", "estimated_statement_cache_hits")
+
+    def __init__(self, db_path="memebot.db", pool_size=4,
+                 mmap_size=DEFAULT_MMAP_SIZE,
+                 cache_size_kb=DEFAULT_CACHE_SIZE_KB,
+                 busy_timeout_ms=DEFAULT_BUSY_TIMEOUT_MS,
+                 statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE):
+        super().__init__(db_path, pool_size)
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        self._statement_caches = {}
+        self._trace_callback = None
+
+    def _uri(self):
+        path = quote(os.path.abspath(self.db_path))
+        return f"file:{path}?mode=ro"
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self._uri(),
+            uri=True,
+            timeout=self.busy_timeout_ms / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            factory=InstrumentedConnection
+        )
+        conn.execute("PRAGMA query_only = ON")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+
+        with self._lock:
+            self._statement_caches[id(conn)] = conn.statement_cache
+        return self._register(conn)
+
+    def _closed_error(self):
+        return sqlite3.ProgrammingError("Connection manager has been closed")
+
+    def _lease(self, conn):
+        if self._trace_callback is not None:
+            conn.set_trace_callback(self._trace_callback)
+        return conn
+
+    def _unlease(self, conn):
+        conn.set_trace_callback(None)
+
+    @contextmanager
+    def trace(self, callback):
+        """Pass every statement run on connections leased in this block to callback"""
+        previous = self._trace_callback
+        self._trace_callback = callback
+        try:
+            yield
+        finally:
+            self._trace_callback = previous
+
+    def schema(self):
+        """Schema catalog for this database, rebuilt only when the schema version changes"""
+        with self.connection() as conn:
+            return SchemaCatalog.for_connection(conn, self.db_path)
+
+    def _connection_extras(self, conn_id):
+        statement_cache = self._statement_caches[conn_id]
+        return {
+            "estimated_statements_prepared": statement_cache.misses,
+            "estimated_statement_cache_hits": statement_cache.hits
+        }
+
+
+def open_connection_manager(db_path="memebot.db", database_url=None, learning_data=None, **options):
+    """Connection manager for the storage mode in use
+
+    A PostgreSQL database_url, or the bot's json-file storage
+    (ml_learning_data.json) via its SQLite mirror, else the SQLite db_path.
+    """
+    if database_url:
+        from ml_verification_postgres import PostgresConnectionManager
+        return PostgresConnectionManager(database_url, **options)
+    if learning_data:
+        from ml_verification_jsonfile import LearningDataConnectionManager
+        return LearningDataConnectionManager(learning_data, **options)
+    return SQLiteConnectionManager(db_path, **options)
+
+
+def quote_identifier(name):
+    """Quote a table or column name for interpolation into SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SchemaCatalog:
+    """Tables and their columns, read once from sqlite_master and PRAGMA table_info"""
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, tables, schema_version):
+        self.tables = tables
+        self.schema_version = schema_version
+
+    @classmethod
+    def load(cls, conn):
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        names = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'"
+        )]
+        tables = {
+            name: [row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(name)})")]
+            for name in names
+        }
+        return cls(tables, schema_version)
+
+    @classmethod
+    def for_connection(cls, conn, db_path):
+        """Cached catalog keyed on the database file and its schema version"""
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        key = (os.path.realpath(db_path), schema_version)
+        with cls._cache_lock:
+            catalog = cls._cache.get(key)
+        if catalog is None:
+            catalog = cls.load(conn)
+            with cls._cache_lock:
+                # Drop catalogs for older schema versions of the same file
+                for stale in [k for k in cls._cache if k[0] == key[0]]:
+                    del cls._cache[stale]
+                cls._cache[key] = catalog
+        return catalog
+
+    def has_table(self, table):
+        return table in self.tables
+
+    def columns(self, table):
+        return self.tables.get(table, [])
+
+    def has_columns(self, table, *columns):
+        return self.has_table(table) and set(columns) <= set(self.tables[table])
+
+
+class VerifierQueryPlanner:
+    """Pick the tables and columns the verifier queries run against, up front"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def has_table(self, table):
+        return self.catalog.has_table(table)
+
+    def has_columns(self, table, *columns):
+        return self.catalog.has_columns(table, *columns)
+
+    def existing_columns(self, table, wanted):
+        """The wanted columns the table actually has, in the order asked for"""
+        present = set(self.catalog.columns(table))
+        return [column for column in wanted if column in present]
+
+    def price_source(self):
+        """Where recent exchange prices live: price_data, else paper_trades"""
+        if self.has_columns("price_data", "timestamp"):
+            return {
+                "table": "price_data",
+                "columns": self.existing_columns(
+                    "price_data", ["exchange", "symbol", "timestamp", "mid_price", "spread_pct", "volume_24h"]
+                ),
+                "mid_price": "mid_price" if self.has_columns("price_data", "mid_price") else None
+            }
+        if self.has_columns("paper_trades", "timestamp"):
+            return {
+                "table": "paper_trades",
+                "columns": list(self.catalog.columns("paper_trades")),
+                "mid_price": "(buy_price + sell_price) / 2.0"
+                if self.has_columns("paper_trades", "buy_price", "sell_price") else None
+            }
+        return None
+
+    def prediction_sources(self):
+        """Tables holding ML scores, in order of preference, with the columns to read"""
+        candidates = [
+            ("arbitrage_opportunities",
+             ["timestamp", "symbol", "quality_score", "confidence", "ml_prediction"], "quality_score"),
+            ("paper_trades", ["timestamp", "symbol", "profit", "confidence_score"], "confidence_score"),
+            ("ml_predictions", None, None),
+        ]
+        sources = []
+        for table, wanted, not_null in candidates:
+            if not self.has_columns(table, "timestamp"):
+                continue
+            if not_null is not None and not self.has_columns(table, not_null):
+                continue
+            columns = self.existing_columns(table, wanted) if wanted else list(self.catalog.columns(table))
+            sources.append({"table": table, "columns": columns, "not_null": not_null})
+        return sources
+
+    def feature_source(self):
+        """Where engineered features live: ml_features, else feature columns on arbitrage_opportunities"""
+        if self.has_columns("ml_features", "timestamp"):
+            return {"table": "ml_features", "condition": None}
+        if self.has_columns("arbitrage_opportunities", "timestamp"):
+            feature_columns = self.existing_columns("arbitrage_opportunities", ["spread_pct", "volume_24h"])
+            if feature_columns:
+                return {
+                    "table": "arbitrage_opportunities",
+                    "condition": " OR ".join(f"{column} IS NOT NULL" for column in feature_columns)
+                }
+        return None
+
+
+# Covering indexes for the time-windowed verifier queries. Each entry is only
+# proposed when its table is scanned and every column exists.
+SUGGESTED_INDEXES = {
+    "paper_trades": [
+        ("idx_paper_trades_timestamp_confidence_profit", ("timestamp", "confidence_score", "profit")),
+        ("idx_paper_trades_symbol_timestamp", ("symbol", "timestamp")),
+    ],
+    "price_data": [
+        ("idx_price_data_timestamp_exchange_symbol", ("timestamp", "exchange", "symbol", "mid_price")),
+        ("idx_price_data_symbol_timestamp", ("symbol", "timestamp")),
+        # Lets the per-pair freshness GROUP BY walk one covering index in group order
+        ("idx_price_data_exchange_symbol_timestamp", ("exchange", "symbol", "timestamp", "mid_price")),
+    ],
+    "arbitrage_opportunities": [
+        ("idx_arbitrage_opportunities_timestamp", ("timestamp", "quality_score")),
+    ],
+    "ml_predictions": [
+        ("idx_ml_predictions_timestamp", ("timestamp",)),
+    ],
+    "ml_features": [
+        ("idx_ml_features_timestamp", ("timestamp",)),
+    ],
+    "ml_model_history": [
+        ("idx_ml_model_history_last_updated", ("last_updated", "name", "confidence_threshold")),
+    ],
+}
+
+
+class QueryPlanAdvisor:
+    """EXPLAIN QUERY PLAN every statement a set of checks issues and propose indexes"""
+
+    def __init__(self, connection_manager):
+        self.db = connection_manager
+
+    def capture(self, checks, warmup=True):
+        """Run each check once, recording its wall time and the SELECTs it executed
+
+        With warmup, every check first runs once untimed so lazy imports,
+        connection setup and a cold page cache are not charged to the
+        "before" timings that the indexed re-run is compared with.
+        """
+        if warmup:
+            for check in checks.values():
+                check()
+        captured = {}
+        for name, check in checks.items():
+            statements = []
+
+            def record(sql, statements=statements):
+                if sql.lstrip().upper().startswith(("SELECT", "WITH")) and sql not in statements:
+                    statements.append(sql)
+
+            started = time.perf_counter()
+            with self.db.trace(record):
+                check()
+            captured[name] = {"seconds": time.perf_counter() - started, "statements": statements}
+        return captured
+
+    def explain(self, sql):
+        """Return the plan for one statement and whether it scans a whole table"""
+        with self.db.connection() as conn:
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+        # Subqueries, CTEs and catalog probes such as sqlite_master also show up
+        # as SCAN lines; only the database's own tables can take an index
+        tables = self.db.schema().tables
+        full_scans = [
+            detail.split()[1] for detail in plan
+            if detail.startswith("SCAN ") and "USING" not in detail and detail.split()[1] in tables
+        ]
+        return {
+            "plan": plan,
+            "full_scans": full_scans,
+            "temp_sort": any("TEMP B-TREE" in detail for detail in plan)
+        }
+
+    def _existing_indexes(self, conn, table):
+        indexed = set()
+        for index in conn.execute(f"PRAGMA index_list({quote_identifier(table)})").fetchall():
+            columns = tuple(row[2] for row in conn.execute(f"PRAGMA index_info({quote_identifier(index[1])})"))
+            indexed.add(columns)
+        return indexed
+
+    def suggest_indexes(self, scanned_tables):
+        """Propose covering indexes for the scanned tables that do not have them yet"""
+        suggestions = []
+        with self.db.connection() as conn:
+            for table in sorted(set(scanned_tables)):
+                columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table)})")}
+                existing = self._existing_indexes(conn, table)
+                for index_name, index_columns in SUGGESTED_INDEXES.get(table, []):
+                    if not set(index_columns) <= columns:
+                        continue
+                    if any(cols[:len(index_columns)] == index_columns for cols in existing):
+                        continue
+                    suggestions.append({
+                        "table": table,
+                        "name": index_name,
+                        "columns": list(index_columns),
+                        "sql": (f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} ON {quote_identifier(table)} "
+                                f"({', '.join(map(quote_identifier, index_columns))})")
+                    })
+        return suggestions
+
+    def create_indexes(self, suggestions):
+        """Create the suggested indexes over a separate read-write connection"""
+        created = []
+        conn = sqlite3.connect(self.db.db_path, timeout=self.db.busy_timeout_ms / 1000)
+        try:
+            for suggestion in suggestions:
+                started = time.perf_counter()
+                conn.execute(suggestion["sql"])
+                conn.commit()
+                created.append({"name": suggestion["name"], "seconds": time.perf_counter() - started})
+                logger.info(f"Created index {suggestion['name']} on {suggestion['table']}")
+        finally:
+            conn.close()
+        # Pooled connections keep prepared plans that predate the new indexes
+        self.db.reset()
+        return created
+
+    def report(self, checks, create_indexes=False):
+        """Explain every captured statement and optionally index and re-time the checks"""
+        captured = self.capture(checks)
+        scanned_tables = []
+        for check in captured.values():
+            check["plans"] = []
+            for sql in check["statements"]:
+                try:
+                    explained = self.explain(sql)
+                except sqlite3.Error as e:
+                    explained = {"plan": [], "full_scans": [], "temp_sort": False, "error": str(e)}
+                explained["sql"] = sql
+                check["plans"].append(explained)
+                scanned_tables.extend(explained["full_scans"])
+
+        report = {
+            "checks": captured,
+            "scanned_tables": sorted(set(scanned_tables)),
+            "suggested_indexes": self.suggest_indexes(scanned_tables)
+        }
+
+        if create_indexes and report["suggested_indexes"]:
+            report["created_indexes"] = self.create_indexes(report["suggested_indexes"])
+            for name, check in checks.items():
+                for explained in captured[name]["plans"]:
+                    if not explained.get("error"):
+                        explained["plan_after"] = self.explain(explained["sql"])["plan"]
+                started = time.perf_counter()
+                check()
+                captured[name]["seconds_after"] = time.perf_counter() - started
+        return report
+
+
+def print_connection_stats(db_stats):
+    """Summarize SQLiteConnectionManager.stats() for the end of a report"""
+    print(f"\n🔌 DB Connections: {db_stats['connections_opened']} opened, "
+          f"{db_stats['total_leases']} checks served, "
+          f"{db_stats['total_held_seconds']:.3f}s held")
+    for conn_stats in db_stats['connections']:
+        print(f"   • Connection #{conn_stats['connection_number']}: "
+              f"{conn_stats['leases']} leases, {conn_stats['held_seconds']:.3f}s held "
+              f"(max {conn_stats['max_hold_seconds']:.3f}s)")
+    executed = db_stats.get('estimated_statements_prepared', 0) + db_stats.get('estimated_statement_cache_hits', 0)
+    if executed:
+        # Estimated from repeats of the SQL text; sqlite3 does not expose its cache counters
+        print(f"   • Statements: {executed} run, "
+              f"~{db_stats['estimated_statement_cache_hits'] / executed:.0%} repeated SQL text already in the "
+              f"statement cache (estimated reuse, ~{db_stats['estimated_statements_prepared']} prepared)")
+
+
+def print_query_plan_report(report):
+    """Print a QueryPlanAdvisor report in the verification scripts' style"""
+    print("\n🔬 QUERY PLAN REPORT")
+    print("=" * 60)
+    for name, check in report["checks"].items():
+        timing = f"{check['seconds'] * 1000:.1f}ms"
+        if "seconds_after" in check:
+            timing += f" → {check['seconds_after'] * 1000:.1f}ms after indexing"
+        print(f"\n• {name} ({timing})")
+        for explained in check["plans"]:
+            first_line = " ".join(explained["sql"].split())[:100]
+            icon = "⚠️" if explained["full_scans"] else "✅"
+            print(f"   {icon} {first_line}")
+            for detail in explained["plan"]:
+                print(f"       {detail}")
+            if explained.get("plan_after") and explained["plan_after"] != explained["plan"]:
+                for detail in explained["plan_after"]:
+                    print(f"     → {detail}")
+            if explained.get("error"):
+                print(f"       ❌ {explained['error']}")
+
+    if report["scanned_tables"]:
+        print(f"\n⚠️ Full table scans on: {', '.join(report['scanned_tables'])}")
+    else:
+        print("\n✅ No full table scans detected")
+
+    if report["suggested_indexes"]:
+        print("\n💡 Suggested indexes:")
+        for suggestion in report["suggested_indexes"]:
+            print(f"   {suggestion['sql']};")
+    for created in report.get("created_indexes", []):
+        print(f"✅ Created {created['name']} in {created['seconds']:.2f}s")
@@ -0,0 +1,141 @@
+# ml_verification_depth.py - Order-book depth, fill prices and executable cross-exchange spreads
+import logging
+
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Levels requested per side; every exchange the verifier connects to serves 50
+DEFAULT_BOOK_DEPTH = 50
+# Order sizes in quote currency (USDT) the books are walked for
+DEFAULT_NOTIONAL_LADDER = (100, 500, 1000, 5000, 10000, 50000)
+
+
+def book_side(levels, depth):
+    """(prices, amounts) of one side of a ccxt order book, padded with empty levels to depth"""
+    prices = np.zeros(depth)
+    amounts = np.zeros(depth)
+    # ccxt levels are [price, amount] or [price, amount, order count]
+    rows = [level[:2] for level in (levels or [])[:depth]
+            if len(level) >= 2 and level[0] and level[1] and level[0] > 0 and level[1] > 0]
+    if rows:
+        rows = np.asarray(rows, dtype=float)
+        prices[:len(rows)], amounts[:len(rows)] = rows[:, 0], rows[:, 1]
+    return prices, amounts
+
+
+def fill_ladder(prices, amounts, notionals):
+    """Walk every book side in prices/amounts (shape books x levels) for every notional
+
+    Cumulative quote and base volume down each book give, for each order
+    size, the level it completes on and the base amount bought or sold:
+    everything above that level plus the remainder at its price. Returns
+    arrays of shape (books, notionals); orders deeper than a book is stay
+    NaN and are not fillable.
+    """
+    notionals = np.asarray(notionals, dtype=float)
+    cum_quote = np.cumsum(prices * amounts, axis=1)
+    cum_base = np.cumsum(amounts, axis=1)
+    # Levels fully consumed before each order completes
+    consumed = (cum_quote[:, None, :] < notionals[None, :, None]).sum(axis=2)
+    fillable = notionals[None, :] <= cum_quote[:, -1:]
+    last = np.minimum(consumed, prices.shape[1] - 1)
+    rows = np.arange(len(prices))[:, None]
+    quote_before = np.where(consumed > 0, cum_quote[rows, np.maximum(consumed - 1, 0)], 0.0)
+    base_before = np.where(consumed > 0, cum_base[rows, np.maximum(consumed - 1, 0)], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base = base_before + (notionals[None, :] - quote_before) / prices[rows, last]
+        vwap = np.where(fillable, notionals[None, :] / base, np.nan)
+    return {
+        "vwap": vwap,
+        "levels": np.where(fillable, consumed + 1, 0),
+        "fillable": fillable,
+        "depth_quote": cum_quote[:, -1]
+    }
+
+
+def _finite(value):
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def analyze_depth(books, notionals=DEFAULT_NOTIONAL_LADDER, depth=DEFAULT_BOOK_DEPTH):
+    """Fill prices, slippage and executable spreads for {(exchange, symbol): order book}
+
+    Buys walk the asks and sells walk the bids; slippage is how much worse
+    the fill price is than the best level, in percent. Every book side is
+    stacked into one array so the whole ladder is a few cumulative sums.
+    For each symbol and order size, the executable spread is the best
+    route that buys on one exchange's asks and sells on another's bids.
+    """
+    keys = list(books)
+    notionals = np.asarray(notionals, dtype=float)
+    sides = [book_side(books[key].get(side), depth) for side in ("asks", "bids") for key in keys]
+    prices = np.array([p for p, _ in sides]).reshape(2 * len(keys), depth)
+    amounts = np.array([a for _, a in sides]).reshape(2 * len(keys), depth)
+    fills = fill_ladder(prices, amounts, notionals)
+    best = prices[:, 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slippage = (fills["vwap"] - best[:, None]) / best[:, None] * 100
+    # Selling below the best bid is the cost on that side; rounding can leave a hair below zero
+    slippage[len(keys):] *= -1
+    slippage = np.maximum(slippage, 0.0)
+    buy, sell = slice(0, len(keys)), slice(len(keys), None)
+
+    results = {}
+    for i, (exchange_name, symbol) in enumerate(keys):
+        per_size = []
+        for j, notional in enumerate(notionals):
+            per_size.append({
+                "notional": float(notional),
+                "buy_vwap": _finite(fills["vwap"][buy][i, j]),
+                "buy_slippage_pct": _finite(slippage[buy][i, j]),
+                "buy_levels": int(fills["levels"][buy][i, j]),
+                "sell_vwap": _finite(fills["vwap"][sell][i, j]),
+                "sell_slippage_pct": _finite(slippage[sell][i, j]),
+                "sell_levels": int(fills["levels"][sell][i, j])
+            })
+        results.setdefault(symbol, {})[exchange_name] = {
+            "best_ask": _finite(best[buy][i]) if best[buy][i] > 0 else None,
+            "best_bid": _finite(best[sell][i]) if best[sell][i] > 0 else None,
+            "ask_depth_quote": float(fills["depth_quote"][buy][i]),
+            "bid_depth_quote": float(fills["depth_quote"][sell][i]),
+            "ladder": per_size
+        }
+
+    spreads = {}
+    for symbol in results:
+        rows = [i for i, key in enumerate(keys) if key[1] == symbol]
+        if len(rows) < 2:
+            continue
+        names = [keys[i][0] for i in rows]
+        ask_vwap, bid_vwap = fills["vwap"][buy][rows], fills["vwap"][sell][rows]
+        with np.errstate(invalid="ignore"):
+            # route[a, b, size]: buy on exchange a, sell on exchange b
+            route = (bid_vwap[None, :, :] - ask_vwap[:, None, :]) / ask_vwap[:, None, :] * 100
+        route[np.arange(len(rows)), np.arange(len(rows))] = np.nan
+        # Empty sides have a best price of 0 and take no part in the top-of-book spread
+        best_ask = np.where(best[buy][rows] > 0, best[buy][rows], np.nan)
+        best_bid = np.where(best[sell][rows] > 0, best[sell][rows], np.nan)
+        tob = (best_bid[None, :] - best_ask[:, None]) / best_ask[:, None] * 100
+        tob[np.arange(len(rows)), np.arange(len(rows))] = np.nan
+
+        ladder = []
+        for j, notional in enumerate(notionals):
+            grid = route[:, :, j]
+            if np.isnan(grid).all():
+                ladder.append({"notional": float(notional), "spread_pct": None})
+                continue
+            a, b = np.unravel_index(np.nanargmax(grid), grid.shape)
+            ladder.append({"notional": float(notional), "buy_exchange": names[a], "sell_exchange": names[b],
+                           "spread_pct": float(grid[a, b])})
+        profitable = [step["notional"] for step in ladder if (step["spread_pct"] or 0) > 0]
+        summary = {"ladder": ladder, "max_profitable_notional": max(profitable) if profitable else None}
+        if not np.isnan(tob).all():
+            a, b = np.unravel_index(np.nanargmax(tob), tob.shape)
+            summary["top_of_book"] = {"buy_exchange": names[a], "sell_exchange": names[b],
+                                      "spread_pct": float(tob[a, b])}
+        spreads[symbol] = summary
+    return {"results": results, "spreads": spreads}
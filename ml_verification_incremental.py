@@ -0,0 +1,203 @@
+# ml_verification_incremental.py - Incremental confidence-bucket checks with persisted watermarks
+import copy
+import json
+import os
+import tempfile
+import threading
+import logging
+
+from ml_verification_startup import LazyModule
+from ml_verification_stats import (
+    bucket_trades,
+    merge_bucket_aggregates,
+    ranges_to_edges,
+    summarize_bucket_aggregates,
+)
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+# Trades are folded into hourly partitions so a sliding window can expire
+# old data without rescanning it; a 7-day window keeps at most 168 partitions.
+PARTITION_FORMAT = "%Y-%m-%d %H"
+LOW_CONFIDENCE_CUTOFF = 0.3
+# New trades are fetched this many rows at a time
+DEFAULT_CHUNK_ROWS = 10000
+
+
+class IncrementalStateStore:
+    """Small JSON side store holding per-check aggregates and watermarks
+
+    One store is shared by both verifiers across the scheduler's worker
+    threads, so every read and write of the cached state holds a lock and
+    callers only ever see copies of it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._state = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, db_path):
+        return cls(f"{db_path}.verify-state.json")
+
+    def _load_all(self):
+        if self._state is None:
+            try:
+                with open(self.path, 'r') as f:
+                    self._state = json.load(f)
+            except FileNotFoundError:
+                self._state = {}
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable verification state {self.path}: {e}")
+                self._state = {}
+        return self._state
+
+    def load(self, check_name):
+        with self._lock:
+            return copy.deepcopy(self._load_all().get(check_name))
+
+    def save(self, check_name, check_state):
+        """Persist one check's state; the file is replaced atomically"""
+        with self._lock:
+            state = self._load_all()
+            state[check_name] = copy.deepcopy(check_state)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".verify-state-", dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+
+class IncrementalConfidenceTracker:
+    """Maintain windowed confidence-bucket aggregates over paper_trades incrementally
+
+    Only rows with a rowid above the watermark and inside the window are
+    read, a chunk at a time. The hour the window starts in is re-read on
+    every refresh, so the totals match an exact windowed query. A trade whose
+    profit is filled in or corrected after it was first seen is therefore
+    counted with its old value until the state is rebuilt (delete the
+    .verify-state.json file, or run without --incremental).
+    """
+
+    def __init__(self, store, check_name, confidence_ranges, window_days=7, chunk_size=DEFAULT_CHUNK_ROWS):
+        self.store = store
+        self.check_name = check_name
+        self.edges, self.labels = ranges_to_edges(confidence_ranges)
+        self.window_days = window_days
+        self.chunk_size = chunk_size
+
+    def _fresh_state(self):
+        return {
+            "edges": self.edges,
+            "labels": self.labels,
+            "watermark_rowid": 0,
+            "watermark_timestamp": None,
+            "partitions": {}
+        }
+
+    def refresh(self, conn):
+        """Read only trades newer than the watermark, merge them and return windowed totals"""
+        state = self.store.load(self.check_name)
+        if not state or state.get("edges") != self.edges or state.get("labels") != self.labels:
+            state = self._fresh_state()
+
+        max_rowid = conn.execute("SELECT MAX(rowid) FROM paper_trades").fetchone()[0] or 0
+        if max_rowid < state["watermark_rowid"]:
+            # Table was truncated or rebuilt; the stored aggregates no longer apply
+            logger.info(f"paper_trades rowids went backwards, rebuilding {self.check_name} state")
+            state = self._fresh_state()
+
+        since = f"-{self.window_days} days"
+        cursor = conn.execute(
+            """
+            SELECT confidence_score, profit, timestamp,
+                   strftime(?, timestamp) AS partition_key
+            FROM paper_trades
+            WHERE rowid > ? AND rowid <= ?
+            AND timestamp > datetime('now', ?)
+            AND confidence_score IS NOT NULL
+            """,
+            (PARTITION_FORMAT, state["watermark_rowid"], max_rowid, since)
+        )
+        new_rows = 0
+        while True:
+            rows = cursor.fetchmany(self.chunk_size)
+            if not rows:
+                break
+            new_rows += len(rows)
+            for partition_key, partition_rows in _group_by_partition(rows).items():
+                partition = state["partitions"].setdefault(
+                    partition_key, {"total": 0, "low_confidence": 0, "buckets": {}}
+                )
+                _fold(partition, partition_rows, self.edges, self.labels)
+            latest = max((r[2] for r in rows if r[2] is not None), default=None)
+            if latest is not None and (state["watermark_timestamp"] is None or latest > state["watermark_timestamp"]):
+                state["watermark_timestamp"] = latest
+        state["watermark_rowid"] = max_rowid
+
+        # Expire partitions that have slid out of the window. The hour the
+        # window starts in is only partly inside it, so it is re-read exactly.
+        cutoff, next_hour = conn.execute(
+            "SELECT strftime(?, 'now', ?), strftime('%Y-%m-%d %H:00:00', 'now', ?, '+1 hour')",
+            (PARTITION_FORMAT, since, since)
+        ).fetchone()
+        state["partitions"] = {
+            key: partition for key, partition in state["partitions"].items() if key > cutoff
+        }
+
+        self.store.save(self.check_name, state)
+
+        totals = {"total": 0, "low_confidence": 0, "buckets": {}}
+        boundary = conn.execute(
+            """
+            SELECT confidence_score, profit FROM paper_trades
+            WHERE timestamp > datetime('now', ?) AND timestamp < ?
+            AND confidence_score IS NOT NULL
+            """,
+            (since, next_hour)
+        ).fetchall()
+        _fold(totals, boundary, self.edges, self.labels)
+        for partition in state["partitions"].values():
+            totals["total"] += partition["total"]
+            totals["low_confidence"] += partition["low_confidence"]
+            merge_bucket_aggregates(totals["buckets"], partition["buckets"])
+
+        return {
+            "total_trades": totals["total"],
+            "low_confidence_trades": totals["low_confidence"],
+            "bucket_summary": summarize_bucket_aggregates(totals["buckets"], self.labels),
+            "incremental": {
+                "new_rows": new_rows,
+                "watermark_rowid": state["watermark_rowid"],
+                "watermark_timestamp": state["watermark_timestamp"],
+                "partitions": len(state["partitions"]),
+                "window_days": self.window_days
+            }
+        }
+
+
+def _fold(aggregate, rows, edges, labels):
+    """Add (confidence, profit, ...) rows into a partition-shaped aggregate"""
+    if not rows:
+        return
+    confidence = np.array([r[0] for r in rows], dtype=float)
+    profit = np.array([r[1] if r[1] is not None else 0.0 for r in rows], dtype=float)
+    aggregate["total"] += len(rows)
+    aggregate["low_confidence"] += int((confidence < LOW_CONFIDENCE_CUTOFF).sum())
+    merge_bucket_aggregates(aggregate["buckets"], bucket_trades(confidence, profit, edges, labels))
+
+
+def _group_by_partition(rows):
+    grouped = {}
+    for row in rows:
+        # Rows whose timestamp SQLite cannot parse never match a time window
+        if row[3] is not None:
+            grouped.setdefault(row[3], []).append(row)
+    return grouped
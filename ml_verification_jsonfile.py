@@ -0,0 +1,376 @@
+# ml_verification_jsonfile.py - Streaming reader and SQLite mirror for the json-file storage mode
+import codecs
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+
+from ml_verification_db import SQLiteConnectionManager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEARNING_DATA_PATH = "ml_learning_data.json"
+READ_CHUNK_BYTES = 64 * 1024
+# Trades written to the mirror per executemany()
+INSERT_BATCH_ROWS = 5000
+# mlLearningService.js rewrites the file in place; a read that lands mid-write is retried once after this
+SYNC_RETRY_SECONDS = 1.0
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+
+# The trades array as the verifier queries expect it. A trade is identified
+# by its time and id, so rescanning a rewritten file never adds it twice;
+# trades without an id get one derived from their content (see trade_id()).
+MIRROR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paper_trades (
+    trade_id TEXT, symbol TEXT, timestamp TEXT, timestamp_ms INTEGER,
+    confidence_score REAL, profit REAL, expected_profit REAL, profit_pct REAL,
+    ml_model TEXT, feature_count INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_paper_trades_identity ON paper_trades (timestamp_ms, trade_id);
+CREATE INDEX IF NOT EXISTS idx_paper_trades_timestamp_confidence_profit
+    ON paper_trades (timestamp, confidence_score, profit);
+CREATE VIEW IF NOT EXISTS ml_features AS
+    SELECT timestamp, symbol, feature_count FROM paper_trades WHERE feature_count > 0;
+CREATE TABLE IF NOT EXISTS learning_data_index (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+class JsonStream:
+    """Forward-only reader over a UTF-8 JSON file that decodes one value at a time
+
+    Only the current chunk and the value being decoded are held in memory.
+    Byte offsets of every position are tracked so a later reader can seek
+    straight back to them.
+    """
+
+    def __init__(self, f, offset=0):
+        self._file = f
+        self._file.seek(offset)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+        self._counted_pos = 0
+        self._counted_offset = offset
+
+    def offset(self):
+        """Byte offset in the file of the current position"""
+        if self.pos != self._counted_pos:
+            self._counted_offset += len(self.buffer[self._counted_pos:self.pos].encode("utf-8"))
+            self._counted_pos = self.pos
+        return self._counted_offset
+
+    def _fill(self):
+        chunk = self._file.read(READ_CHUNK_BYTES)
+        self.bytes_read += len(chunk)
+        self.offset()
+        self.buffer = self.buffer[self.pos:] + self._utf8.decode(chunk, final=not chunk)
+        self.pos = self._counted_pos = 0
+        self.eof = not chunk
+        return bool(chunk)
+
+    def peek(self):
+        """Next non-whitespace character, or "" at the end of the file"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, allowed):
+        char = self.peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r} at byte {self.offset()}, found {char or 'end of file'!r}")
+        self.pos += 1
+        return char
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self.buffer, self.pos)
+                # A number running into the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def elements(self, after_element=False):
+        """Yield (start, end, value) for each element of the array at this position
+
+        With after_element, the stream is positioned just past an element of
+        an array that is already open, as when resuming from a saved offset.
+        """
+        if not after_element:
+            self.expect("[")
+            if self.peek() == "]":
+                self.pos += 1
+                return
+        elif self.expect(",]") == "]":
+            return
+        while True:
+            self.peek()
+            start = self.offset()
+            value = self.value()
+            yield start, self.offset(), value
+            if self.expect(",]") == "]":
+                return
+
+    def find_key(self, key):
+        """Move into the value of a top-level object key; False if the key is absent"""
+        self.expect("{")
+        if self.peek() == "}":
+            return False
+        while True:
+            name = self.value()
+            self.expect(":")
+            if name == key:
+                return True
+            # Skip other arrays element by element so they are never held whole
+            if self.peek() == "[":
+                for _ in self.elements():
+                    pass
+            else:
+                self.value()
+            if self.expect(",}") == "}":
+                return False
+
+
+def iter_json_array(path, key, resume_offset=None):
+    """Yield (start, end, element) for the top-level array `key` of a JSON file
+
+    resume_offset is the end offset of an element yielded by an earlier call;
+    reading then starts right after it instead of at the top of the file.
+    """
+    with open(path, 'rb') as f:
+        stream = JsonStream(f, resume_offset or 0)
+        if resume_offset is None:
+            if not stream.find_key(key):
+                return
+            if stream.peek() != "[":
+                raise ValueError(f'"{key}" in {path} is not an array')
+            yield from stream.elements()
+        else:
+            yield from stream.elements(after_element=True)
+
+
+def _digest(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+class LearningDataError(Exception):
+    """ml_learning_data.json could not be parsed, even after a retry"""
+
+
+def trade_id(trade):
+    """The trade's tradeId, or a digest of the record when it has none
+
+    SQLite treats NULLs as distinct in a unique index, so id-less trades
+    would be inserted again on every rescan without a stable stand-in.
+    """
+    if trade.get("tradeId") is not None:
+        return str(trade["tradeId"])
+    record = json.dumps(trade, sort_keys=True, separators=(",", ":"), default=str)
+    return "sha256:" + hashlib.sha256(record.encode()).hexdigest()[:32]
+
+
+def trade_row(trade):
+    """paper_trades row for one learning record written by mlLearningService.js"""
+    timestamp_ms = trade.get("timestamp")
+    prediction = trade.get("prediction") or {}
+    outcome = trade.get("outcome") or {}
+    models = prediction.get("models")
+    features = prediction.get("features")
+    return (
+        trade_id(trade),
+        trade.get("symbol"),
+        datetime.fromtimestamp(timestamp_ms / 1000, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        if timestamp_ms else None,
+        timestamp_ms,
+        prediction.get("confidence"),
+        trade.get("actualProfit"),
+        trade.get("expectedProfit"),
+        outcome.get("profitPercentage"),
+        ",".join(map(str, models)) if isinstance(models, list) else models,
+        len(features) if isinstance(features, (list, dict)) else 0
+    )
+
+
+class LearningDataMirror:
+    """SQLite copy of the trades array in ml_learning_data.json, kept up to date incrementally
+
+    The byte range and digest of the last mirrored trade are stored with
+    the rows. While the bot only appends, the next sync checks those bytes
+    are unchanged and parses from there. mlLearningService.js also trims
+    the array to its newest 10000 trades, which moves everything. The
+    digest then no longer matches, and the whole array is streamed again.
+    Already mirrored trades are ignored and trimmed ones are deleted.
+    """
+
+    def __init__(self, json_path=DEFAULT_LEARNING_DATA_PATH, mirror_path=None):
+        self.json_path = json_path
+        self.mirror_path = mirror_path or f"{json_path}.verify.db"
+
+    def _load_index(self, conn):
+        return {key: json.loads(value) for key, value in conn.execute("SELECT key, value FROM learning_data_index")}
+
+    def _resume_offset(self, index):
+        """End offset of the last mirrored trade if the file still holds it there, else None"""
+        last = index.get("last_trade")
+        if not last:
+            return None
+        try:
+            if os.path.getsize(self.json_path) < last["end"]:
+                return None
+            if _digest(self.json_path, last["start"], last["end"]) != last["digest"]:
+                return None
+        except OSError:
+            return None
+        return last["end"]
+
+    def sync(self):
+        """Bring the mirror up to date with the JSON file; returns what was read
+
+        The bot does not write the file atomically, so a parse error is
+        retried once before it is raised as LearningDataError. A failed
+        attempt rolls back and leaves the mirror as it was.
+        """
+        try:
+            return self._sync()
+        except ValueError as e:
+            logger.warning(f"Could not parse {self.json_path} ({e}); retrying in {SYNC_RETRY_SECONDS:g}s")
+        time.sleep(SYNC_RETRY_SECONDS)
+        try:
+            return self._sync()
+        except ValueError as e:
+            raise LearningDataError(
+                f"Could not parse {self.json_path}: {e} (the bot may be rewriting it; run again)"
+            ) from e
+
+    def _sync(self):
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.mirror_path, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(MIRROR_SCHEMA)
+            index = self._load_index(conn)
+            resume_offset = self._resume_offset(index)
+            # Mirrors from before trade_id() kept id-less trades as NULL, which a rescan would duplicate
+            if conn.execute("DELETE FROM paper_trades WHERE trade_id IS NULL").rowcount:
+                resume_offset = None
+            # A mirror that never held a trade (the bot's file starts with an empty array) has nothing to rescan
+            mode = "append" if resume_offset is not None else ("rescan" if index.get("last_trade") else "initial")
+
+            conn.execute("BEGIN IMMEDIATE")
+            before = conn.total_changes
+            insert = "INSERT OR IGNORE INTO paper_trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            batch, last, first_ms, seen = [], None, None, 0
+            for start, end, trade in iter_json_array(self.json_path, "trades", resume_offset):
+                if not isinstance(trade, dict):
+                    continue
+                row = trade_row(trade)
+                if first_ms is None:
+                    first_ms = row[3]
+                batch.append(row)
+                seen += 1
+                last = (start, end)
+                if len(batch) >= INSERT_BATCH_ROWS:
+                    conn.executemany(insert, batch)
+                    batch = []
+            if batch:
+                conn.executemany(insert, batch)
+            inserted = conn.total_changes - before
+
+            removed = 0
+            if mode == "rescan" and first_ms is not None:
+                # Trades the writer trimmed off the front of the array
+                removed = conn.execute("DELETE FROM paper_trades WHERE timestamp_ms < ?", (first_ms,)).rowcount
+            elif mode == "rescan" and not seen:
+                # The array was emptied
+                removed = conn.execute("DELETE FROM paper_trades").rowcount
+            if last is not None:
+                index["last_trade"] = {"start": last[0], "end": last[1],
+                                       "digest": _digest(self.json_path, last[0], last[1])}
+            elif mode != "append":
+                index.pop("last_trade", None)
+            index["synced_at"] = time.time()
+            # Replaced whole, so a dropped last_trade does not linger
+            conn.execute("DELETE FROM learning_data_index")
+            conn.executemany(
+                "INSERT OR REPLACE INTO learning_data_index VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in index.items()]
+            )
+            conn.execute("COMMIT")
+            total = conn.execute("SELECT COUNT(*) FROM paper_trades").fetchone()[0]
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        return {
+            "json_path": self.json_path,
+            "mirror_path": self.mirror_path,
+            "mode": mode,
+            "resume_offset": resume_offset,
+            "trades_read": seen,
+            "trades_added": inserted,
+            "trades_removed": removed,
+            "trades_total": total,
+            "seconds": time.perf_counter() - started
+        }
+
+
+class LearningDataConnectionManager(SQLiteConnectionManager):
+    """Pooled read-only connections to the mirror of ml_learning_data.json
+
+    The mirror is synced on first use, or by calling sync() first, and the
+    verifier checks then run against it unchanged.
+    """
+
+    def __init__(self, json_path=DEFAULT_LEARNING_DATA_PATH, mirror_path=None, pool_size=4):
+        self.mirror = LearningDataMirror(json_path, mirror_path)
+        super().__init__(self.mirror.mirror_path, pool_size=pool_size)
+        self._sync_lock = threading.Lock()
+        self.sync_stats = None
+
+    def sync(self):
+        with self._sync_lock:
+            self.sync_stats = self.mirror.sync()
+            # Pooled connections may hold the schema from before the first sync
+            self.reset()
+            return self.sync_stats
+
+    def connection(self):
+        if self.sync_stats is None:
+            self.sync()
+        return super().connection()
+
+
+def print_learning_data_stats(sync_stats):
+    """How the json-file mirror was brought up to date"""
+    if sync_stats["mode"] == "append":
+        how = f"resumed at byte {sync_stats['resume_offset']:,}"
+    elif sync_stats["mode"] == "rescan":
+        how = "file was rewritten, full rescan"
+    else:
+        how = "first full read"
+    print(f"\n📒 {sync_stats['json_path']}: {sync_stats['trades_read']} trades read ({how}) in "
+          f"{sync_stats['seconds']:.2f}s; {sync_stats['trades_added']} added, "
+          f"{sync_stats['trades_removed']} removed, {sync_stats['trades_total']} mirrored")
@@ -0,0 +1,141 @@
+# ml_verification_pairs.py - Per-(exchange, symbol) freshness, price variation and gap analysis
+import logging
+
+from ml_verification_db import SQLITE
+from ml_verification_perf import read_sql
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+
+logger = logging.getLogger(__name__)
+
+# A price is "realistic" when its coefficient of variation over the recent
+# window falls between these bounds; flat series usually mean stale or
+# simulated quotes, wild ones mean bad ticks.
+REALISTIC_CV_RANGE = (0.001, 0.1)
+STALE_AFTER_MINUTES = 30
+PAIR_PERCENTILES = (50, 90, 99)
+PAIR_TABLE_COLUMNS = ("exchange", "symbol", "rows", "recent_rows", "age_minutes", "cv", "coverage", "missing_slots")
+
+
+class BudgetExceeded(Exception):
+    """The per-pair query ran past its time budget and was interrupted"""
+
+
+def pair_stats_sql(source, dialect=SQLITE):
+    """One GROUP BY pass over the lookback window, folding each (exchange, symbol) pair
+
+    Gaps are counted as gap-sized time slots with no tick between a pair's
+    first and last tick. SQLite's LAG() would give exact gaps but costs
+    several times more than the whole aggregate on millions of rows.
+    """
+    columns = set(source["columns"])
+    exchange = "exchange" if "exchange" in columns else "''"
+    symbol = "symbol" if "symbol" in columns else "''"
+    price = source.get("mid_price") or "NULL"
+    julian_day, slot = dialect.julian_day, dialect.floor_int
+    return f"""
+    SELECT {exchange} AS exchange, {symbol} AS symbol,
+           COUNT(*) AS rows,
+           SUM(CASE WHEN timestamp > :recent THEN 1 ELSE 0 END) AS recent_rows,
+           ({julian_day(dialect.now)} - {julian_day('MAX(timestamp)')}) * 1440.0 AS age_minutes,
+           AVG(CASE WHEN timestamp > :recent THEN {price} END) AS mean_price,
+           AVG(CASE WHEN timestamp > :recent THEN ({price}) * ({price}) END) AS mean_square,
+           COUNT(DISTINCT {slot(julian_day('timestamp') + ' * :slots_per_day')}) AS slots_seen,
+           {slot(julian_day('MAX(timestamp)') + ' * :slots_per_day')}
+               - {slot(julian_day('MIN(timestamp)') + ' * :slots_per_day')} + 1 AS slots_spanned
+    FROM {source['table']}
+    WHERE timestamp > :lookback
+    GROUP BY 1, 2
+    """
+
+
+def query_pair_stats(conn, source, lookback_hours=24, recent_minutes=60, gap_minutes=5, budget_seconds=10.0,
+                     dialect=SQLITE):
+    """Per-pair DataFrame of freshness, recent mean/variance inputs and slot coverage
+
+    Freshness and gaps cover lookback_hours so pairs that went quiet still
+    show up; price variation only uses the last recent_minutes. The query is
+    interrupted with BudgetExceeded once it runs past budget_seconds.
+    """
+    # Cutoffs are bound once instead of computing now +/- the window for every row
+    lookback, recent = conn.execute(
+        f"SELECT {dialect.relative_time()}, {dialect.relative_time()}",
+        (f"-{lookback_hours} hours", f"-{recent_minutes} minutes")
+    ).fetchone()
+    params = {"lookback": lookback, "recent": recent, "slots_per_day": 1440.0 / gap_minutes}
+    try:
+        with dialect.time_budget(conn, budget_seconds):
+            return read_sql(pair_stats_sql(source, dialect), conn, params=params)
+    except Exception as e:
+        if dialect.is_interrupted(e):
+            raise BudgetExceeded(f"per-pair query exceeded its {budget_seconds:g}s budget") from e
+        raise
+
+
+def add_variation(pairs):
+    """Coefficient of variation and slot coverage per pair, vectorized over all pairs"""
+    n = pairs["recent_rows"].to_numpy(dtype=float)
+    mean = pairs["mean_price"].to_numpy(dtype=float)
+    variance = (pairs["mean_square"].to_numpy(dtype=float) - mean ** 2) * n / np.where(n > 1, n - 1, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cv = np.sqrt(np.clip(variance, 0, None)) / mean
+    pairs["cv"] = np.where((n > 1) & (mean > 0), cv, np.nan)
+    spanned = pairs["slots_spanned"].to_numpy(dtype=float)
+    pairs["missing_slots"] = spanned - pairs["slots_seen"].to_numpy(dtype=float)
+    pairs["coverage"] = pairs["slots_seen"].to_numpy(dtype=float) / spanned
+    return pairs.drop(columns=["mean_price", "mean_square", "slots_seen", "slots_spanned"])
+
+
+def _percentiles(values):
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    stats = {f"p{p}": float(v) for p, v in zip(PAIR_PERCENTILES, np.percentile(values, PAIR_PERCENTILES))}
+    stats["max"] = float(values.max())
+    return stats
+
+
+def summarize_pairs(pairs, stale_after_minutes=STALE_AFTER_MINUTES, cv_range=REALISTIC_CV_RANGE):
+    """Counts and percentiles across pairs for the report"""
+    age = pairs["age_minutes"].to_numpy(dtype=float)
+    cv = pairs["cv"].to_numpy(dtype=float)
+    has_cv = ~np.isnan(cv)
+    return {
+        "pairs": len(pairs),
+        "stale_pairs": int((age >= stale_after_minutes).sum()),
+        "pairs_with_gaps": int((pairs["missing_slots"] > 0).sum()),
+        "flat_pairs": int((has_cv & (cv < cv_range[0])).sum()),
+        "volatile_pairs": int((has_cv & (cv > cv_range[1])).sum()),
+        "realistic_pairs": int((has_cv & (cv >= cv_range[0]) & (cv <= cv_range[1])).sum()),
+        "age_minutes": _percentiles(age),
+        "cv": _percentiles(cv),
+        "coverage": _percentiles(pairs["coverage"].to_numpy(dtype=float)),
+        "missing_slots": _percentiles(pairs["missing_slots"].to_numpy(dtype=float)),
+        "recent_rows": _percentiles(pairs["recent_rows"].to_numpy(dtype=float)),
+    }
+
+
+def compact_pair_table(pairs, decimals=6):
+    """Column names once plus one short row per pair, stalest first"""
+    table = pairs.sort_values("age_minutes", ascending=False)[list(PAIR_TABLE_COLUMNS)]
+    rows = [[_cell(value, decimals) for value in row] for row in table.itertuples(index=False)]
+    return {"columns": list(PAIR_TABLE_COLUMNS), "rows": rows}
+
+
+def _cell(value, decimals):
+    if value is None or isinstance(value, str):
+        return value
+    value = float(value)
+    if value != value:
+        return None
+    return int(value) if value.is_integer() else round(value, decimals)
+
+
+def pair_rows(table, limit=None, sort_by=None, descending=True):
+    """Rows of a compact pair table as dicts, optionally re-sorted on one column"""
+    records = [dict(zip(table["columns"], row)) for row in table["rows"]]
+    if sort_by is not None:
+        records = [r for r in records if r[sort_by] is not None]
+        records.sort(key=lambda r: r[sort_by], reverse=descending)
+    return records[:limit] if limit else records
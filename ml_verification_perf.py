@@ -0,0 +1,228 @@
+# ml_verification_perf.py - Per-check timing, SQL and DataFrame instrumentation
+import cProfile
+import contextvars
+from collections import OrderedDict
+import functools
+import inspect
+import os
+import sqlite3
+import threading
+import time
+
+from ml_verification_startup import LazyModule
+
+pd = LazyModule("pandas")
+
+# Statements kept per check; the counters keep covering the rest
+MAX_RECORDED_STATEMENTS = 50
+SQL_PREVIEW_CHARS = 200
+
+_current_perf = contextvars.ContextVar("ml_verification_perf", default=None)
+_profile_dir = None
+# cProfile can only have one active profiler per interpreter, so profiled checks run one at a time
+_profile_lock = threading.Lock()
+
+
+class CheckPerf:
+    """Wall time, SQL statements and DataFrame memory recorded while one check runs"""
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.perf_counter()
+        self.wall_seconds = None
+        self.statements = []
+        self.statement_count = 0
+        self.sql_seconds = 0.0
+        self.rows_returned = 0
+        self.dataframes = 0
+        self.dataframe_bytes = 0
+        self.profile_path = None
+
+    def start_statement(self, sql):
+        self.statement_count += 1
+        record = {"sql": " ".join(sql.split())[:SQL_PREVIEW_CHARS], "seconds": 0.0, "rows": 0}
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append(record)
+        return record
+
+    def add_time(self, record, seconds):
+        record["seconds"] += seconds
+        self.sql_seconds += seconds
+
+    def add_rows(self, record, rows):
+        record["rows"] += rows
+        self.rows_returned += rows
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+
+    def as_dict(self):
+        perf = {
+            "wall_seconds": self.wall_seconds,
+            "statement_count": self.statement_count,
+            "sql_seconds": self.sql_seconds,
+            "rows_returned": self.rows_returned,
+            "dataframes": self.dataframes,
+            "dataframe_bytes": self.dataframe_bytes,
+            "statements": self.statements
+        }
+        if self.profile_path:
+            perf["profile"] = self.profile_path
+        return perf
+
+
+class StatementCacheStats:
+    """Estimate of sqlite3's per-connection LRU of prepared statements, keyed on SQL text
+
+    sqlite3 reuses a prepared statement when exactly the same SQL string
+    runs again on the connection, so counting repeats of the text against
+    an LRU of the same size approximates how often it had to prepare from
+    scratch. sqlite3 exposes no counters of its own, so these are an
+    estimate, not a measurement.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._recent = OrderedDict()
+
+    def record(self, sql):
+        if sql in self._recent:
+            self._recent.move_to_end(sql)
+            self.hits += 1
+            return
+        self.misses += 1
+        self._recent[sql] = None
+        if len(self._recent) > self.capacity:
+            self._recent.popitem(last=False)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that charges execute and fetch time and returned rows to the running check"""
+
+    _perf_record = None
+
+    def execute(self, sql, parameters=()):
+        statement_cache = getattr(self.connection, "statement_cache", None)
+        if statement_cache is not None:
+            statement_cache.record(sql)
+        perf = _current_perf.get()
+        if perf is None:
+            self._perf_record = None
+            return super().execute(sql, parameters)
+        self._perf_record = record = perf.start_statement(sql)
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            perf.add_time(record, time.perf_counter() - started)
+
+    def _timed_fetch(self, fetch, *args):
+        perf = _current_perf.get()
+        record = self._perf_record
+        if perf is None or record is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        try:
+            rows = fetch(*args)
+        finally:
+            perf.add_time(record, time.perf_counter() - started)
+        perf.add_rows(record, len(rows) if isinstance(rows, list) else int(rows is not None))
+        return rows
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(super().fetchmany, size if size is not None else self.arraysize)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors report to the running check (pass as factory=)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_cache = StatementCacheStats(kwargs.get("cached_statements", 128))
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+
+def current_check():
+    """CheckPerf of the instrumented check running in this context, or None"""
+    return _current_perf.get()
+
+
+def read_sql(sql, conn, params=None, **kwargs):
+    """pd.read_sql_query that also records the frame's memory footprint
+
+    memory_usage(deep=False) counts object columns as pointers, which keeps
+    the measurement cheap enough to leave on.
+    """
+    df = pd.read_sql_query(sql, conn, params=params, **kwargs)
+    perf = _current_perf.get()
+    if perf is not None:
+        perf.dataframes += 1
+        perf.dataframe_bytes += int(df.memory_usage(index=True, deep=False).sum())
+    return df
+
+
+def enable_profiling(directory):
+    """Write a cProfile .pstats file per instrumented check into directory (None disables)"""
+    global _profile_dir
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    _profile_dir = directory
+
+
+def _attach(result, perf):
+    perf.finish()
+    if isinstance(result, dict):
+        result["_perf"] = perf.as_dict()
+    return result
+
+
+def instrumented(func):
+    """Record a check's timing and SQL activity under "_perf" in the dict it returns"""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            perf = CheckPerf(func.__name__)
+            token = _current_perf.set(perf)
+            try:
+                result = await func(*args, **kwargs)
+            finally:
+                _current_perf.reset(token)
+            return _attach(result, perf)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        perf = CheckPerf(func.__name__)
+        token = _current_perf.set(perf)
+        try:
+            if _profile_dir is None:
+                result = func(*args, **kwargs)
+            else:
+                with _profile_lock:
+                    profile = cProfile.Profile()
+                    result = profile.runcall(func, *args, **kwargs)
+                    perf.profile_path = os.path.join(_profile_dir, f"{func.__name__}.pstats")
+                    profile.dump_stats(perf.profile_path)
+        finally:
+            _current_perf.reset(token)
+        return _attach(result, perf)
+    return wrapper
+
+
+def format_perf(perf):
+    """Short one-line description of a _perf dict for the reports"""
+    return (f"{perf['statement_count']} queries, {perf['rows_returned']} rows, "
+            f"{perf['sql_seconds']:.2f}s in SQL, {perf['dataframe_bytes'] / 1024:.0f} KB in frames")
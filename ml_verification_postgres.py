@@ -0,0 +1,249 @@
+# ml_verification_postgres.py - PostgreSQL storage backend for the ML verification scripts
+import functools
+import itertools
+import re
+import time
+import logging
+import warnings
+from collections.abc import Mapping
+from contextlib import contextmanager
+from urllib.parse import urlsplit, urlunsplit
+
+from ml_verification_db import PooledConnectionManager, SQLiteDialect, SchemaCatalog
+from ml_verification_perf import current_check
+from ml_verification_startup import LazyModule
+
+psycopg2 = LazyModule("psycopg2")
+
+logger = logging.getLogger(__name__)
+
+# pandas reads through any DB-API connection but warns for everything other
+# than sqlite3 and SQLAlchemy; the wrapped psycopg2 connections work fine
+warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy connectable", category=UserWarning)
+
+DEFAULT_CONNECT_TIMEOUT = 10
+# Upper bound for any single verifier statement; checks have their own timeouts too
+DEFAULT_STATEMENT_TIMEOUT_MS = 60000
+
+# String literals, quoted identifiers, and the placeholders and % signs outside them
+_SQL_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|(?<!:):[A-Za-z_]\w*|\?|%""")
+
+
+@functools.lru_cache(maxsize=512)
+def to_pyformat(sql, named):
+    """Rewrite sqlite3-style `?` (or `:name` when named) placeholders for psycopg2
+
+    Literal % signs are doubled, since psycopg2 formats the whole statement
+    text, string literals included, whenever parameters are passed.
+    """
+    def replace(match):
+        token = match.group(0)
+        if token[0] in "'\"":
+            return token.replace("%", "%%")
+        if token == "%":
+            return "%%"
+        if token == "?":
+            return "%s" if not named else token
+        return f"%({token[1:]})s" if named else token
+    return _SQL_TOKENS.sub(replace, sql)
+
+
+class PostgresDialect(SQLiteDialect):
+    """The verifier's backend-specific SQL fragments in PostgreSQL's spelling"""
+
+    name = "postgres"
+    now = "CURRENT_TIMESTAMP"
+
+    def relative_time(self):
+        # SQLite modifiers such as '-7 days' and '-10 minutes' are valid intervals as written
+        return "(CURRENT_TIMESTAMP + CAST(? AS interval))"
+
+    def julian_day(self, expression):
+        return f"(EXTRACT(EPOCH FROM {expression}) / 86400.0 + 2440587.5)"
+
+    def floor_int(self, expression):
+        # CAST(... AS INTEGER) rounds in PostgreSQL instead of truncating
+        return f"FLOOR({expression})"
+
+    def in_values(self, column):
+        return f"{column} = ANY(?)"
+
+    def values_param(self, values):
+        return list(values)
+
+    def stream(self, conn, sql, params, chunk_size):
+        """Server-side cursor, so only chunk_size rows cross the network per fetch"""
+        return conn.server_cursor(sql, params, chunk_size)
+
+    @contextmanager
+    def time_budget(self, conn, seconds):
+        previous = conn.execute("SHOW statement_timeout").fetchone()[0]
+        conn.execute("SET statement_timeout = ?", [max(1, int(seconds * 1000))])
+        try:
+            yield
+        finally:
+            conn.execute("SELECT set_config('statement_timeout', ?, false)", [previous])
+
+    def is_interrupted(self, error):
+        return "statement timeout" in str(error)
+
+
+POSTGRES = PostgresDialect()
+
+
+class PostgresCursor:
+    """psycopg2 cursor taking `?` placeholders and charging time and rows to the running check"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._perf_record = None
+
+    def execute(self, sql, parameters=()):
+        if parameters is None:
+            statement, parameters = sql, None
+        else:
+            statement = to_pyformat(sql, isinstance(parameters, Mapping))
+        perf = current_check()
+        if perf is None:
+            self._perf_record = None
+            self._cursor.execute(statement, parameters)
+            return self
+        self._perf_record = record = perf.start_statement(sql)
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(statement, parameters)
+        finally:
+            perf.add_time(record, time.perf_counter() - started)
+        return self
+
+    def _timed_fetch(self, fetch, *args):
+        perf = current_check()
+        record = self._perf_record
+        if perf is None or record is None:
+            return fetch(*args)
+        started = time.perf_counter()
+        try:
+            rows = fetch(*args)
+        finally:
+            perf.add_time(record, time.perf_counter() - started)
+        perf.add_rows(record, len(rows) if isinstance(rows, list) else int(rows is not None))
+        return rows
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed_fetch(self._cursor.fetchmany, size if size is not None else self._cursor.itersize)
+
+    def fetchall(self):
+        return self._timed_fetch(self._cursor.fetchall)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, attr):
+        return getattr(self._cursor, attr)
+
+
+class PostgresConnection:
+    """Pooled psycopg2 connection with the sqlite3-style execute() the verifier code calls"""
+
+    _stream_names = itertools.count(1)
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def cursor(self):
+        return PostgresCursor(self.raw.cursor())
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def server_cursor(self, sql, params, chunk_size):
+        """Named cursor over sql that fetches chunk_size rows per round trip
+
+        Named cursors only live inside a transaction, so the connection
+        leaves autocommit until it is returned to the pool.
+        """
+        self.raw.autocommit = False
+        cursor = self.raw.cursor(name=f"ml_verification_stream_{next(self._stream_names)}")
+        cursor.itersize = chunk_size
+        return PostgresCursor(cursor).execute(sql, params)
+
+    def __getattr__(self, attr):
+        return getattr(self.raw, attr)
+
+
+def redact_url(database_url):
+    """The database URL with any password masked, for logs and reports"""
+    parts = urlsplit(database_url)
+    if parts.password is None:
+        return database_url
+    netloc = parts.netloc.replace(f":{parts.password}@", ":***@", 1)
+    return urlunsplit(parts._replace(netloc=netloc))
+
+
+class PostgresConnectionManager(PooledConnectionManager):
+    """Pooled, read-only PostgreSQL connections with the same interface as SQLiteConnectionManager
+
+    Sessions are read-only, autocommit and pinned to UTC so timestamps
+    compare the way SQLite's datetime('now') text does.
+    """
+
+    dialect = POSTGRES
+
+    def __init__(self, database_url, pool_size=4, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 statement_timeout_ms=DEFAULT_STATEMENT_TIMEOUT_MS):
+        super().__init__(redact_url(database_url), pool_size)
+        self.database_url = database_url
+        self.connect_timeout = connect_timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self._catalog = None
+
+    def _open(self):
+        raw = psycopg2.connect(self.database_url, connect_timeout=self.connect_timeout)
+        try:
+            raw.set_session(readonly=True, autocommit=True)
+            with raw.cursor() as cursor:
+                cursor.execute("SET TIME ZONE 'UTC'")
+                cursor.execute("SET statement_timeout = %s", [int(self.statement_timeout_ms)])
+        except BaseException:
+            raw.close()
+            raise
+        return self._register(raw)
+
+    def _closed_error(self):
+        return psycopg2.InterfaceError("Connection manager has been closed")
+
+    def _lease(self, raw):
+        return PostgresConnection(raw)
+
+    def _recycle(self, raw):
+        try:
+            if not raw.autocommit:
+                # A streamed read left its transaction open
+                raw.rollback()
+                raw.autocommit = True
+        except psycopg2.Error:
+            return False
+        return not raw.closed
+
+    def schema(self):
+        """Schema catalog for the current schema; reloaded after reset()"""
+        if self._catalog is None:
+            with self.connection() as conn:
+                rows = conn.execute("""
+                SELECT table_name, column_name
+                FROM information_schema.columns
+                WHERE table_schema = current_schema()
+                ORDER BY table_name, ordinal_position
+                """).fetchall()
+            tables = {}
+            for table, column in rows:
+                tables.setdefault(table, []).append(column)
+            self._catalog = SchemaCatalog(tables, schema_version=None)
+        return self._catalog
+
+    def reset(self):
+        """Forget the schema catalog so the next check sees schema changes"""
+        self._catalog = None
@@ -0,0 +1,185 @@
+# ml_verification_replay.py - Record live exchange responses and replay them offline
+import asyncio
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only the fields the verifier reads are kept, which keeps recordings small
+TICKER_FIELDS = ("symbol", "last", "bid", "ask", "baseVolume", "timestamp")
+ORDER_BOOK_DEPTH = 50
+
+
+class InjectedExchangeError(Exception):
+    """Error raised by a ReplayExchange to simulate a failed request"""
+
+
+class ExchangeRecorder:
+    """Collects ticker and order-book responses (with their latency) per exchange"""
+
+    def __init__(self, path):
+        self.path = path
+        self.exchanges = {}
+
+    def _exchange(self, name):
+        return self.exchanges.setdefault(name, {
+            "rate_limit_ms": None, "markets": [], "tickers": {}, "order_books": {}
+        })
+
+    def record_markets(self, name, markets, rate_limit_ms):
+        recording = self._exchange(name)
+        recording["markets"] = sorted(markets or [])
+        recording["rate_limit_ms"] = rate_limit_ms
+
+    def record_ticker(self, name, symbol, ticker, latency):
+        sample = {field: ticker.get(field) for field in TICKER_FIELDS}
+        sample["latency"] = round(latency, 4)
+        self._exchange(name)["tickers"].setdefault(symbol, []).append(sample)
+
+    def record_order_book(self, name, symbol, order_book, latency):
+        sample = {
+            "bids": order_book.get("bids", [])[:ORDER_BOOK_DEPTH],
+            "asks": order_book.get("asks", [])[:ORDER_BOOK_DEPTH],
+            "timestamp": order_book.get("timestamp"),
+            "latency": round(latency, 4)
+        }
+        self._exchange(name)["order_books"].setdefault(symbol, []).append(sample)
+
+    def wrap(self, name, exchange):
+        return RecordingExchange(name, exchange, self)
+
+    def save(self):
+        """Write the recording as gzipped JSON, replacing any previous file atomically"""
+        payload = {"recorded_at": time.time(), "exchanges": self.exchanges}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".exchange-recording-", dir=directory)
+        try:
+            with gzip.open(os.fdopen(fd, 'wb'), 'wt') as f:
+                json.dump(payload, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return self.path
+
+
+class RecordingExchange:
+    """Pass-through wrapper around a ccxt exchange that records what it returns"""
+
+    def __init__(self, name, exchange, recorder):
+        self._name = name
+        self._exchange = exchange
+        self._recorder = recorder
+
+    def __getattr__(self, attr):
+        return getattr(self._exchange, attr)
+
+    async def load_markets(self, *args, **kwargs):
+        markets = await self._exchange.load_markets(*args, **kwargs)
+        self._recorder.record_markets(self._name, list(markets or {}), self._exchange.rateLimit)
+        return markets
+
+    async def fetch_ticker(self, symbol, *args, **kwargs):
+        started = time.perf_counter()
+        ticker = await self._exchange.fetch_ticker(symbol, *args, **kwargs)
+        self._recorder.record_ticker(self._name, symbol, ticker, time.perf_counter() - started)
+        return ticker
+
+    async def fetch_order_book(self, symbol, *args, **kwargs):
+        started = time.perf_counter()
+        order_book = await self._exchange.fetch_order_book(symbol, *args, **kwargs)
+        self._recorder.record_order_book(self._name, symbol, order_book, time.perf_counter() - started)
+        return order_book
+
+
+def load_recording(path):
+    """Read a recording written by ExchangeRecorder.save()"""
+    with gzip.open(path, 'rt') as f:
+        return json.load(f)
+
+
+class ReplayExchange:
+    """Offline stand-in for the ccxt exchange methods the verifier uses
+
+    Responses cycle through the recorded samples for each symbol. Latency is
+    the recorded one times latency_scale, or a fixed latency in seconds.
+    error_rate is the chance that a request raises InjectedExchangeError.
+    Timestamps are shifted so the recording looks like it was taken just now.
+    """
+
+    def __init__(self, name, recording, latency=None, latency_scale=1.0, error_rate=0.0,
+                 seed=None, rebase_timestamps=True):
+        self.id = name
+        self.name = name
+        self.rateLimit = recording.get("rate_limit_ms") or 1000
+        self.markets = {symbol: {"symbol": symbol} for symbol in recording.get("markets", [])}
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.error_rate = error_rate
+        self.request_count = 0
+        self._tickers = recording.get("tickers", {})
+        self._order_books = recording.get("order_books", {})
+        self._positions = {}
+        # Each exchange gets its own error sequence from the shared seed
+        self._random = random.Random(f"{seed}:{name}")
+        self._time_shift_ms = 0
+        if rebase_timestamps:
+            latest = max(
+                (s["timestamp"] for samples in (*self._tickers.values(), *self._order_books.values())
+                 for s in samples if s.get("timestamp")),
+                default=None
+            )
+            if latest:
+                self._time_shift_ms = int(time.time() * 1000) - latest
+
+    async def _respond(self, kind, samples_by_symbol, symbol):
+        self.request_count += 1
+        samples = samples_by_symbol.get(symbol)
+        if not samples:
+            raise InjectedExchangeError(f"{self.id} has no recorded {kind} for {symbol}")
+        position = self._positions.get((kind, symbol), 0)
+        self._positions[(kind, symbol)] = position + 1
+        sample = dict(samples[position % len(samples)])
+
+        # Decided when the request is made, so failures don't depend on completion order
+        fail = bool(self.error_rate) and self._random.random() < self.error_rate
+        delay = self.latency if self.latency is not None else sample.pop("latency", 0) * self.latency_scale
+        sample.pop("latency", None)
+        if delay:
+            await asyncio.sleep(delay)
+        if fail:
+            raise InjectedExchangeError(f"Injected {kind} failure from {self.id} for {symbol}")
+
+        if sample.get("timestamp"):
+            sample["timestamp"] += self._time_shift_ms
+        return sample
+
+    async def load_markets(self, reload=False):
+        return self.markets
+
+    async def fetch_ticker(self, symbol, params=None):
+        return await self._respond("ticker", self._tickers, symbol)
+
+    async def fetch_order_book(self, symbol, limit=None, params=None):
+        order_book = await self._respond("order_book", self._order_books, symbol)
+        if limit:
+            order_book["bids"] = order_book["bids"][:limit]
+            order_book["asks"] = order_book["asks"][:limit]
+        return order_book
+
+    async def close(self):
+        pass
+
+
+def replay_exchanges(path, **options):
+    """ReplayExchange objects for every exchange in a recording, keyed by name"""
+    recording = load_recording(path)
+    return {
+        name: ReplayExchange(name, exchange_recording, **options)
+        for name, exchange_recording in recording["exchanges"].items()
+    }
@@ -0,0 +1,229 @@
+# ml_verification_scheduler.py - Check registry and dependency-aware parallel check runner
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+from ml_verification_cache import cache_status, format_age
+from ml_verification_perf import format_perf
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECK_TIMEOUT = 30.0
+
+
+class Check:
+    """A verification check, the tables it reads and the checks that must finish first
+
+    params are the arguments that change the check's result; a check
+    registered without them is never served from the result cache.
+    """
+
+    def __init__(self, name, func, needs=(), depends_on=(), timeout=None, params=None):
+        self.name = name
+        self.func = func
+        self.needs = tuple(needs)
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.params = params
+
+
+class CheckRegistry:
+    """Ordered collection of checks, validated for unknown and circular dependencies"""
+
+    def __init__(self):
+        self._checks = {}
+
+    def register(self, name, func, needs=(), depends_on=(), timeout=None, params=None):
+        if name in self._checks:
+            raise ValueError(f"Check {name} is already registered")
+        self._checks[name] = Check(name, func, needs=needs, depends_on=depends_on, timeout=timeout, params=params)
+        return self._checks[name]
+
+    def __iter__(self):
+        return iter(self._checks.values())
+
+    def __len__(self):
+        return len(self._checks)
+
+    def __getitem__(self, name):
+        return self._checks[name]
+
+    def validate(self):
+        """Raise ValueError if a dependency is unknown or the dependencies form a cycle"""
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Circular check dependency: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self._checks[name].depends_on:
+                if dependency not in self._checks:
+                    raise ValueError(f"Check {name} depends on unknown check {dependency}")
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self._checks:
+            visit(name, [])
+
+
+class CheckScheduler:
+    """Run registered checks on a thread pool as soon as their dependencies have finished
+
+    A check that overruns its timeout is reported as an error and its
+    dependents are skipped; the rest of the checks carry on. The worker
+    thread itself cannot be interrupted and finishes in the background.
+    Checks run on daemon threads, so one that never returns does not keep
+    the process alive once the report is done.
+    With a ResultCache, checks that declare params are answered from it
+    while the database version is unchanged.
+    """
+
+    def __init__(self, max_workers=4, default_timeout=DEFAULT_CHECK_TIMEOUT, cache=None):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.cache = cache
+        self.timings = {}
+
+    def run(self, registry):
+        """Run every check in registry and return {name: result} in registration order"""
+        registry.validate()
+        results = {}
+        self.timings = {}
+        pending = {check.name: check for check in registry}
+        running = {}
+        started = time.perf_counter()
+        version = self._database_version()
+        # Hits are read here, before any worker starts, so cached checks never wait for a free worker
+        cached = self._cache_hits(registry, version)
+
+        while pending or running:
+            for name, check in list(pending.items()):
+                failed = [d for d in check.depends_on if d in results and self._failed(d)]
+                if failed:
+                    del pending[name]
+                    results[name] = {"error": f"Skipped: {', '.join(failed)} did not complete"}
+                    self._record(check, "skipped", 0.0)
+                elif all(d in results for d in check.depends_on):
+                    if name in cached:
+                        del pending[name]
+                        results[name] = cached[name]
+                        self._record(check, "ok", 0.0, cache_status(cached[name]))
+                        continue
+                    if len(running) >= self.max_workers:
+                        continue
+                    del pending[name]
+                    timeout = check.timeout if check.timeout is not None else self.default_timeout
+                    future = self._start(check.name, self._cached(check, version))
+                    running[future] = (check, time.perf_counter() + timeout)
+
+            if not running:
+                continue
+
+            next_deadline = min(deadline for _, deadline in running.values())
+            finished, _ = wait(running, timeout=max(next_deadline - time.perf_counter(), 0),
+                               return_when=FIRST_COMPLETED)
+            for future in finished:
+                check, _ = running.pop(future)
+                try:
+                    results[check.name], seconds = future.result()
+                    self._record(check, "ok", seconds, cache_status(results[check.name]))
+                except Exception as e:
+                    logger.exception(f"Check {check.name} failed")
+                    results[check.name] = {"error": f"{check.name} failed: {e}"}
+                    self._record(check, "error", None)
+
+            now = time.perf_counter()
+            for future, (check, deadline) in list(running.items()):
+                if now >= deadline:
+                    del running[future]
+                    timeout = check.timeout if check.timeout is not None else self.default_timeout
+                    logger.warning(f"Check {check.name} timed out after {timeout:g}s")
+                    results[check.name] = {"error": f"{check.name} timed out after {timeout:g}s"}
+                    self._record(check, "timeout", timeout)
+
+        self.timings = {check.name: self.timings[check.name] for check in registry}
+        self.timings["_total_seconds"] = time.perf_counter() - started
+        return {check.name: results[check.name] for check in registry}
+
+    def _database_version(self):
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.version()
+        except OSError as e:
+            logger.warning(f"Result cache disabled for this run: {e}")
+            return None
+
+    def _cache_hits(self, registry, version):
+        if version is None:
+            return {}
+        hits = {}
+        for check in registry:
+            if check.params is not None:
+                result = self.cache.lookup(check.name, check.params, version)
+                if result is not None:
+                    hits[check.name] = result
+        return hits
+
+    def _cached(self, check, version):
+        if version is None or check.params is None:
+            return check.func
+        return lambda: self.cache.compute(check.name, check.params, version, check.func)
+
+    def _start(self, name, func):
+        """Run func on its own daemon thread; a timed-out check is left to finish there"""
+        future = Future()
+        future.set_running_or_notify_cancel()
+
+        def run():
+            try:
+                future.set_result(self._timed(func))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, name=f"ml-check-{name}", daemon=True).start()
+        return future
+
+    @staticmethod
+    def _timed(func):
+        started = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - started
+
+    def _failed(self, name):
+        return self.timings.get(name, {}).get("status") != "ok"
+
+    def _record(self, check, status, seconds, cache=None):
+        self.timings[check.name] = {"status": status, "seconds": seconds, "needs": list(check.needs)}
+        if cache is not None:
+            self.timings[check.name]["cached"] = cache["hit"]
+            self.timings[check.name]["cache_age_seconds"] = cache["age_seconds"]
+
+
+def print_check_timings(timings, results=None):
+    """One-line-per-check summary of a CheckScheduler run, with each result's _perf if given"""
+    total = timings.get("_total_seconds", 0.0)
+    checks = {name: timing for name, timing in timings.items() if not name.startswith("_")}
+    serial = sum(timing["seconds"] or 0.0 for timing in checks.values())
+    print(f"\n⏱️ Checks: {len(checks)} in {total:.2f}s wall clock ({serial:.2f}s if run one after another)")
+    for name, timing in checks.items():
+        icon = {"ok": "✅", "timeout": "⏰", "skipped": "⏭️"}.get(timing["status"], "❌")
+        seconds = f"{timing['seconds']:.2f}s" if timing["seconds"] is not None else "-"
+        if timing.get("cached"):
+            print(f"   💾 {name}: {seconds} (cached result from {format_age(timing['cache_age_seconds'])} ago)")
+            continue
+        perf = (results or {}).get(name)
+        perf = perf.get("_perf") if isinstance(perf, dict) else None
+        print(f"   {icon} {name}: {seconds}" + (f" ({format_perf(perf)})" if perf else ""))
+
+    cached = [timing for timing in checks.values() if "cached" in timing]
+    if cached:
+        hits = [timing for timing in cached if timing["cached"]]
+        line = f"💾 Result cache: {len(hits)}/{len(cached)} cacheable checks served from cache"
+        if hits:
+            line += f", oldest {format_age(max(timing['cache_age_seconds'] for timing in hits))}"
+        print(line)
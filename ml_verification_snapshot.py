@@ -0,0 +1,135 @@
+# ml_verification_snapshot.py - One windowed in-memory snapshot of memebot.db shared by both verifiers
+import os
+import sqlite3
+import threading
+import time
+import logging
+from urllib.parse import quote
+
+from ml_verification_db import SQLiteConnectionManager, SchemaCatalog, quote_identifier
+
+logger = logging.getLogger(__name__)
+
+# Tables the verifiers read and the widest window any check applies to them:
+# (time column, days). None copies the whole table.
+SNAPSHOT_TABLES = {
+    "ml_models": None,
+    "trading_parameters": None,
+    "ml_model_history": ("last_updated", 30),
+    "price_data": ("timestamp", 1),
+    "arbitrage_opportunities": ("timestamp", 1),
+    "ml_predictions": ("timestamp", 1),
+    "ml_features": ("timestamp", 1),
+    # The threshold optimizer sweeps cutoffs over every trade ever made
+    "paper_trades": None,
+}
+
+
+class SnapshotConnectionManager(SQLiteConnectionManager):
+    """Pooled connections to an in-memory copy of the windows the checks read
+
+    Each table is read from memebot.db once, with rowids preserved so the
+    incremental watermarks still line up, and every check's SQL then runs
+    against the snapshot unchanged.
+    """
+
+    def __init__(self, db_path="memebot.db", pool_size=4, tables=None):
+        super().__init__(db_path, pool_size=pool_size)
+        self.tables = dict(SNAPSHOT_TABLES if tables is None else tables)
+        self._memory_name = f"ml-verification-snapshot-{os.getpid()}-{id(self)}"
+        self._holder = None
+        self._load_lock = threading.Lock()
+        self.load_stats = {}
+
+    def _uri(self):
+        return f"file:{self._memory_name}?mode=memory&cache=shared"
+
+    def schema(self):
+        with self.connection() as conn:
+            return SchemaCatalog.for_connection(conn, self._memory_name)
+
+    def _window_sql(self, table, columns):
+        window = self.tables[table]
+        if window is None:
+            return "", []
+        time_column, days = window
+        if time_column not in columns:
+            return "", []
+        return f"WHERE {quote_identifier(time_column)} > datetime('now', ?)", [f"-{days} days"]
+
+    def load(self):
+        """Copy each table's window from memebot.db into the snapshot (one read per table)"""
+        if self._holder is not None:
+            return self.load_stats
+        # The holder connection keeps the shared in-memory database alive
+        holder = sqlite3.connect(self._uri(), uri=True, isolation_level=None, check_same_thread=False)
+        source_uri = f"file:{quote(os.path.abspath(self.db_path))}?mode=ro"
+        holder.execute("ATTACH DATABASE ? AS source", (source_uri,))
+        holder.execute(f"PRAGMA source.busy_timeout = {int(self.busy_timeout_ms)}")
+        started = time.perf_counter()
+        try:
+            holder.execute("BEGIN")
+            for table in self.tables:
+                row = holder.execute(
+                    "SELECT sql FROM source.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()
+                if row is None:
+                    continue
+                table_started = time.perf_counter()
+                holder.execute(row[0])
+                columns = [r[1] for r in holder.execute(f"PRAGMA source.table_info({quote_identifier(table)})")]
+                column_list = ", ".join(quote_identifier(c) for c in columns)
+                where, params = self._window_sql(table, columns)
+                try:
+                    holder.execute(
+                        f"INSERT INTO main.{quote_identifier(table)} (rowid, {column_list}) "
+                        f"SELECT rowid, {column_list} FROM source.{quote_identifier(table)} {where}", params
+                    )
+                except sqlite3.OperationalError:
+                    # WITHOUT ROWID tables have no rowid to preserve
+                    holder.execute(
+                        f"INSERT INTO main.{quote_identifier(table)} ({column_list}) "
+                        f"SELECT {column_list} FROM source.{quote_identifier(table)} {where}", params
+                    )
+                for (index_sql,) in holder.execute(
+                    "SELECT sql FROM source.sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+                    (table,)
+                ).fetchall():
+                    holder.execute(index_sql)
+                self.load_stats[table] = {
+                    "rows": holder.execute(f"SELECT COUNT(*) FROM main.{quote_identifier(table)}").fetchone()[0],
+                    "window": params[0] if where else None,
+                    "seconds": time.perf_counter() - table_started
+                }
+            holder.execute("COMMIT")
+        except BaseException:
+            holder.execute("ROLLBACK")
+            holder.close()
+            raise
+        holder.execute("DETACH DATABASE source")
+        self._holder = holder
+        self.load_stats["_total_seconds"] = time.perf_counter() - started
+        logger.info(f"Loaded verification snapshot of {self.db_path} in {self.load_stats['_total_seconds']:.2f}s")
+        return self.load_stats
+
+    def connection(self):
+        if self._holder is None:
+            with self._load_lock:
+                self.load()
+        return super().connection()
+
+    def close(self):
+        super().close()
+        if self._holder is not None:
+            self._holder.close()
+            self._holder = None
+
+
+def print_snapshot_stats(load_stats):
+    """Rows and load time per snapshotted table"""
+    print(f"\n📸 Snapshot loaded in {load_stats.get('_total_seconds', 0):.2f}s")
+    for table, stats in load_stats.items():
+        if table.startswith("_"):
+            continue
+        window = f"window {stats['window']}" if stats["window"] else "all rows"
+        print(f"   • {table}: {stats['rows']:,} rows ({window}, {stats['seconds']:.2f}s)")
@@ -0,0 +1,94 @@
+# ml_verification_startup.py - Lazy imports and import-cost benchmark for the verification scripts
+import importlib
+import json
+import subprocess
+import sys
+import types
+
+# Modules whose cold import cost the startup benchmark reports
+BENCHMARK_MODULES = [
+    "sqlite3",
+    "numpy",
+    "pandas",
+    "ccxt",
+    "ccxt.async_support",
+    "matplotlib.pyplot",
+    "seaborn",
+    "ml_verification_db",
+    "ml_settings_verification",
+    "ml_verification_suite",
+]
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def is_loaded(self):
+        return self.__dict__["_module"] is not None
+
+
+_IMPORT_PROBE = """
+import json, sys, time
+before = set(sys.modules)
+started = time.perf_counter()
+try:
+    __import__({module!r})
+    error = None
+except Exception as e:
+    error = repr(e)
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "modules_loaded": len(set(sys.modules) - before), "error": error}}))
+"""
+
+
+def benchmark_imports(modules=None, repeats=3):
+    """Measure each module's cold import cost in a fresh interpreter (best of repeats)"""
+    results = {}
+    for module in modules or BENCHMARK_MODULES:
+        best = None
+        for _ in range(repeats):
+            completed = subprocess.run(
+                [sys.executable, "-c", _IMPORT_PROBE.format(module=module)],
+                capture_output=True, text=True
+            )
+            try:
+                sample = json.loads(completed.stdout.strip().splitlines()[-1])
+            except (IndexError, ValueError):
+                sample = {"seconds": None, "modules_loaded": 0, "error": completed.stderr.strip()[-200:]}
+            if sample["error"]:
+                best = sample
+                break
+            if best is None or sample["seconds"] < best["seconds"]:
+                best = sample
+        results[module] = best
+    return results
+
+
+def print_import_benchmark(results):
+    """Print benchmark_imports() results, most expensive first"""
+    print("\n⏱️ STARTUP IMPORT COST (fresh interpreter, best run)")
+    print("-" * 50)
+    ranked = sorted(results.items(), key=lambda item: item[1]["seconds"] or 0, reverse=True)
+    for module, sample in ranked:
+        if sample["error"]:
+            print(f"   ❌ {module}: {sample['error']}")
+        else:
+            print(f"   • {module}: {sample['seconds'] * 1000:.1f}ms ({sample['modules_loaded']} modules)")
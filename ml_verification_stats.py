@@ -0,0 +1,213 @@
+# ml_verification_stats.py - Vectorized statistics shared by the ML verification scripts
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+
+# Aggregates kept per confidence bucket. They are plain sums so partial
+# results from different runs or chunks can be merged by addition.
+BUCKET_FIELDS = ("trade_count", "profit_sum", "success_count", "confidence_sum")
+
+
+def ranges_to_edges(ranges):
+    """Turn contiguous (min, max, label) confidence ranges into bucket edges and labels"""
+    edges = [ranges[0][0]]
+    labels = []
+    for min_conf, max_conf, label in ranges:
+        if min_conf != edges[-1]:
+            raise ValueError(f"Confidence ranges must be contiguous: {min_conf} follows {edges[-1]}")
+        edges.append(max_conf)
+        labels.append(label)
+    return edges, labels
+
+
+def bucket_trades(confidence, profit, edges, labels):
+    """Aggregate trades into [edge_i, edge_i+1) confidence buckets in one vectorized pass"""
+    confidence = np.asarray(confidence, dtype=float)
+    profit = np.asarray(profit, dtype=float)
+    bucket_index = np.digitize(confidence, edges)
+    bins = len(edges) + 1
+
+    trade_count = np.bincount(bucket_index, minlength=bins)
+    profit_sum = np.bincount(bucket_index, weights=profit, minlength=bins)
+    success_count = np.bincount(bucket_index, weights=(profit > 0), minlength=bins)
+    confidence_sum = np.bincount(bucket_index, weights=confidence, minlength=bins)
+
+    aggregates = {}
+    for i, label in enumerate(labels, start=1):
+        if trade_count[i] > 0:
+            aggregates[label] = {
+                "trade_count": int(trade_count[i]),
+                "profit_sum": float(profit_sum[i]),
+                "success_count": int(success_count[i]),
+                "confidence_sum": float(confidence_sum[i])
+            }
+    return aggregates
+
+
+def merge_bucket_aggregates(target, delta):
+    """Add the bucket aggregates in delta into target in place"""
+    for label, values in delta.items():
+        bucket = target.setdefault(label, {field: 0 for field in BUCKET_FIELDS})
+        for field in BUCKET_FIELDS:
+            bucket[field] += values.get(field, 0)
+    return target
+
+
+def summarize_bucket_aggregates(aggregates, labels):
+    """Convert summed bucket aggregates into the per-range stats the reports print"""
+    summary = {}
+    for label in labels:
+        bucket = aggregates.get(label)
+        if not bucket or bucket["trade_count"] == 0:
+            continue
+        count = bucket["trade_count"]
+        summary[label] = {
+            "trade_count": count,
+            "success_rate": bucket["success_count"] / count,
+            "avg_profit": bucket["profit_sum"] / count,
+            "avg_confidence": bucket["confidence_sum"] / count
+        }
+    return summary
+
+
+def confidence_bucket_case(edges, column="confidence_score"):
+    """SQL CASE expression (and its parameters) mapping column to a bucket index"""
+    whens = []
+    params = []
+    for i in range(len(edges) - 1):
+        whens.append(f"WHEN {column} >= ? AND {column} < ? THEN {i}")
+        params.extend([edges[i], edges[i + 1]])
+    return f"CASE {' '.join(whens)} END", params
+
+
+def query_confidence_buckets(conn, edges, labels, source_sql, source_params=(), low_confidence_cutoff=0.3):
+    """Aggregate trades into confidence buckets with a single GROUP BY query
+
+    source_sql must select confidence_score and profit; only one row per
+    bucket ever leaves the database, so memory does not grow with the window.
+    """
+    case_sql, case_params = confidence_bucket_case(edges)
+    rows = conn.execute(
+        f"""
+        SELECT {case_sql} AS bucket,
+               COUNT(*), SUM(profit), SUM(CASE WHEN profit > 0 THEN 1 ELSE 0 END), SUM(confidence_score),
+               SUM(CASE WHEN confidence_score < ? THEN 1 ELSE 0 END)
+        FROM ({source_sql}) AS source
+        GROUP BY bucket
+        """,
+        [*case_params, low_confidence_cutoff, *source_params]
+    ).fetchall()
+
+    aggregates = {}
+    totals = {"total": 0, "low_confidence": 0}
+    for bucket, count, profit_sum, success_count, confidence_sum, low_count in rows:
+        totals["total"] += count
+        totals["low_confidence"] += low_count or 0
+        if bucket is not None:
+            aggregates[labels[bucket]] = {
+                "trade_count": count,
+                "profit_sum": profit_sum or 0.0,
+                "success_count": success_count or 0,
+                "confidence_sum": confidence_sum or 0.0
+            }
+    return aggregates, totals
+
+
+def comparison_labels(labels, present):
+    """The (high, low) buckets whose success rates are compared
+
+    "High" and "Low" when the ranges have them, otherwise the highest and
+    lowest of the present (non-empty) buckets of a custom set of ranges.
+    """
+    if "High" in labels and "Low" in labels:
+        return "High", "Low"
+    present = [label for label in labels if label in present]
+    return (present[-1], present[0]) if present else (None, None)
+
+
+def confidence_correlates_with_success(analysis, labels):
+    """Whether the high-confidence bucket beats the low one on success rate"""
+    high, low = comparison_labels(labels, analysis)
+    return analysis.get(high, {}).get("success_rate", 0) > analysis.get(low, {}).get("success_rate", 0)
+
+
+def edges_to_ranges(edges):
+    """Build (min, max, label) confidence ranges from bucket edges, e.g. 0.5, 0.6 -> "50-60%" """
+    return [
+        (edges[i], edges[i + 1], f"{edges[i] * 100:g}-{edges[i + 1] * 100:g}%")
+        for i in range(len(edges) - 1)
+    ]
+
+
+class RunningStats:
+    """Count, mean and variance folded in one chunk at a time (Welford, merged per chunk)"""
+
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        """Fold a chunk of values in without keeping them"""
+        values = np.asarray(values, dtype=float)
+        if values.size:
+            chunk_mean = float(values.mean())
+            self._combine(int(values.size), chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+        return self
+
+    def merge(self, other):
+        """Fold another RunningStats in, as if its values had been seen here"""
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def _combine(self, count, mean, m2):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.variance ** 0.5
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "std": self.std}
+
+
+def stream_confidence_buckets(cursor, edges, labels, chunk_size=10000, low_confidence_cutoff=0.3):
+    """Aggregate (confidence_score, profit) rows from cursor into confidence buckets chunk by chunk
+
+    Returns the same (aggregates, totals) as query_confidence_buckets plus a
+    RunningStats of profit per bucket; at most chunk_size rows are held at once.
+    """
+    aggregates = {}
+    totals = {"total": 0, "low_confidence": 0, "chunks": 0}
+    profit_stats = {label: RunningStats() for label in labels}
+
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        chunk = np.array(rows, dtype=float).reshape(len(rows), 2)
+        confidence = chunk[:, 0]
+        # NULL profits count as trades but add nothing, like SUM() in SQL
+        profit = np.nan_to_num(chunk[:, 1])
+
+        totals["total"] += len(rows)
+        totals["low_confidence"] += int((confidence < low_confidence_cutoff).sum())
+        totals["chunks"] += 1
+        merge_bucket_aggregates(aggregates, bucket_trades(confidence, profit, edges, labels))
+
+        bucket_index = np.digitize(confidence, edges)
+        for i, label in enumerate(labels, start=1):
+            profit_stats[label].update(profit[bucket_index == i])
+
+    return aggregates, totals, profit_stats
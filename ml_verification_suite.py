@@ -1,201 +1,342 @@
 # ml_verification_suite.py - Verify ML models use real exchange data
+import argparse
 import asyncio
-import sqlite3
-import pandas as pd
-import numpy as np
+import time
 import json
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
-import ccxt
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from ml_verification_startup import LazyModule, benchmark_imports, print_import_benchmark
+from ml_verification_align import aligned_by_pair, align_quotes, format_alignment, quotes_frame, summarize_alignment
+from ml_verification_bootstrap import DEFAULT_BOOTSTRAP_SEED, DEFAULT_RESAMPLES, EXACT_MAX_TRADES, bootstrap_buckets
+from ml_verification_cache import DEFAULT_CACHE_TTL, ResultCache
+from ml_verification_calibration import (
+    DEFAULT_CALIBRATION_BINS,
+    DEFAULT_CALIBRATION_WINDOW_DAYS,
+    calibrate_trades,
+    format_calibration,
+)
+from ml_verification_depth import DEFAULT_BOOK_DEPTH, DEFAULT_NOTIONAL_LADDER, analyze_depth
+from ml_verification_db import (
+    QueryPlanAdvisor,
+    SQLiteConnectionManager,
+    open_connection_manager,
+    print_connection_stats,
+    print_query_plan_report,
+)
+from ml_verification_incremental import IncrementalConfidenceTracker, IncrementalStateStore
+from ml_verification_jsonfile import LearningDataError, print_learning_data_stats
+from ml_verification_perf import enable_profiling, instrumented, read_sql
+from ml_verification_pairs import (
+    REALISTIC_CV_RANGE,
+    STALE_AFTER_MINUTES,
+    BudgetExceeded,
+    add_variation,
+    compact_pair_table,
+    pair_rows,
+    query_pair_stats,
+    summarize_pairs,
+)
+from ml_verification_replay import ExchangeRecorder, replay_exchanges
+from ml_verification_scheduler import DEFAULT_CHECK_TIMEOUT, CheckRegistry, CheckScheduler, print_check_timings
+from ml_verification_stats import (
+    confidence_correlates_with_success,
+    edges_to_ranges,
+    query_confidence_buckets,
+    ranges_to_edges,
+    summarize_bucket_aggregates,
+)
+
+# Heavy libraries load on first use so DB-only runs skip the exchange client
+# entirely; the plotting libraries were never used and are no longer imported.
+pd = LazyModule("pandas")
+ccxt = LazyModule("ccxt.async_support")
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class AsyncTokenBucket:
+    """Token-bucket rate limiter guarding one exchange's REST endpoints"""
+    
+    def __init__(self, rate_per_second, burst=1):
+        self.rate_per_second = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait until a request token is available, then consume it"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate_per_second)
+
 class MLDataSourceVerifier:
     """Comprehensive verification that ML models use real exchange data"""
     
-    def __init__(self, db_path="memebot.db"):
+    # Confidence ranges compared against trade success
+    CONFIDENCE_RANGES = [
+        (0.0, 0.5, "Low"),
+        (0.5, 0.7, "Medium"), 
+        (0.7, 0.85, "High"),
+        (0.85, 1.0, "Very High")
+    ]
+    
+    def __init__(self, db_path="memebot.db", connection_manager=None, state_store=None, result_cache=None):
         self.db_path = db_path
+        self.db = connection_manager or SQLiteConnectionManager(db_path)
+        self.state_store = state_store or IncrementalStateStore.for_database(db_path)
+        self.result_cache = result_cache
         self.exchanges = {}
+        self.rate_limiters = {}
         self.verification_results = {}
         
-    async def initialize_exchanges(self):
-        """Initialize exchanges for real-time data comparison"""
-        exchange_configs = {
-            'kraken': ccxt.kraken(),
-            'binanceus': ccxt.binanceus(), 
-            'cryptocom': ccxt.cryptocom()
+    async def initialize_exchanges(self, burst=2, replay=None, recorder=None):
+        """Initialize exchanges for real-time data comparison
+        
+        replay is a {name: exchange} mapping (see ml_verification_replay) used
+        instead of the live ccxt clients; recorder captures live responses.
+        """
+        if replay is not None:
+            exchange_configs = dict(replay)
+        else:
+            # Requests are throttled by our own per-exchange token buckets so the
+            # sweep can run them concurrently instead of through ccxt's serial queue
+            exchange_configs = {
+                'kraken': ccxt.kraken({'enableRateLimit': False}),
+                'binanceus': ccxt.binanceus({'enableRateLimit': False}), 
+                'cryptocom': ccxt.cryptocom({'enableRateLimit': False})
+            }
+            if recorder is not None:
+                exchange_configs = {
+                    name: recorder.wrap(name, exchange) for name, exchange in exchange_configs.items()
+                }
+        
+        results = await asyncio.gather(
+            *(exchange.load_markets() for exchange in exchange_configs.values()),
+            return_exceptions=True
+        )
+        
+        for (name, exchange), result in zip(exchange_configs.items(), results):
+            if isinstance(result, Exception):
+                logger.warning(f"❌ Could not connect to {name}: {result}")
+                await exchange.close()
+                continue
+            self.exchanges[name] = exchange
+            # ccxt's rateLimit is the minimum delay between requests in milliseconds
+            self.rate_limiters[name] = AsyncTokenBucket(1000 / max(exchange.rateLimit, 1), burst=burst)
+            logger.info(f"✅ Connected to {name} for verification")
+    
+    async def _fetch_live_ticker(self, exchange_name, symbol, semaphore, counter):
+        """Fetch one ticker under the global concurrency cap and the exchange's rate limit"""
+        exchange = self.exchanges[exchange_name]
+        async with semaphore:
+            await self.rate_limiters[exchange_name].acquire()
+            counter["requests"] += 1
+            ticker = await exchange.fetch_ticker(symbol)
+        
+        return {
+            "last_price": ticker['last'],
+            "bid": ticker['bid'],
+            "ask": ticker['ask'],
+            "spread_pct": ((ticker['ask'] - ticker['bid']) / ticker['last']) * 100,
+            "volume_24h": ticker['baseVolume'],
+            "timestamp": ticker['timestamp'],
+            "received_at": int(time.time() * 1000)
         }
+    
+    async def _fetch_order_book(self, exchange_name, symbol, semaphore, counter, depth):
+        """Fetch one order book under the global concurrency cap and the exchange's rate limit"""
+        exchange = self.exchanges[exchange_name]
+        async with semaphore:
+            await self.rate_limiters[exchange_name].acquire()
+            counter["requests"] += 1
+            return await exchange.fetch_order_book(symbol, limit=depth)
+    
+    def _load_recent_db_prices(self, symbols, minutes=10):
+        """Load recent database prices for many symbols in one query"""
+        source = self.db.planner().price_source()
+        if source is None or source['mid_price'] is None:
+            raise LookupError("no table with comparable prices (price_data or paper_trades)")
         
-        for name, exchange in exchange_configs.items():
-            try:
-                await exchange.load_markets()
-                self.exchanges[name] = exchange
-                logger.info(f"✅ Connected to {name} for verification")
-            except Exception as e:
-                logger.warning(f"❌ Could not connect to {name}: {e}")
+        # One statement text for any number of symbols, so single-symbol checks
+        # and sweeps all reuse the same prepared statement
+        dialect = self.db.dialect
+        db_query = f"""
+        SELECT exchange, symbol, {source['mid_price']} AS mid_price, timestamp
+        FROM {source['table']} 
+        WHERE {dialect.in_values('symbol')}
+        AND timestamp > {dialect.relative_time()}
+        ORDER BY timestamp DESC
+        """
+        with self.db.connection() as conn:
+            return read_sql(db_query, conn, params=[dialect.values_param(symbols), f"-{minutes} minutes"])
+    
+    def _load_tracked_symbols(self):
+        """All symbols the bot has recorded prices for"""
+        source = self.db.planner().price_source()
+        if source is None:
+            return []
+        with self.db.connection() as conn:
+            symbols = read_sql(f"SELECT DISTINCT symbol FROM {source['table']}", conn)
+        return sorted(symbols['symbol'].dropna().tolist())
     
+    @instrumented
     def verify_ml_model_integration(self):
         """Check if ML models are properly integrated and active"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Check ML models table
-            ml_models_query = """
-            SELECT name, accuracy, last_trained, confidence_threshold, is_active 
-            FROM ml_models 
-            ORDER BY last_trained DESC
-            """
+            if not self.db.planner().has_table("ml_models"):
+                return {"error": "ML model verification failed: ml_models table not found"}
             
-            ml_models = pd.read_sql_query(ml_models_query, conn)
-            
-            verification = {
-                "total_models": len(ml_models),
-                "active_models": len(ml_models[ml_models['is_active'] == 1]),
-                "models_with_training": len(ml_models[ml_models['last_trained'].notna()]),
-                "average_accuracy": ml_models['accuracy'].mean() if len(ml_models) > 0 else 0,
-                "confidence_thresholds": ml_models[['name', 'confidence_threshold']].to_dict('records')
-            }
-            
-            # Check for recent model activity
-            if len(ml_models) > 0:
-                latest_training = pd.to_datetime(ml_models['last_trained'].max())
-                hours_since_training = (datetime.now() - latest_training).total_seconds() / 3600
-                verification["hours_since_last_training"] = hours_since_training
-                verification["models_recently_active"] = hours_since_training < 24
-            
-            conn.close()
+            with self.db.connection() as conn:
+                
+                # Check ML models table
+                ml_models_query = """
+                SELECT name, accuracy, last_trained, confidence_threshold, is_active 
+                FROM ml_models 
+                ORDER BY last_trained DESC
+                """
+                
+                ml_models = read_sql(ml_models_query, conn)
+                
+                verification = {
+                    "total_models": len(ml_models),
+                    "active_models": len(ml_models[ml_models['is_active'] == 1]),
+                    "models_with_training": len(ml_models[ml_models['last_trained'].notna()]),
+                    "average_accuracy": ml_models['accuracy'].mean() if len(ml_models) > 0 else 0,
+                    "confidence_thresholds": ml_models[['name', 'confidence_threshold']].to_dict('records')
+                }
+                
+                # Check for recent model activity
+                if len(ml_models) > 0:
+                    latest_training = pd.to_datetime(ml_models['last_trained'].max())
+                    hours_since_training = (datetime.now() - latest_training).total_seconds() / 3600
+                    verification["hours_since_last_training"] = hours_since_training
+                    verification["models_recently_active"] = hours_since_training < 24
+                
             return verification
             
         except Exception as e:
             return {"error": f"ML model verification failed: {e}"}
     
-    def verify_feature_data_sources(self):
-        """Verify that ML features are calculated from real exchange data"""
+    @instrumented
+    def verify_feature_data_sources(self, lookback_hours=24, recent_minutes=60, gap_minutes=5, budget_seconds=10.0):
+        """Verify that ML features are calculated from real exchange data, per exchange and symbol"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            # Recent prices come from price_data, or paper_trades when there is no price_data table
+            source = self.db.planner().price_source()
+            if source is None:
+                return {"error": "Feature data verification failed: no price_data or paper_trades table"}
             
-            # Check if price_data table exists and has recent data
-            price_data_query = """
-            SELECT exchange, symbol, timestamp, mid_price, spread_pct, volume_24h
-            FROM price_data 
-            WHERE timestamp > datetime('now', '-1 hour')
-            ORDER BY timestamp DESC
-            LIMIT 100
-            """
-            
-            try:
-                price_data = pd.read_sql_query(price_data_query, conn)
-            except:
-                # Try alternative table names
-                price_data_query = """
-                SELECT * FROM paper_trades 
-                WHERE timestamp > datetime('now', '-1 hour')
-                ORDER BY timestamp DESC
-                LIMIT 100
-                """
-                price_data = pd.read_sql_query(price_data_query, conn)
+            with self.db.connection() as conn:
+                
+                # One aggregate row per (exchange, symbol); mixing pairs whose prices differ by
+                # orders of magnitude into a single std/mean says nothing about either of them
+                try:
+                    pairs = query_pair_stats(conn, source, lookback_hours, recent_minutes, gap_minutes,
+                                             budget_seconds, dialect=self.db.dialect)
+                except BudgetExceeded as e:
+                    logger.warning(f"{e}; falling back to the last {recent_minutes} minutes")
+                    lookback_hours = recent_minutes / 60
+                    pairs = query_pair_stats(conn, source, lookback_hours, recent_minutes, gap_minutes,
+                                             budget_seconds, dialect=self.db.dialect)
             
+            pairs = add_variation(pairs)
+            recent = pairs[pairs["recent_rows"] > 0]
             verification = {
-                "recent_data_points": len(price_data),
-                "unique_exchanges": price_data['exchange'].nunique() if 'exchange' in price_data.columns else 0,
-                "unique_symbols": price_data['symbol'].nunique() if 'symbol' in price_data.columns else 0,
-                "data_freshness_minutes": 0
+                "recent_data_points": int(recent["recent_rows"].sum()),
+                "unique_exchanges": recent["exchange"].nunique() if "exchange" in source["columns"] else 0,
+                "unique_symbols": recent["symbol"].nunique() if "symbol" in source["columns"] else 0,
+                "data_freshness_minutes": 0,
+                "lookback_hours": lookback_hours,
+                "recent_minutes": recent_minutes,
+                "gap_minutes": gap_minutes
             }
             
-            if len(price_data) > 0 and 'timestamp' in price_data.columns:
-                latest_timestamp = pd.to_datetime(price_data['timestamp'].max())
-                minutes_old = (datetime.now() - latest_timestamp).total_seconds() / 60
+            if len(pairs) > 0:
+                minutes_old = float(pairs["age_minutes"].min())
                 verification["data_freshness_minutes"] = minutes_old
-                verification["data_is_fresh"] = minutes_old < 30  # Less than 30 minutes old
+                verification["data_is_fresh"] = minutes_old < STALE_AFTER_MINUTES
+                verification["pair_summary"] = summarize_pairs(pairs)
+                verification["pairs"] = compact_pair_table(pairs)
                 
-                # Check for realistic price variations
-                if 'mid_price' in price_data.columns:
-                    price_std = price_data['mid_price'].std()
-                    price_mean = price_data['mid_price'].mean()
-                    verification["price_variation_coefficient"] = price_std / price_mean if price_mean > 0 else 0
-                    verification["has_realistic_price_variation"] = 0.001 < (price_std / price_mean) < 0.1
-            
-            conn.close()
+                # Check for realistic price variations, judged on the typical pair
+                cv = verification["pair_summary"]["cv"]
+                if cv is not None:
+                    verification["price_variation_coefficient"] = cv["p50"]
+                    verification["has_realistic_price_variation"] = (
+                        REALISTIC_CV_RANGE[0] < cv["p50"] < REALISTIC_CV_RANGE[1]
+                    )
+            
             return verification
             
         except Exception as e:
             return {"error": f"Feature data verification failed: {e}"}
     
+    @instrumented
     def verify_ml_prediction_pipeline(self):
         """Verify ML predictions are being made and stored"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            # Check ML predictions table or arbitrage opportunities / trades with ML scores,
+            # only querying the sources that exist in this database
+            prediction_sources = self.db.planner().prediction_sources()
             
-            # Check for ML predictions table or arbitrage opportunities with ML scores
-            prediction_queries = [
-                """
-                SELECT timestamp, symbol, quality_score, confidence, ml_prediction
-                FROM arbitrage_opportunities 
-                WHERE timestamp > datetime('now', '-2 hours')
-                AND quality_score IS NOT NULL
-                ORDER BY timestamp DESC
-                """,
-                """
-                SELECT timestamp, symbol, profit, confidence_score
-                FROM paper_trades 
-                WHERE timestamp > datetime('now', '-2 hours')
-                AND confidence_score IS NOT NULL
-                ORDER BY timestamp DESC
-                """,
-                """
-                SELECT * FROM ml_predictions 
-                WHERE timestamp > datetime('now', '-2 hours')
-                ORDER BY timestamp DESC
-                """
-            ]
-            
-            predictions_data = None
-            for query in prediction_queries:
-                try:
-                    predictions_data = pd.read_sql_query(query, conn)
+            with self.db.connection() as conn:
+                
+                predictions_data = None
+                for source in prediction_sources:
+                    not_null = f"AND {source['not_null']} IS NOT NULL" if source['not_null'] else ""
+                    query = f"""
+                    SELECT {', '.join(source['columns'])}
+                    FROM {source['table']} 
+                    WHERE timestamp > {self.db.dialect.relative_time()}
+                    {not_null}
+                    ORDER BY timestamp DESC
+                    """
+                    predictions_data = read_sql(query, conn, params=["-2 hours"])
                     if len(predictions_data) > 0:
                         break
-                except:
-                    continue
-            
-            if predictions_data is None or len(predictions_data) == 0:
-                conn.close()
-                return {
-                    "predictions_found": False,
-                    "error": "No ML prediction data found in database"
+                
+                if predictions_data is None or len(predictions_data) == 0:
+                    return {
+                        "predictions_found": False,
+                        "error": "No ML prediction data found in database"
+                    }
+                
+                verification = {
+                    "predictions_found": True,
+                    "total_predictions": len(predictions_data),
+                    "prediction_columns": list(predictions_data.columns),
+                    "has_confidence_scores": any('confidence' in col.lower() for col in predictions_data.columns),
+                    "has_quality_scores": any('quality' in col.lower() or 'score' in col.lower() for col in predictions_data.columns)
                 }
-            
-            verification = {
-                "predictions_found": True,
-                "total_predictions": len(predictions_data),
-                "prediction_columns": list(predictions_data.columns),
-                "has_confidence_scores": any('confidence' in col.lower() for col in predictions_data.columns),
-                "has_quality_scores": any('quality' in col.lower() or 'score' in col.lower() for col in predictions_data.columns)
-            }
-            
-            # Analyze prediction distribution
-            for col in predictions_data.columns:
-                if 'confidence' in col.lower() or 'quality' in col.lower() or 'score' in col.lower():
-                    scores = predictions_data[col].dropna()
-                    if len(scores) > 0:
-                        verification[f"{col}_stats"] = {
-                            "mean": float(scores.mean()),
-                            "std": float(scores.std()),
-                            "min": float(scores.min()),
-                            "max": float(scores.max()),
-                            "distribution_looks_realistic": 0.1 < scores.std() < 0.4
-                        }
-            
-            conn.close()
+                
+                # Analyze prediction distribution
+                for col in predictions_data.columns:
+                    if 'confidence' in col.lower() or 'quality' in col.lower() or 'score' in col.lower():
+                        scores = predictions_data[col].dropna()
+                        if len(scores) > 0:
+                            verification[f"{col}_stats"] = {
+                                "mean": float(scores.mean()),
+                                "std": float(scores.std()),
+                                "min": float(scores.min()),
+                                "max": float(scores.max()),
+                                "distribution_looks_realistic": 0.1 < scores.std() < 0.4
+                            }
+                
             return verification
             
         except Exception as e:
             return {"error": f"ML prediction verification failed: {e}"}
     
+    @instrumented
     async def verify_real_time_data_flow(self, symbol='DOGE/USDT'):
         """Verify data flows from exchanges to ML models in real-time"""
         verification = {
@@ -205,172 +346,379 @@ class MLDataSourceVerifier:
             "data_consistency": {}
         }
         
-        # Get current data from exchanges
-        for exchange_name, exchange in self.exchanges.items():
-            try:
-                ticker = await exchange.fetch_ticker(symbol)
-                orderbook = await exchange.fetch_order_book(symbol, limit=5)
-                
-                verification["exchange_data"][exchange_name] = {
-                    "last_price": ticker['last'],
-                    "bid": ticker['bid'],
-                    "ask": ticker['ask'],
-                    "spread_pct": ((ticker['ask'] - ticker['bid']) / ticker['last']) * 100,
-                    "volume_24h": ticker['baseVolume'],
-                    "timestamp": ticker['timestamp']
-                }
-                
-            except Exception as e:
-                verification["exchange_data"][exchange_name] = {"error": str(e)}
+        # Get current data from all exchanges concurrently
+        semaphore = asyncio.Semaphore(max(len(self.exchanges), 1))
+        counter = {"requests": 0}
+        exchange_names = list(self.exchanges.keys())
+        tickers = await asyncio.gather(
+            *(self._fetch_live_ticker(name, symbol, semaphore, counter) for name in exchange_names),
+            return_exceptions=True
+        )
+        for exchange_name, ticker in zip(exchange_names, tickers):
+            if isinstance(ticker, Exception):
+                verification["exchange_data"][exchange_name] = {"error": str(ticker)}
+            else:
+                verification["exchange_data"][exchange_name] = ticker
         
-        # Compare with database data
+        # Compare each live quote with the database row nearest to it in time
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Get recent database data for comparison
-            db_query = f"""
-            SELECT exchange, mid_price, spread_pct, volume_24h, timestamp
-            FROM price_data 
-            WHERE symbol = '{symbol}' 
-            AND timestamp > datetime('now', '-10 minutes')
-            ORDER BY timestamp DESC
-            """
-            
-            try:
-                db_data = pd.read_sql_query(db_query, conn)
-            except:
-                # Alternative query for paper_trades table
-                db_query = f"""
-                SELECT exchange, buy_price, sell_price, timestamp
-                FROM paper_trades 
-                WHERE symbol = '{symbol}' 
-                AND timestamp > datetime('now', '-10 minutes')
-                ORDER BY timestamp DESC
-                """
-                db_data = pd.read_sql_query(db_query, conn)
+            db_data = self._load_recent_db_prices([symbol])
             
             if len(db_data) > 0:
                 verification["database_has_recent_data"] = True
                 verification["db_data_count"] = len(db_data)
                 
-                # Check data consistency
-                for exchange_name in self.exchanges.keys():
-                    if exchange_name in verification["exchange_data"]:
-                        exchange_live = verification["exchange_data"][exchange_name]
-                        if "error" not in exchange_live:
-                            # Find matching database entries
-                            db_exchange_data = db_data[db_data['exchange'] == exchange_name]
-                            
-                            if len(db_exchange_data) > 0:
-                                latest_db = db_exchange_data.iloc[0]
-                                
-                                # Compare prices (allowing for some variance due to timing)
-                                if 'mid_price' in latest_db:
-                                    price_diff_pct = abs(exchange_live['last_price'] - latest_db['mid_price']) / latest_db['mid_price'] * 100
-                                elif 'buy_price' in latest_db and 'sell_price' in latest_db:
-                                    db_mid = (latest_db['buy_price'] + latest_db['sell_price']) / 2
-                                    price_diff_pct = abs(exchange_live['last_price'] - db_mid) / db_mid * 100
-                                else:
-                                    price_diff_pct = 999  # No comparable data
-                                
-                                verification["data_consistency"][exchange_name] = {
-                                    "price_difference_pct": price_diff_pct,
-                                    "data_appears_synchronized": price_diff_pct < 5  # Less than 5% difference
-                                }
+                quotes = [
+                    (exchange_name, symbol, live) for exchange_name, live in verification["exchange_data"].items()
+                    if "error" not in live
+                ]
+                if quotes:
+                    aligned = align_quotes(quotes_frame(quotes), db_data)
+                    verification["alignment"] = summarize_alignment(aligned, len(quotes))
+                    
+                    # Check data consistency
+                    for (exchange_name, _), match in aligned_by_pair(aligned).items():
+                        verification["data_consistency"][exchange_name] = dict(
+                            match, data_appears_synchronized=match["price_difference_pct"] < 5  # Less than 5% difference
+                        )
             else:
                 verification["database_has_recent_data"] = False
             
-            conn.close()
-            
         except Exception as e:
             verification["database_verification_error"] = str(e)
         
         return verification
     
-    def verify_confidence_threshold_system(self):
-        """Verify that confidence thresholds are being used for trade decisions"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            
-            # Check trades with confidence information
-            confidence_query = """
-            SELECT symbol, profit, confidence_score, timestamp
-            FROM paper_trades 
-            WHERE confidence_score IS NOT NULL
-            ORDER BY timestamp DESC
-            LIMIT 1000
-            """
-            
+    @instrumented
+    async def verify_real_time_data_sweep(self, symbols=None, max_concurrency=8, max_price_diff_pct=5):
+        """Compare live tickers with database prices for many symbols across all exchanges"""
+        started = time.perf_counter()
+        counter = {"requests": 0}
+        
+        if symbols is None:
             try:
-                trades_with_confidence = pd.read_sql_query(confidence_query, conn)
-            except:
-                # Try alternative approaches
-                trades_with_confidence = pd.DataFrame()
+                symbols = self._load_tracked_symbols()
+            except Exception as e:
+                return {"sweep": True, "error": f"Could not load symbols from price_data: {e}"}
+        
+        sweep = {
+            "sweep": True,
+            "symbols_requested": list(symbols),
+            "exchanges": list(self.exchanges.keys()),
+            "results": {symbol: {} for symbol in symbols},
+            "pairs_checked": 0,
+            "pairs_synchronized": 0
+        }
+        
+        # Only request pairs the exchange actually lists
+        pairs = []
+        for symbol in symbols:
+            for exchange_name, exchange in self.exchanges.items():
+                if exchange.markets and symbol not in exchange.markets:
+                    sweep["results"][symbol][exchange_name] = {"skipped": "symbol not listed"}
+                else:
+                    pairs.append((exchange_name, symbol))
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        tickers = await asyncio.gather(
+            *(self._fetch_live_ticker(name, symbol, semaphore, counter) for name, symbol in pairs),
+            return_exceptions=True
+        )
+        
+        # One as-of join lines every quote up with its pair's database row nearest in time
+        quotes = [
+            (exchange_name, symbol, ticker) for (exchange_name, symbol), ticker in zip(pairs, tickers)
+            if not isinstance(ticker, Exception)
+        ]
+        matches = {}
+        try:
+            if quotes:
+                aligned = align_quotes(quotes_frame(quotes), self._load_recent_db_prices(symbols))
+                sweep["alignment"] = summarize_alignment(aligned, len(quotes), max_price_diff_pct)
+                matches = aligned_by_pair(aligned)
+        except Exception as e:
+            sweep["database_verification_error"] = str(e)
+        
+        for (exchange_name, symbol), ticker in zip(pairs, tickers):
+            if isinstance(ticker, Exception):
+                sweep["results"][symbol][exchange_name] = {"error": str(ticker)}
+                continue
             
-            verification = {
-                "trades_with_confidence": len(trades_with_confidence),
-                "confidence_system_active": len(trades_with_confidence) > 0
-            }
+            result = {"live": ticker}
+            match = matches.get((exchange_name, symbol))
+            if match is not None:
+                result.update(match)
+                result["data_appears_synchronized"] = match["price_difference_pct"] < max_price_diff_pct
+                sweep["pairs_checked"] += 1
+                sweep["pairs_synchronized"] += int(result["data_appears_synchronized"])
+            else:
+                result["database_has_recent_data"] = False
+            sweep["results"][symbol][exchange_name] = result
+        
+        sweep["request_count"] = counter["requests"]
+        sweep["wall_clock_seconds"] = time.perf_counter() - started
+        return sweep
+    
+    @instrumented
+    async def verify_order_book_depth(self, symbols=None, depth=DEFAULT_BOOK_DEPTH,
+                                      notionals=DEFAULT_NOTIONAL_LADDER, max_concurrency=8):
+        """Fill prices and slippage for a ladder of order sizes, and executable cross-exchange spreads"""
+        symbols = list(symbols or ['DOGE/USDT'])
+        counter = {"requests": 0}
+        verification = {
+            "symbols": symbols,
+            "exchanges": list(self.exchanges.keys()),
+            "depth": depth,
+            "notionals": list(notionals),
+            "errors": {}
+        }
+        
+        pairs = [
+            (exchange_name, symbol) for symbol in symbols for exchange_name, exchange in self.exchanges.items()
+            if not exchange.markets or symbol in exchange.markets
+        ]
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        books = await asyncio.gather(
+            *(self._fetch_order_book(name, symbol, semaphore, counter, depth) for name, symbol in pairs),
+            return_exceptions=True
+        )
+        verification["fetch_seconds"] = time.perf_counter() - started
+        verification["request_count"] = counter["requests"]
+        
+        fetched = {}
+        for (exchange_name, symbol), book in zip(pairs, books):
+            if isinstance(book, Exception):
+                verification["errors"].setdefault(symbol, {})[exchange_name] = str(book)
+            else:
+                fetched[(exchange_name, symbol)] = book
+        
+        # Every fetched book is walked for every order size in one batch
+        started = time.perf_counter()
+        verification.update(analyze_depth(fetched, notionals, depth))
+        verification["compute_seconds"] = time.perf_counter() - started
+        return verification
+    
+    @instrumented
+    def verify_confidence_threshold_system(self, incremental=False, window_days=None, limit=1000,
+                                           confidence_ranges=None):
+        """Verify that confidence thresholds are being used for trade decisions"""
+        confidence_ranges = confidence_ranges or self.CONFIDENCE_RANGES
+        edges, labels = ranges_to_edges(confidence_ranges)
+        try:
+            planner = self.db.planner()
+            has_confidence = planner.has_columns("paper_trades", "confidence_score", "profit", "timestamp")
             
-            if len(trades_with_confidence) > 0:
-                # Analyze confidence vs success rate
-                trades_with_confidence['profitable'] = trades_with_confidence['profit'] > 0
+            with self.db.connection() as conn:
                 
-                # Group by confidence ranges
-                confidence_ranges = [
-                    (0.0, 0.5, "Low"),
-                    (0.5, 0.7, "Medium"), 
-                    (0.7, 0.85, "High"),
-                    (0.85, 1.0, "Very High")
-                ]
+                incremental_info = None
+                if not has_confidence:
+                    total_trades, confidence_analysis = 0, {}
+                elif incremental:
+                    # Incremental mode tracks a time window (7 days unless window_days
+                    # is given) instead of the last N trades, since only new rows are read
+                    try:
+                        tracker = IncrementalConfidenceTracker(
+                            self.state_store, "confidence_threshold_system",
+                            confidence_ranges, window_days=window_days or 7
+                        )
+                        window = tracker.refresh(conn)
+                        total_trades = window["total_trades"]
+                        confidence_analysis = window["bucket_summary"]
+                        incremental_info = window["incremental"]
+                    except Exception as e:
+                        logger.warning(f"Incremental confidence check failed: {e}")
+                        total_trades, confidence_analysis = 0, {}
+                        incremental_info = {"error": str(e)}
+                else:
+                    # Aggregate either a time window or the last `limit` trades in SQL
+                    if window_days is not None:
+                        source_sql = f"""
+                        SELECT confidence_score, profit
+                        FROM paper_trades 
+                        WHERE confidence_score IS NOT NULL
+                        AND timestamp > {self.db.dialect.relative_time()}
+                        """
+                        source_params = [f"-{window_days} days"]
+                    else:
+                        source_sql = """
+                        SELECT confidence_score, profit
+                        FROM paper_trades 
+                        WHERE confidence_score IS NOT NULL
+                        ORDER BY timestamp DESC
+                        LIMIT ?
+                        """
+                        source_params = [limit]
+                    
+                    aggregates, totals = query_confidence_buckets(conn, edges, labels, source_sql, source_params)
+                    total_trades = totals["total"]
+                    confidence_analysis = summarize_bucket_aggregates(aggregates, labels)
+                
+                verification = {
+                    "trades_with_confidence": total_trades,
+                    "confidence_system_active": total_trades > 0
+                }
+                if incremental_info is not None:
+                    verification["incremental"] = incremental_info
                 
-                confidence_analysis = {}
-                for min_conf, max_conf, label in confidence_ranges:
-                    range_trades = trades_with_confidence[
-                        (trades_with_confidence['confidence_score'] >= min_conf) & 
-                        (trades_with_confidence['confidence_score'] < max_conf)
-                    ]
+                if total_trades > 0:
+                    verification["confidence_analysis"] = confidence_analysis
                     
-                    if len(range_trades) > 0:
-                        confidence_analysis[label] = {
-                            "trade_count": len(range_trades),
-                            "success_rate": range_trades['profitable'].mean(),
-                            "avg_profit": range_trades['profit'].mean(),
-                            "avg_confidence": range_trades['confidence_score'].mean()
-                        }
+                    # Check if higher confidence correlates with better performance
+                    if len(confidence_analysis) >= 2:
+                        verification["confidence_system_working"] = confidence_correlates_with_success(
+                            confidence_analysis, labels
+                        )
                 
-                verification["confidence_analysis"] = confidence_analysis
+                # Check current confidence thresholds
+                if planner.has_columns("ml_models", "name", "confidence_threshold", "is_active"):
+                    threshold_query = "SELECT name, confidence_threshold FROM ml_models WHERE is_active = 1"
+                    thresholds = read_sql(threshold_query, conn)
+                    verification["current_thresholds"] = thresholds.to_dict('records')
+                    verification["threshold_diversity"] = thresholds['confidence_threshold'].std() > 0.01
+                else:
+                    verification["current_thresholds"] = []
                 
-                # Check if higher confidence correlates with better performance
-                if len(confidence_analysis) >= 2:
-                    high_conf_success = confidence_analysis.get("High", {}).get("success_rate", 0)
-                    low_conf_success = confidence_analysis.get("Low", {}).get("success_rate", 0)
-                    verification["confidence_system_working"] = high_conf_success > low_conf_success
-            
-            # Check current confidence thresholds
-            threshold_query = "SELECT name, confidence_threshold FROM ml_models WHERE is_active = 1"
-            try:
-                thresholds = pd.read_sql_query(threshold_query, conn)
-                verification["current_thresholds"] = thresholds.to_dict('records')
-                verification["threshold_diversity"] = thresholds['confidence_threshold'].std() > 0.01
-            except:
-                verification["current_thresholds"] = []
-            
-            conn.close()
             return verification
             
         except Exception as e:
             return {"error": f"Confidence threshold verification failed: {e}"}
     
-    def generate_verification_report(self):
+    @instrumented
+    def verify_confidence_significance(self, window_days=None, limit=1000, confidence_ranges=None,
+                                       resamples=DEFAULT_RESAMPLES, seed=DEFAULT_BOOTSTRAP_SEED, workers=None):
+        """Bootstrap and permutation test of whether high-confidence trades really do better than low ones"""
+        confidence_ranges = confidence_ranges or self.CONFIDENCE_RANGES
+        edges, labels = ranges_to_edges(confidence_ranges)
+        try:
+            if not self.db.planner().has_columns("paper_trades", "confidence_score", "profit", "timestamp"):
+                return {"error": "Significance check failed: paper_trades has no confidence_score/profit"}
+            
+            # The same trades the confidence bucket check aggregates
+            with self.db.connection() as conn:
+                if window_days is not None:
+                    trades = read_sql(f"""
+                    SELECT confidence_score, profit
+                    FROM paper_trades
+                    WHERE confidence_score IS NOT NULL
+                    AND timestamp > {self.db.dialect.relative_time()}
+                    """, conn, params=[f"-{window_days} days"])
+                else:
+                    trades = read_sql("""
+                    SELECT confidence_score, profit
+                    FROM paper_trades
+                    WHERE confidence_score IS NOT NULL
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                    """, conn, params=[limit])
+            
+            return bootstrap_buckets(
+                trades["confidence_score"].to_numpy(dtype=float), trades["profit"].to_numpy(dtype=float),
+                edges, labels, resamples=resamples, seed=seed, workers=workers
+            )
+            
+        except Exception as e:
+            return {"error": f"Significance check failed: {e}"}
+    
+    @instrumented
+    def verify_confidence_calibration(self, window_days=DEFAULT_CALIBRATION_WINDOW_DAYS,
+                                      n_bins=DEFAULT_CALIBRATION_BINS):
+        """Check whether trade confidence matches the observed success rate, overall and per model and symbol"""
+        try:
+            planner = self.db.planner()
+            if not planner.has_columns("paper_trades", "confidence_score", "profit", "timestamp"):
+                return {"error": "Calibration check failed: paper_trades has no confidence_score/profit"}
+            
+            # The breakdowns only read the columns this database has
+            columns = ["confidence_score", "profit"] + [
+                column for column in ("ml_model", "symbol") if planner.has_columns("paper_trades", column)
+            ]
+            with self.db.connection() as conn:
+                trades = read_sql(f"""
+                SELECT {", ".join(columns)}
+                FROM paper_trades
+                WHERE confidence_score IS NOT NULL AND profit IS NOT NULL
+                AND timestamp > {self.db.dialect.relative_time()}
+                """, conn, params=[f"-{window_days} days"])
+                
+                models = []
+                if planner.has_columns("ml_models", "name"):
+                    models = [row[0] for row in conn.execute("SELECT name FROM ml_models").fetchall()]
+            
+            calibration = calibrate_trades(trades, n_bins=n_bins, models=models)
+            calibration["window_days"] = window_days
+            return calibration
+            
+        except Exception as e:
+            return {"error": f"Calibration check failed: {e}"}
+    
+    def database_checks(self):
+        """The database-only checks, by name, as zero-argument callables"""
+        return {
+            "verify_ml_model_integration": self.verify_ml_model_integration,
+            "verify_feature_data_sources": self.verify_feature_data_sources,
+            "verify_ml_prediction_pipeline": self.verify_ml_prediction_pipeline,
+            "verify_confidence_threshold_system": self.verify_confidence_threshold_system,
+            "verify_confidence_significance": self.verify_confidence_significance,
+            "verify_confidence_calibration": self.verify_confidence_calibration
+        }
+    
+    def check_registry(self, incremental=False, window_days=None, confidence_ranges=None, timeout=None,
+                       calibration_bins=DEFAULT_CALIBRATION_BINS, bootstrap_resamples=DEFAULT_RESAMPLES,
+                       bootstrap_seed=DEFAULT_BOOTSTRAP_SEED, bootstrap_workers=None):
+        """The report's checks with the tables they read; all wait for the schema catalog"""
+        registry = CheckRegistry()
+        # Loading the catalog once up front keeps the checks from racing to fill its cache
+        registry.register("schema", self.db.schema, timeout=timeout)
+        registry.register("ml_integration", self.verify_ml_model_integration,
+                          needs=("ml_models",), depends_on=("schema",), timeout=timeout, params={})
+        registry.register("feature_data", self.verify_feature_data_sources,
+                          needs=("price_data", "paper_trades"),
+                          depends_on=("schema",), timeout=timeout, params={})
+        registry.register("prediction_pipeline", self.verify_ml_prediction_pipeline,
+                          needs=("arbitrage_opportunities", "paper_trades", "ml_predictions"),
+                          depends_on=("schema",), timeout=timeout, params={})
+        confidence_params = {
+            "incremental": incremental, "window_days": window_days, "confidence_ranges": confidence_ranges
+        }
+        registry.register("confidence_system", lambda: self.verify_confidence_threshold_system(
+            **confidence_params
+        ), needs=("paper_trades",), depends_on=("schema",), timeout=timeout, params=confidence_params)
+        if bootstrap_resamples:
+            significance_params = {"window_days": window_days, "confidence_ranges": confidence_ranges,
+                                   "resamples": bootstrap_resamples, "seed": bootstrap_seed}
+            registry.register("confidence_significance", lambda: self.verify_confidence_significance(
+                workers=bootstrap_workers, **significance_params
+            ), needs=("paper_trades",), depends_on=("schema",), timeout=timeout, params=significance_params)
+        calibration_params = {"window_days": window_days or DEFAULT_CALIBRATION_WINDOW_DAYS,
+                              "n_bins": calibration_bins}
+        registry.register("calibration", lambda: self.verify_confidence_calibration(
+            **calibration_params
+        ), needs=("paper_trades", "ml_models"), depends_on=("schema",), timeout=timeout,
+            params=calibration_params)
+        return registry
+    
+    def generate_verification_report(self, incremental=False, window_days=None, confidence_ranges=None,
+                                     check_timeout=DEFAULT_CHECK_TIMEOUT, calibration_bins=DEFAULT_CALIBRATION_BINS,
+                                     bootstrap_resamples=DEFAULT_RESAMPLES, bootstrap_seed=DEFAULT_BOOTSTRAP_SEED,
+                                     bootstrap_workers=None):
         """Generate comprehensive verification report"""
         print("🔍 ML MODELS & REAL DATA VERIFICATION REPORT")
         print("=" * 60)
         
+        # Independent checks run concurrently; sections are printed in order afterwards
+        scheduler = CheckScheduler(max_workers=self.db.pool_size, default_timeout=check_timeout,
+                                   cache=self.result_cache)
+        results = scheduler.run(self.check_registry(
+            incremental, window_days, confidence_ranges, calibration_bins=calibration_bins,
+            bootstrap_resamples=bootstrap_resamples, bootstrap_seed=bootstrap_seed,
+            bootstrap_workers=bootstrap_workers
+        ))
+        
         # 1. ML Model Integration
         print("\n1. 🤖 ML MODEL INTEGRATION")
         print("-" * 30)
-        ml_verification = self.verify_ml_model_integration()
+        ml_verification = results["ml_integration"]
         
         if "error" in ml_verification:
             print(f"❌ {ml_verification['error']}")
@@ -392,7 +740,7 @@ class MLDataSourceVerifier:
         # 2. Feature Data Sources
         print("\n2. 📊 FEATURE DATA SOURCES")
         print("-" * 30)
-        feature_verification = self.verify_feature_data_sources()
+        feature_verification = results["feature_data"]
         
         if "error" in feature_verification:
             print(f"❌ {feature_verification['error']}")
@@ -407,14 +755,30 @@ class MLDataSourceVerifier:
                 print(f"⚠️ Data Age: {feature_verification.get('data_freshness_minutes', 'Unknown')} minutes old")
             
             if feature_verification.get('has_realistic_price_variation', False):
-                print(f"✅ Price Variation: {feature_verification['price_variation_coefficient']:.4f} (realistic)")
+                print(f"✅ Price Variation: {feature_verification['price_variation_coefficient']:.4f} median per pair (realistic)")
             else:
-                print(f"⚠️ Price Variation: {feature_verification.get('price_variation_coefficient', 'Unknown')} (check if realistic)")
+                print(f"⚠️ Price Variation: {feature_verification.get('price_variation_coefficient', 'Unknown')} median per pair (check if realistic)")
+            
+            pair_summary = feature_verification.get('pair_summary')
+            if pair_summary:
+                print(f"📈 Pairs: {pair_summary['pairs']} over {feature_verification['lookback_hours']:g}h "
+                      f"({pair_summary['stale_pairs']} stale, {pair_summary['pairs_with_gaps']} with gaps, "
+                      f"{pair_summary['flat_pairs']} flat, "
+                      f"{pair_summary['volatile_pairs']} volatile)")
+                for key, label, unit in [("age_minutes", "Age", "m"), ("cv", "Variation", ""),
+                                         ("missing_slots", f"Empty {feature_verification['gap_minutes']:g}m slots", "")]:
+                    if pair_summary[key]:
+                        values = ", ".join(f"{name} {value:.4g}{unit}" for name, value in pair_summary[key].items())
+                        print(f"   • {label}: {values}")
+                for pair in pair_rows(feature_verification['pairs'], limit=5):
+                    if pair['age_minutes'] < STALE_AFTER_MINUTES:
+                        break
+                    print(f"   ⚠️ {pair['exchange']} {pair['symbol']}: last tick {pair['age_minutes']:.0f} minutes ago")
         
         # 3. ML Prediction Pipeline
         print("\n3. 🧠 ML PREDICTION PIPELINE")
         print("-" * 30)
-        prediction_verification = self.verify_ml_prediction_pipeline()
+        prediction_verification = results["prediction_pipeline"]
         
         if "error" in prediction_verification:
             print(f"❌ {prediction_verification['error']}")
@@ -438,7 +802,7 @@ class MLDataSourceVerifier:
         # 4. Confidence Threshold System
         print("\n4. 🎯 CONFIDENCE THRESHOLD SYSTEM")
         print("-" * 30)
-        confidence_verification = self.verify_confidence_threshold_system()
+        confidence_verification = results["confidence_system"]
         
         if "error" in confidence_verification:
             print(f"❌ {confidence_verification['error']}")
@@ -446,6 +810,11 @@ class MLDataSourceVerifier:
             print(f"✅ Trades with Confidence: {confidence_verification['trades_with_confidence']}")
             print(f"✅ Confidence System Active: {confidence_verification['confidence_system_active']}")
             
+            if confidence_verification.get('incremental', {}).get('watermark_rowid') is not None:
+                inc = confidence_verification['incremental']
+                print(f"✅ Incremental: {inc['new_rows']} new trades merged "
+                      f"(watermark rowid {inc['watermark_rowid']}, last {inc['window_days']} days)")
+            
             if confidence_verification.get('confidence_system_working', False):
                 print("✅ Confidence System Working: Higher confidence → Better performance")
             else:
@@ -458,13 +827,167 @@ class MLDataSourceVerifier:
                           f"{stats['success_rate']:.1%} success, "
                           f"${stats['avg_profit']:.2f} avg profit")
         
+        significance = results.get("confidence_significance")
+        if significance is not None:
+            if "error" in significance:
+                print(f"\n❌ {significance['error']}")
+            elif significance["buckets"]:
+                level = significance["confidence_level"]
+                print(f"\n🎲 Bootstrap ({significance['resamples']} resamples, {level:.0%} intervals, "
+                      f"seed {significance['seed']}, {significance['workers']} worker(s)):")
+                for level_name, stats in significance["buckets"].items():
+                    success_ci, profit_ci = stats["success_rate_ci"], stats["avg_profit_ci"]
+                    approximate = f" (≈ from {stats['profit_atoms']} profit atoms)" if stats["approximate"] else ""
+                    print(f"   • {level_name}: {success_ci[0]:.1%}-{success_ci[1]:.1%} success, "
+                          f"${profit_ci[0]:.2f} to ${profit_ci[1]:.2f} avg profit{approximate}")
+                if significance["approximate_buckets"]:
+                    print(f"   ≈ Buckets over {EXACT_MAX_TRADES} trades resample profit from quantile atoms; "
+                          f"their profit intervals and p-values are approximate and can be too narrow")
+                difference = significance.get("difference")
+                if difference:
+                    status = "✅" if difference["significant"] else "⚠️"
+                    success_ci = difference["success_rate_ci"]
+                    print(f"{status} {difference['high']} - {difference['low']}: {difference['success_rate']:+.1%} success "
+                          f"({success_ci[0]:+.1%} to {success_ci[1]:+.1%}, permutation p={difference['success_rate_p_value']:.4f}), "
+                          f"${difference['avg_profit']:+.2f} avg profit (p={difference['avg_profit_p_value']:.4f})")
+                    if not difference["significant"]:
+                        print("   The gap is within resampling noise at this sample size")
+        
+        calibration = results["calibration"]
+        if "error" in calibration:
+            print(f"\n❌ {calibration['error']}")
+        elif calibration["trades"] > 0:
+            overall = calibration["overall"]
+            status = "✅" if calibration["well_calibrated"] else "⚠️"
+            print(f"\n📐 Calibration over {calibration['window_days']:g} days: {format_calibration(overall)}")
+            print(f"{status} Expected calibration error {overall['ece']:.3f} "
+                  f"(max gap {overall['mce']:.3f}, Brier skill {overall['brier_skill'] or 0:+.3f})")
+            for point in overall["curve"]:
+                print(f"   • {point['lower']:.2f}-{point['upper']:.2f}: {point['mean_confidence']:.1%} confident, "
+                      f"{point['observed_rate']:.1%} succeeded ({point['trades']} trades)")
+            if calibration.get("by_model"):
+                print("   Per model:")
+                for model, summary in sorted(calibration["by_model"].items(), key=lambda item: -item[1]["trades"]):
+                    print(f"   • {model}: {format_calibration(summary)}")
+            judged = [(symbol, summary) for symbol, summary in calibration.get("by_symbol", {}).items()
+                      if summary["trades"] and summary["enough_trades"]]
+            if judged:
+                worst = sorted(judged, key=lambda item: -item[1]["ece"])[:5]
+                print("   Least calibrated symbols:")
+                for symbol, summary in worst:
+                    print(f"   • {symbol}: {format_calibration(summary)}")
+            if calibration["out_of_range_confidence"]:
+                print(f"   ⚠️ {calibration['out_of_range_confidence']} trades had confidence outside 0-1 (clipped)")
+        
+        print_check_timings(scheduler.timings, results)
+        
         return {
             "ml_integration": ml_verification,
             "feature_data": feature_verification,
             "prediction_pipeline": prediction_verification,
-            "confidence_system": confidence_verification
+            "confidence_system": confidence_verification,
+            "confidence_significance": significance,
+            "calibration": calibration
         }
     
+    async def run_live_report(self, sweep=False, symbols=None, max_concurrency=8, book_depth=DEFAULT_BOOK_DEPTH,
+                              notionals=DEFAULT_NOTIONAL_LADDER):
+        """Run and print the live exchange sections of the report (book_depth=0 skips the depth section)"""
+        print("\n5. ⚡ REAL-TIME DATA FLOW TEST")
+        print("-" * 30)
+        realtime_verification = await self.verify_real_time_data_flow()
+        
+        if realtime_verification.get("database_has_recent_data", False):
+            print("✅ Real-time data flow: Database has recent data")
+            
+            consistent_exchanges = 0
+            for exchange, consistency in realtime_verification.get("data_consistency", {}).items():
+                offset = f"DB row {consistency['time_offset_seconds']:+.0f}s from the quote"
+                if consistency.get("data_appears_synchronized", False):
+                    print(f"✅ {exchange}: Data synchronized (±{consistency['price_difference_pct']:.1f}%, {offset})")
+                    consistent_exchanges += 1
+                else:
+                    print(f"⚠️ {exchange}: Data inconsistency ({consistency['price_difference_pct']:.1f}% difference, {offset})")
+            
+            if consistent_exchanges > 0:
+                print(f"✅ {consistent_exchanges} exchanges showing consistent real-time data")
+            else:
+                print("❌ No exchanges showing consistent data synchronization")
+        else:
+            print("❌ Real-time data flow: No recent database updates detected")
+        
+        live_results = {"realtime_data": realtime_verification}
+        
+        if sweep:
+            print("\n6. 🌐 MULTI-SYMBOL LIVE SWEEP")
+            print("-" * 30)
+            sweep_results = await self.verify_real_time_data_sweep(
+                symbols=symbols, max_concurrency=max_concurrency
+            )
+            
+            if "error" in sweep_results:
+                print(f"❌ {sweep_results['error']}")
+            else:
+                print(f"✅ Symbols: {len(sweep_results['symbols_requested'])}, Exchanges: {len(sweep_results['exchanges'])}")
+                print(f"✅ Requests: {sweep_results['request_count']} in {sweep_results['wall_clock_seconds']:.2f}s")
+                print(f"✅ Synchronized Pairs: {sweep_results['pairs_synchronized']}/{sweep_results['pairs_checked']}")
+                if sweep_results.get('alignment'):
+                    print(f"📐 {format_alignment(sweep_results['alignment'])}")
+                for symbol, per_exchange in sweep_results['results'].items():
+                    for exchange, result in per_exchange.items():
+                        if "error" in result:
+                            print(f"   ❌ {exchange} {symbol}: {result['error']}")
+                        elif "price_difference_pct" in result and not result['data_appears_synchronized']:
+                            print(f"   ⚠️ {exchange} {symbol}: {result['price_difference_pct']:.1f}% difference")
+            
+            live_results["realtime_sweep"] = sweep_results
+        
+        if book_depth:
+            print(f"\n{7 if sweep else 6}. 📚 ORDER BOOK DEPTH & SLIPPAGE")
+            print("-" * 30)
+            if sweep and "error" not in sweep_results:
+                depth_symbols = sweep_results['symbols_requested']
+            else:
+                depth_symbols = [realtime_verification['symbol_tested']]
+            depth_results = await self.verify_order_book_depth(
+                symbols=depth_symbols, depth=book_depth, notionals=notionals, max_concurrency=max_concurrency
+            )
+            
+            print(f"✅ Books: {depth_results['request_count']} requested ({book_depth} levels) in "
+                  f"{depth_results['fetch_seconds']:.2f}s, walked in {depth_results['compute_seconds'] * 1000:.1f}ms")
+            for symbol, per_exchange in depth_results['errors'].items():
+                for exchange, error in per_exchange.items():
+                    print(f"   ❌ {exchange} {symbol}: {error}")
+            for symbol, per_exchange in depth_results['results'].items():
+                print(f"📖 {symbol}")
+                for exchange, book in per_exchange.items():
+                    print(f"   • {exchange}: ${book['ask_depth_quote']:,.0f} ask / ${book['bid_depth_quote']:,.0f} bid depth")
+                    for step in book['ladder']:
+                        if step['buy_vwap'] is None and step['sell_vwap'] is None:
+                            print(f"     ${step['notional']:,.0f}: beyond book depth")
+                            break
+                        buy = f"{step['buy_slippage_pct']:.3f}%" if step['buy_vwap'] is not None else "unfillable"
+                        sell = f"{step['sell_slippage_pct']:.3f}%" if step['sell_vwap'] is not None else "unfillable"
+                        print(f"     ${step['notional']:,.0f}: buy slippage {buy}, sell slippage {sell}")
+                spread = depth_results['spreads'].get(symbol)
+                if spread:
+                    if spread.get('top_of_book'):
+                        tob = spread['top_of_book']
+                        print(f"   🔀 Top of book: buy {tob['buy_exchange']} → sell {tob['sell_exchange']} "
+                              f"{tob['spread_pct']:+.3f}%")
+                    for step in spread['ladder']:
+                        if step['spread_pct'] is not None:
+                            print(f"   🔀 ${step['notional']:,.0f}: buy {step['buy_exchange']} → "
+                                  f"sell {step['sell_exchange']} {step['spread_pct']:+.3f}% executable")
+                    if spread['max_profitable_notional']:
+                        print(f"   💰 Profitable up to ${spread['max_profitable_notional']:,.0f} before fees")
+                    else:
+                        print("   ⚠️ No profitable executable spread at any ladder size")
+            
+            live_results["order_book_depth"] = depth_results
+        
+        return live_results
+    
     def generate_final_verdict(self, verification_results):
         """Generate final verdict on ML system authenticity"""
         print("\n" + "=" * 60)
@@ -510,7 +1033,11 @@ class MLDataSourceVerifier:
         
         # Score confidence system
         confidence_result = verification_results.get("confidence_system", {})
-        if confidence_result.get("confidence_system_working", False):
+        difference = (verification_results.get("confidence_significance") or {}).get("difference")
+        if confidence_result.get("confidence_system_working", False) and difference and not difference["significant"]:
+            scores["confidence_system"] = 15
+            print("⚠️ Confidence: Higher confidence does better, but not significantly")
+        elif confidence_result.get("confidence_system_working", False):
             scores["confidence_system"] = 25
             print("✅ Confidence: Threshold system working effectively")
         elif confidence_result.get("confidence_system_active", False):
@@ -546,42 +1073,132 @@ class MLDataSourceVerifier:
             "scores": scores
         }
 
-async def main():
+def parse_args(argv=None):
+    """Command line options for the verification suite"""
+    parser = argparse.ArgumentParser(description="Verify ML models use real exchange data")
+    parser.add_argument("--db-path", default="memebot.db", help="SQLite database to verify")
+    parser.add_argument("--database-url", metavar="URL",
+                        help="Verify a PostgreSQL deployment (e.g. $DATABASE_URL) instead of --db-path")
+    parser.add_argument("--learning-data", metavar="PATH",
+                        help="Verify the json-file storage (ml_learning_data.json) instead of --db-path")
+    parser.add_argument("--skip-exchanges", action="store_true",
+                        help="Run only the database checks; ccxt is never imported")
+    parser.add_argument("--import-benchmark", action="store_true",
+                        help="Report the cold import cost of each dependency and exit")
+    parser.add_argument("--sweep", action="store_true",
+                        help="Check every symbol (or --symbols) on every exchange concurrently")
+    parser.add_argument("--symbols", nargs="+",
+                        help="Symbols for the sweep; defaults to all symbols in price_data")
+    parser.add_argument("--max-concurrency", type=int, default=8,
+                        help="Maximum in-flight exchange requests during the sweep")
+    parser.add_argument("--book-depth", type=int, default=DEFAULT_BOOK_DEPTH,
+                        help="Order-book levels fetched per side for the depth analysis (0 skips it)")
+    parser.add_argument("--notionals", type=float, nargs="+", default=list(DEFAULT_NOTIONAL_LADDER),
+                        help="Order sizes in quote currency to compute fill prices and slippage for")
+    parser.add_argument("--record", metavar="PATH",
+                        help="Save every live exchange response to PATH for later --replay")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="Use exchange responses recorded with --record instead of live exchanges")
+    parser.add_argument("--replay-latency-scale", type=float, default=1.0,
+                        help="Multiply recorded response latencies by this factor")
+    parser.add_argument("--replay-latency", type=float,
+                        help="Fixed replay latency in seconds instead of the recorded ones")
+    parser.add_argument("--replay-error-rate", type=float, default=0.0,
+                        help="Fraction of replayed requests that fail")
+    parser.add_argument("--replay-seed", type=int, default=0, help="Seed for replay error injection")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only read trades added since the last run (state kept next to the database)")
+    parser.add_argument("--window-days", type=float,
+                        help="Analyse confidence over this many days of trades instead of the last 1000")
+    parser.add_argument("--confidence-edges", type=float, nargs="+",
+                        help="Custom confidence bucket edges, e.g. 0 0.5 0.7 0.85 1.0")
+    parser.add_argument("--bootstrap-resamples", type=int, default=DEFAULT_RESAMPLES,
+                        help="Resamples for the confidence bucket intervals and permutation test (0 skips them)")
+    parser.add_argument("--bootstrap-seed", type=int, default=DEFAULT_BOOTSTRAP_SEED,
+                        help="Seed for the bootstrap and permutation resamples")
+    parser.add_argument("--bootstrap-workers", type=int,
+                        help="Worker processes for resampling (default: one per CPU)")
+    parser.add_argument("--calibration-bins", type=int, default=DEFAULT_CALIBRATION_BINS,
+                        help="Equal-count confidence bins for the calibration curves")
+    parser.add_argument("--check-timeout", type=float, default=DEFAULT_CHECK_TIMEOUT,
+                        help="Seconds before a single check is reported as timed out")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+                        help="Reuse check results for this many seconds while the database is unchanged")
+    parser.add_argument("--no-cache", action="store_true", help="Always rerun every check")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Write a cProfile .pstats file per check into DIR (checks then run one at a time)")
+    parser.add_argument("--explain", action="store_true",
+                        help="Show EXPLAIN QUERY PLAN for every verifier query and suggest indexes")
+    parser.add_argument("--create-indexes", action="store_true",
+                        help="With --explain, create the suggested indexes and re-time each check")
+    args = parser.parse_args(argv)
+    if args.database_url and (args.incremental or args.explain):
+        parser.error("--incremental and --explain only work on the SQLite database (--db-path)")
+    if args.database_url and args.learning_data:
+        parser.error("--database-url and --learning-data are different storage modes; pass one")
+    return args
+
+async def main(argv=None):
     """Run complete ML verification suite"""
-    verifier = MLDataSourceVerifier()
+    args = parse_args(argv)
+    enable_profiling(args.profile)
+    
+    if args.import_benchmark:
+        results = benchmark_imports()
+        print_import_benchmark(results)
+        return results, None
+    
+    db = open_connection_manager(args.db_path, args.database_url, args.learning_data)
+    db_path = args.db_path
+    if args.learning_data:
+        # The json file is verified through its SQLite mirror, which the cache and state follow
+        try:
+            print_learning_data_stats(db.sync())
+        except LearningDataError as e:
+            raise SystemExit(f"❌ {e}")
+        db_path = db.db_path
+    # The result cache versions entries by the SQLite file, so it only applies there
+    result_cache = None if args.no_cache or args.database_url else ResultCache.for_database(
+        db_path, ttl_seconds=args.cache_ttl
+    )
+    verifier = MLDataSourceVerifier(db_path=db_path, connection_manager=db, result_cache=result_cache)
+    
+    if args.explain:
+        report = QueryPlanAdvisor(verifier.db).report(
+            verifier.database_checks(), create_indexes=args.create_indexes
+        )
+        print_query_plan_report(report)
+        verifier.db.close()
+        return report, None
     
     # Initialize exchanges for comparison
-    print("🔌 Connecting to exchanges for verification...")
-    await verifier.initialize_exchanges()
+    recorder = None
+    if args.replay:
+        print(f"🔌 Replaying recorded exchange responses from {args.replay}...")
+        await verifier.initialize_exchanges(replay=replay_exchanges(
+            args.replay, latency=args.replay_latency, latency_scale=args.replay_latency_scale,
+            error_rate=args.replay_error_rate, seed=args.replay_seed
+        ))
+    elif not args.skip_exchanges:
+        print("🔌 Connecting to exchanges for verification...")
+        recorder = ExchangeRecorder(args.record) if args.record else None
+        await verifier.initialize_exchanges(recorder=recorder)
     
     # Run all verifications
-    verification_results = verifier.generate_verification_report()
+    confidence_ranges = edges_to_ranges(args.confidence_edges) if args.confidence_edges else None
+    verification_results = verifier.generate_verification_report(
+        incremental=args.incremental, window_days=args.window_days, confidence_ranges=confidence_ranges,
+        check_timeout=args.check_timeout, calibration_bins=args.calibration_bins,
+        bootstrap_resamples=args.bootstrap_resamples, bootstrap_seed=args.bootstrap_seed,
+        bootstrap_workers=args.bootstrap_workers
+    )
     
     # Test real-time data flow if exchanges available
     if verifier.exchanges:
-        print("\n5. ⚡ REAL-TIME DATA FLOW TEST")
-        print("-" * 30)
-        realtime_verification = await verifier.verify_real_time_data_flow()
-        
-        if realtime_verification.get("database_has_recent_data", False):
-            print("✅ Real-time data flow: Database has recent data")
-            
-            consistent_exchanges = 0
-            for exchange, consistency in realtime_verification.get("data_consistency", {}).items():
-                if consistency.get("data_appears_synchronized", False):
-                    print(f"✅ {exchange}: Data synchronized (±{consistency['price_difference_pct']:.1f}%)")
-                    consistent_exchanges += 1
-                else:
-                    print(f"⚠️ {exchange}: Data inconsistency ({consistency['price_difference_pct']:.1f}% difference)")
-            
-            if consistent_exchanges > 0:
-                print(f"✅ {consistent_exchanges} exchanges showing consistent real-time data")
-            else:
-                print("❌ No exchanges showing consistent data synchronization")
-        else:
-            print("❌ Real-time data flow: No recent database updates detected")
-        
-        verification_results["realtime_data"] = realtime_verification
+        verification_results.update(await verifier.run_live_report(
+            sweep=args.sweep, symbols=args.symbols, max_concurrency=args.max_concurrency,
+            book_depth=args.book_depth, notionals=args.notionals
+        ))
     
     # Generate final verdict
     final_verdict = verifier.generate_final_verdict(verification_results)
@@ -589,6 +1206,16 @@ async def main():
     # Close exchanges
     for exchange in verifier.exchanges.values():
         await exchange.close()
+    if recorder is not None:
+        print(f"\n💾 Exchange responses recorded to {recorder.save()}")
+    
+    # Report database connection usage
+    db_stats = verifier.db.stats()
+    print_connection_stats(db_stats)
+    verification_results["db_connections"] = db_stats
+    verifier.db.close()
+    if result_cache is not None:
+        result_cache.close()
     
     return verification_results, final_verdict
 
@@ -0,0 +1,177 @@
+# ml_verification_thresholds.py - Per-model confidence threshold optimizer over the trade history
+import logging
+
+from ml_verification_startup import LazyModule
+
+np = LazyModule("numpy")
+pd = LazyModule("pandas")
+
+logger = logging.getLogger(__name__)
+
+# A cutoff must keep at least this many historical trades to be recommended
+DEFAULT_MIN_TRADES = 50
+# Cutoffs the report's curve is evaluated at; drawdowns are computed only for
+# these and the recommended and current thresholds
+THRESHOLD_GRID = tuple(round(0.05 * i, 2) for i in range(21))
+# Drawdowns are computed for this many cutoffs at a time to bound memory
+DRAWDOWN_BATCH_CELLS = 8_000_000
+# Profit gains smaller than this are not worth a threshold change
+MIN_PROFIT_GAIN = 0.01
+
+
+def _max_drawdowns(profit, confidence, cutoffs):
+    """Largest peak-to-trough fall of cumulative profit for each cutoff
+
+    profit and confidence are in time order. Each cutoff keeps the trades
+    with confidence >= cutoff; a batch of cutoffs is one masked cumsum
+    matrix.
+    """
+    cutoffs = np.asarray(cutoffs, dtype=float)
+    drawdowns = np.zeros(len(cutoffs))
+    if len(profit) == 0 or len(cutoffs) == 0:
+        return drawdowns
+    batch = max(1, DRAWDOWN_BATCH_CELLS // len(profit))
+    for start in range(0, len(cutoffs), batch):
+        taken = confidence[None, :] >= cutoffs[start:start + batch, None]
+        equity = np.cumsum(np.where(taken, profit[None, :], 0.0), axis=1)
+        peak = np.maximum(np.maximum.accumulate(equity, axis=1), 0.0)
+        drawdowns[start:start + batch] = (peak - equity).max(axis=1)
+    return drawdowns
+
+
+def sweep_thresholds(confidence, profit, group_codes, n_groups, min_trades=DEFAULT_MIN_TRADES):
+    """Trades, hits and profit kept by every distinct cutoff of every group, in one sort
+
+    Trades are sorted by group, then by descending confidence. Running
+    sums within each group then give, at each position, the totals for
+    "confidence >= this trade's confidence". Only the last position of a
+    run of equal confidences is a real cutoff. Returns the sorted arrays
+    plus, per group, the index of the profit-maximizing cutoff that keeps
+    at least min_trades trades (-1 if none does).
+    """
+    confidence = np.asarray(confidence, dtype=float)
+    profit = np.asarray(profit, dtype=float)
+    group_codes = np.asarray(group_codes, dtype=np.int64)
+
+    # Descending confidence, then a stable radix sort on the small group codes
+    order = np.argsort(-confidence, kind="stable")
+    order = order[np.argsort(group_codes[order].astype(np.min_scalar_type(max(n_groups, 1))), kind="stable")]
+    conf, gain, group = confidence[order], profit[order], group_codes[order]
+    sizes = np.bincount(group, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    # Running totals over all groups, minus each group's total from before its first trade
+    cum_profit = np.concatenate(([0.0], np.cumsum(gain)))
+    cum_hits = np.concatenate(([0], np.cumsum(gain > 0)))
+    kept_profit = cum_profit[1:] - cum_profit[starts][group]
+    kept_hits = cum_hits[1:] - cum_hits[starts][group]
+    trades = np.arange(len(conf)) - starts[group] + 1
+
+    is_cut = np.ones(len(conf), dtype=bool)
+    if len(conf) > 1:
+        is_cut[:-1] = (conf[1:] != conf[:-1]) | (group[1:] != group[:-1])
+    candidates = np.flatnonzero(is_cut & (trades >= min_trades))
+    # Best per group: most profit, then the most trades among equal profits
+    ranked = candidates[np.lexsort((trades[candidates], kept_profit[candidates], group[candidates]))]
+    best = np.full(n_groups, -1, dtype=np.int64)
+    if len(ranked):
+        last_of_group = np.append(group[ranked][1:] != group[ranked][:-1], True)
+        best[group[ranked][last_of_group]] = ranked[last_of_group]
+    return {
+        "order": order,
+        "confidence": conf,
+        "group": group,
+        "trades": trades,
+        "hits": kept_hits,
+        "profit": kept_profit,
+        "is_cut": is_cut,
+        "starts": starts,
+        "sizes": sizes,
+        "best": best
+    }
+
+
+def _kept_at(sweep, g, cutoff):
+    """(trades, hits, profit) kept in group g by "confidence >= cutoff" """
+    start, size = sweep["starts"][g], sweep["sizes"][g]
+    # Confidence is descending within the group, so search its negation
+    kept = int(np.searchsorted(-sweep["confidence"][start:start + size], -cutoff, side="right"))
+    if kept == 0:
+        return 0, 0, 0.0
+    i = start + kept - 1
+    return kept, int(sweep["hits"][i]), float(sweep["profit"][i])
+
+
+def _point(trades, hits, profit, drawdown):
+    return {
+        "trades": trades,
+        "hit_rate": hits / trades if trades else 0.0,
+        "total_profit": profit,
+        "avg_profit": profit / trades if trades else 0.0,
+        "max_drawdown": float(drawdown)
+    }
+
+
+def optimize_thresholds(trades, current_thresholds=None, min_trades=DEFAULT_MIN_TRADES, grid=THRESHOLD_GRID):
+    """Profit-maximizing confidence_threshold per model from the trade history
+
+    trades needs confidence_score and profit columns in time order, and
+    ml_model to optimize each model separately (otherwise all trades are
+    one group). current_thresholds maps model names to their
+    ml_models.confidence_threshold for comparison.
+
+    Profit, trades and hit rate are exact at every distinct cutoff, and the
+    recommendation is chosen from all of them. Max drawdown costs a pass
+    over the group's trades per cutoff, so it is only computed at the grid
+    cutoffs of the curve plus the recommended and current thresholds;
+    drawdown_cutoffs_evaluated counts them.
+    """
+    current_thresholds = current_thresholds or {}
+    confidence = trades["confidence_score"].to_numpy(dtype=float)
+    profit = np.nan_to_num(trades["profit"].to_numpy(dtype=float))
+    if "ml_model" in trades:
+        codes, names = pd.factorize(trades["ml_model"].fillna("unknown").astype(str))
+        names = list(names)
+    else:
+        codes, names = np.zeros(len(confidence), dtype=np.int64), ["all"]
+    sweep = sweep_thresholds(confidence, profit, codes, len(names), min_trades)
+
+    models = {}
+    for g, name in enumerate(names):
+        in_group = codes == g
+        group_conf, group_profit = confidence[in_group], profit[in_group]
+        best = sweep["best"][g]
+        current = current_thresholds.get(name)
+        cutoffs = list(grid)
+        if best >= 0:
+            cutoffs.append(float(sweep["confidence"][best]))
+        if current is not None:
+            cutoffs.append(float(current))
+        drawdowns = dict(zip(cutoffs, _max_drawdowns(group_profit, group_conf, cutoffs)))
+
+        result = {
+            "trades": int(sweep["sizes"][g]),
+            "cutoffs_evaluated": int((sweep["is_cut"] & (sweep["group"] == g)).sum()),
+            "drawdown_cutoffs_evaluated": len(drawdowns),
+            "curve": {
+                f"{cutoff:.2f}": _point(*_kept_at(sweep, g, cutoff), drawdowns[cutoff]) for cutoff in grid
+            }
+        }
+        if best >= 0:
+            threshold = float(sweep["confidence"][best])
+            result["recommended"] = dict(
+                _point(int(sweep["trades"][best]), int(sweep["hits"][best]), float(sweep["profit"][best]),
+                       drawdowns[threshold]),
+                threshold=threshold
+            )
+        if current is not None:
+            result["current"] = dict(_point(*_kept_at(sweep, g, current), drawdowns[float(current)]),
+                                     threshold=float(current))
+        if "recommended" in result and "current" in result:
+            gain = result["recommended"]["total_profit"] - result["current"]["total_profit"]
+            result["profit_gain"] = gain
+            result["should_change"] = gain > MIN_PROFIT_GAIN
+        models[name] = result
+    for name in current_thresholds:
+        models.setdefault(name, {"trades": 0})
+    return {"min_trades": min_trades, "models": models}
@@ -0,0 +1,49 @@
+# Tests for aligning live quotes with the nearest database rows
+import math
+
+import pandas as pd
+
+from ml_verification_align import align_quotes, aligned_by_pair, quotes_frame, summarize_alignment
+
+DB_PRICES = pd.DataFrame({
+    "exchange": ["binance", "binance", "kraken"],
+    "symbol": ["BTC/USDT", "BTC/USDT", "BTC/USDT"],
+    "mid_price": [100.0, 110.0, 200.0],
+    "timestamp": ["2026-01-01 00:00:00", "2026-01-01 00:05:00", "2026-01-01 00:00:00"],
+})
+# 2026-01-01 00:04:00 UTC
+QUOTE_MS = 1767225840000
+
+
+def test_quotes_match_nearest_row_of_same_pair():
+    quotes = quotes_frame([
+        ("binance", "BTC/USDT", {"last_price": 121.0, "timestamp": QUOTE_MS}),
+        ("kraken", "BTC/USDT", {"last_price": 200.0, "received_at": QUOTE_MS}),
+    ])
+    aligned = align_quotes(quotes, DB_PRICES).set_index("exchange")
+    assert aligned.loc["binance", "db_mid_price"] == 110.0
+    assert aligned.loc["binance", "time_offset_seconds"] == 60.0
+    assert math.isclose(aligned.loc["binance", "price_difference_pct"], 10.0)
+    assert aligned.loc["kraken", "db_mid_price"] == 200.0
+    assert not aligned.loc["kraken", "exchange_timestamp"]
+
+
+def test_rows_outside_tolerance_do_not_match():
+    quotes = quotes_frame([("kraken", "BTC/USDT", {"last_price": 200.0, "timestamp": QUOTE_MS})])
+    aligned = align_quotes(quotes, DB_PRICES, tolerance_seconds=60)
+    assert len(aligned) == 1
+    assert math.isnan(aligned["db_mid_price"].iloc[0])
+
+
+def test_empty_quotes_align_to_empty_frame():
+    aligned = align_quotes(quotes_frame([]), DB_PRICES)
+    assert len(aligned) == 0
+    assert aligned_by_pair(aligned) == {}
+    assert summarize_alignment(aligned, 0)["matched"] == 0
+
+
+def test_empty_database_leaves_quotes_unmatched():
+    quotes = quotes_frame([("binance", "BTC/USDT", {"last_price": 1.0, "timestamp": QUOTE_MS})])
+    aligned = align_quotes(quotes, DB_PRICES.iloc[:0])
+    assert len(aligned) == 1
+    assert math.isnan(aligned["db_mid_price"].iloc[0])
@@ -0,0 +1,34 @@
+# Tests for the adaptive-bin calibration statistics
+import numpy as np
+import pytest
+
+from ml_verification_calibration import calibrate_by, grouped_calibration
+
+
+def test_ece_and_brier_by_hand():
+    stats = grouped_calibration([0.8, 0.2], [1.0, 0.0], np.zeros(2, dtype=np.int64), 1, n_bins=2)
+    # One trade per bin: |0 - 0.2| and |1 - 0.8|, averaged over the trades
+    assert stats["ece"][0] == pytest.approx(0.2)
+    assert stats["brier"][0] == pytest.approx(0.04)
+    assert stats["mce"][0] == pytest.approx(0.2)
+    assert stats["bin_trades"].tolist() == [[1, 1]]
+    assert stats["bin_lower"][0].tolist() == [0.2, 0.8]
+
+
+def test_groups_are_calibrated_separately():
+    confidence = [0.5, 0.5, 0.5, 0.5, 0.9, 0.9]
+    outcome = [1.0, 0.0, 1.0, 0.0, 0.0, 0.0]
+    stats = grouped_calibration(confidence, outcome, [0, 0, 0, 0, 1, 1], 2, n_bins=2)
+    assert stats["trades"].tolist() == [4, 2]
+    assert stats["ece"] == pytest.approx([0.0, 0.9])
+    assert stats["brier"] == pytest.approx([0.25, 0.81])
+    assert stats["base_rate"] == pytest.approx([0.5, 0.0])
+
+
+def test_calibrate_by_reports_named_groups_without_trades():
+    results = calibrate_by(np.array([0.6, 0.4]), np.array([1.0, 0.0]), np.array(["rf", None], dtype=object),
+                           n_bins=2, names=["xgb"])
+    assert results["rf"]["trades"] == 1
+    assert results["unknown"]["trades"] == 1
+    assert results["xgb"] == {"trades": 0}
+    assert results["rf"]["ece"] == pytest.approx(0.4)
@@ -0,0 +1,37 @@
+# Tests for CUSUM change points in threshold histories
+import numpy as np
+
+from ml_verification_changepoints import detect_change_points
+
+
+def test_level_shift_is_found_per_group():
+    values = np.array([0.5] * 10 + [0.7] * 10 + [0.6] * 10)
+    group = np.array([0] * 20 + [1] * 10)
+    points, statistics = detect_change_points(values, group, 2)
+    assert points.tolist() == [10]
+    assert statistics[10] > 1.358
+
+
+def test_two_shifts_in_one_group():
+    values = np.array([0.5] * 8 + [0.7] * 8 + [0.55] * 8)
+    points, _ = detect_change_points(values, np.zeros(len(values), dtype=np.int64), 1)
+    assert points.tolist() == [8, 16]
+
+
+def test_shift_below_min_shift_is_ignored():
+    values = np.array([0.5] * 10 + [0.505] * 10)
+    points, _ = detect_change_points(values, np.zeros(20, dtype=np.int64), 1)
+    assert len(points) == 0
+
+
+def test_group_boundary_is_not_a_change_point():
+    values = np.array([0.5] * 5 + [0.9] * 5)
+    points, _ = detect_change_points(values, np.array([0] * 5 + [1] * 5), 2)
+    assert len(points) == 0
+
+
+def test_too_short_history():
+    points, statistics = detect_change_points(np.array([0.5]), np.array([0]), 1)
+    assert len(points) == 0 and statistics.tolist() == [0.0]
+    points, _ = detect_change_points(np.array([]), np.array([], dtype=np.int64), 1)
+    assert len(points) == 0
@@ -0,0 +1,46 @@
+# Tests for walking order books
+import math
+
+import numpy as np
+
+from ml_verification_depth import analyze_depth, book_side, fill_ladder
+
+
+def test_fill_ladder_by_hand():
+    prices = np.array([[100.0, 101.0, 0.0]])
+    amounts = np.array([[1.0, 2.0, 0.0]])
+    fills = fill_ladder(prices, amounts, [50, 100, 201, 1000])
+    vwap = fills["vwap"][0]
+    assert vwap[:2].tolist() == [100.0, 100.0]
+    # 100 at the top level, then 101 buys one more unit at 101
+    assert math.isclose(vwap[2], 201 / 2)
+    assert math.isnan(vwap[3])
+    assert fills["levels"][0].tolist() == [1, 1, 2, 0]
+    assert fills["fillable"][0].tolist() == [True, True, True, False]
+    assert fills["depth_quote"].tolist() == [302.0]
+
+
+def test_empty_book_fills_nothing():
+    prices, amounts = book_side([], 3)
+    fills = fill_ladder(prices[None, :], amounts[None, :], [10])
+    assert not fills["fillable"][0, 0]
+    assert fills["levels"][0, 0] == 0
+
+
+def test_book_side_drops_bad_levels_and_pads():
+    prices, amounts = book_side([[10.0, 1.0, 3], [9.0, 0.0], [8.0, 2.0]], 4)
+    assert prices.tolist() == [10.0, 8.0, 0.0, 0.0]
+    assert amounts.tolist() == [1.0, 2.0, 0.0, 0.0]
+
+
+def test_cross_exchange_route():
+    books = {
+        ("a", "X/USDT"): {"asks": [[100.0, 10.0]], "bids": [[99.0, 10.0]]},
+        ("b", "X/USDT"): {"asks": [[103.0, 10.0]], "bids": [[102.0, 10.0]]},
+    }
+    spreads = analyze_depth(books, notionals=(100, 5000), depth=2)["spreads"]["X/USDT"]
+    assert spreads["top_of_book"]["buy_exchange"] == "a"
+    assert spreads["top_of_book"]["sell_exchange"] == "b"
+    assert math.isclose(spreads["ladder"][0]["spread_pct"], 2.0)
+    assert spreads["ladder"][1]["spread_pct"] is None
+    assert spreads["max_profitable_notional"] == 100.0
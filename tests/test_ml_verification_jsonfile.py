@@ -0,0 +1,87 @@
+# Tests for the json-file storage mirror
+import json
+import sqlite3
+
+import pytest
+
+from ml_verification_jsonfile import LearningDataMirror, print_learning_data_stats
+
+BASE_MS = 1767225600000
+
+
+def write_trades(path, trades):
+    path.write_text(json.dumps({"trades": trades, "marketConditions": [], "modelPerformance": {}}))
+
+
+def trade(i, **extra):
+    return dict({"timestamp": BASE_MS + i * 1000, "symbol": "BTC/USDT", "prediction": {"confidence": 0.6},
+                 "actualProfit": 1.0}, **extra)
+
+
+def mirrored_ids(mirror):
+    with sqlite3.connect(mirror.mirror_path) as conn:
+        return [row[0] for row in conn.execute("SELECT trade_id FROM paper_trades ORDER BY timestamp_ms")]
+
+
+def test_empty_file_syncs_and_prints_twice(tmp_path, capsys):
+    path = tmp_path / "ml_learning_data.json"
+    write_trades(path, [])
+    mirror = LearningDataMirror(str(path))
+    for _ in range(2):
+        stats = mirror.sync()
+        print_learning_data_stats(stats)
+        assert stats["mode"] == "initial"
+        assert stats["trades_total"] == 0
+    assert capsys.readouterr().out.count("first full read") == 2
+
+
+def test_file_with_trades_syncs_and_prints_twice(tmp_path, capsys):
+    path = tmp_path / "ml_learning_data.json"
+    write_trades(path, [trade(0, tradeId="a"), trade(1, tradeId="b")])
+    mirror = LearningDataMirror(str(path))
+    first = mirror.sync()
+    print_learning_data_stats(first)
+    second = mirror.sync()
+    print_learning_data_stats(second)
+    assert (first["mode"], first["trades_added"]) == ("initial", 2)
+    assert (second["mode"], second["trades_added"]) == ("append", 0)
+    out = capsys.readouterr().out
+    assert "first full read" in out and f"resumed at byte {second['resume_offset']:,}" in out
+
+
+def test_trades_without_id_are_not_duplicated_by_rescans(tmp_path):
+    path = tmp_path / "ml_learning_data.json"
+    trades = [trade(0), trade(1, tradeId="b"), trade(2)]
+    write_trades(path, trades)
+    mirror = LearningDataMirror(str(path))
+    mirror.sync()
+    # Rewriting the file from the front forces a full rescan
+    write_trades(path, [trade(-1, symbol="ETH/USDT")] + trades)
+    stats = mirror.sync()
+    assert stats["mode"] == "rescan"
+    assert stats["trades_total"] == 4
+    assert None not in mirrored_ids(mirror)
+
+
+def test_emptied_file_empties_the_mirror(tmp_path, capsys):
+    path = tmp_path / "ml_learning_data.json"
+    write_trades(path, [trade(0, tradeId="a")])
+    mirror = LearningDataMirror(str(path))
+    mirror.sync()
+    write_trades(path, [])
+    stats = mirror.sync()
+    print_learning_data_stats(stats)
+    assert (stats["mode"], stats["trades_removed"], stats["trades_total"]) == ("rescan", 1, 0)
+    assert "full rescan" in capsys.readouterr().out
+    assert mirror.sync()["mode"] == "initial"
+
+
+def test_truncated_file_raises_clean_error(tmp_path, monkeypatch):
+    import ml_verification_jsonfile
+    from ml_verification_jsonfile import LearningDataError
+
+    monkeypatch.setattr(ml_verification_jsonfile, "SYNC_RETRY_SECONDS", 0)
+    path = tmp_path / "ml_learning_data.json"
+    path.write_text(json.dumps({"trades": [trade(0, tradeId="a")]})[:40])
+    with pytest.raises(LearningDataError):
+        LearningDataMirror(str(path)).sync()
@@ -0,0 +1,54 @@
+# Tests for the PostgreSQL backend; the end-to-end ones need DATABASE_URL
+import os
+
+import pytest
+
+from ml_verification_postgres import PostgresConnectionManager, to_pyformat
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+needs_postgres = pytest.mark.skipif(not DATABASE_URL, reason="DATABASE_URL is not set")
+# The backend silences this when imported; pytest resets warning filters per test
+pytestmark = pytest.mark.filterwarnings("ignore:pandas only supports SQLAlchemy")
+
+
+def test_positional_placeholders():
+    assert to_pyformat("SELECT a FROM t WHERE a = ? AND b > ?", False) == \
+        "SELECT a FROM t WHERE a = %s AND b > %s"
+
+
+def test_question_marks_inside_literals_are_kept():
+    sql = """SELECT '?', 'it''s ?', "odd?name" FROM t WHERE a = ?"""
+    assert to_pyformat(sql, False) == """SELECT '?', 'it''s ?', "odd?name" FROM t WHERE a = %s"""
+
+
+def test_percent_signs_are_doubled_everywhere():
+    assert to_pyformat("SELECT a % 2 FROM t WHERE s LIKE 'x%' AND a = ?", False) == \
+        "SELECT a %% 2 FROM t WHERE s LIKE 'x%%' AND a = %s"
+
+
+def test_named_placeholders_and_casts():
+    sql = "SELECT ts::text FROM t WHERE a = :a AND b = ':b' AND c = ?"
+    assert to_pyformat(sql, True) == "SELECT ts::text FROM t WHERE a = %(a)s AND b = ':b' AND c = ?"
+
+
+@needs_postgres
+def test_connection_runs_sqlite_style_sql():
+    with PostgresConnectionManager(DATABASE_URL, pool_size=1) as db:
+        with db.connection() as conn:
+            assert conn.execute("SELECT CAST(? AS text) || '%?'", ["a"]).fetchone() == ("a%?",)
+        stats = db.stats()
+    assert stats["connections_opened"] == 1
+    # Postgres has no statement cache estimate to report
+    assert "estimated_statements_prepared" not in stats
+    assert "estimated_statement_cache_hits" not in stats["connections"][0]
+
+
+@needs_postgres
+def test_confidence_check_end_to_end():
+    from ml_settings_verification import MLSettingsVerifier
+
+    with PostgresConnectionManager(DATABASE_URL) as db:
+        verifier = MLSettingsVerifier(connection_manager=db)
+        result = verifier.verify_confidence_threshold_implementation(window_days=3650)
+    assert "error" not in result
+    assert result["threshold_system_active"] == (result.get("total_trades_with_confidence", 0) > 0)
@@ -0,0 +1,59 @@
+# Tests for the vectorized confidence-bucket statistics
+import numpy as np
+import pytest
+
+from ml_verification_stats import RunningStats, bucket_trades, merge_bucket_aggregates
+
+EDGES = [0.0, 0.3, 0.7, 1.01]
+LABELS = ["Low", "Medium", "High"]
+
+
+def test_bucket_trades_sums_each_range():
+    aggregates = bucket_trades([0.1, 0.2, 0.5, 0.9], [1.0, -1.0, 2.0, 0.0], EDGES, LABELS)
+    assert aggregates == {
+        "Low": {"trade_count": 2, "profit_sum": 0.0, "success_count": 1, "confidence_sum": pytest.approx(0.3)},
+        "Medium": {"trade_count": 1, "profit_sum": 2.0, "success_count": 1, "confidence_sum": 0.5},
+        "High": {"trade_count": 1, "profit_sum": 0.0, "success_count": 0, "confidence_sum": 0.9},
+    }
+
+
+def test_bucket_trades_lower_edge_inclusive_and_outside_dropped():
+    aggregates = bucket_trades([0.3, -0.5, 1.5], [1.0, 1.0, 1.0], EDGES, LABELS)
+    assert list(aggregates) == ["Medium"]
+    assert aggregates["Medium"]["trade_count"] == 1
+
+
+def test_bucket_trades_empty():
+    assert bucket_trades([], [], EDGES, LABELS) == {}
+
+
+def test_chunked_buckets_merge_to_single_pass():
+    rng = np.random.default_rng(0)
+    confidence, profit = rng.random(500), rng.normal(size=500)
+    merged = {}
+    for chunk in range(0, 500, 128):
+        merge_bucket_aggregates(merged, bucket_trades(confidence[chunk:chunk + 128], profit[chunk:chunk + 128],
+                                                      EDGES, LABELS))
+    whole = bucket_trades(confidence, profit, EDGES, LABELS)
+    for label in LABELS:
+        assert merged[label]["trade_count"] == whole[label]["trade_count"]
+        assert merged[label]["profit_sum"] == pytest.approx(whole[label]["profit_sum"])
+
+
+def test_running_stats_merge_matches_concatenation():
+    rng = np.random.default_rng(1)
+    first, second = rng.normal(5, 2, 300), rng.normal(-1, 0.5, 70)
+    stats = RunningStats().update(first[:100]).update(first[100:])
+    stats.merge(RunningStats().update(second))
+    values = np.concatenate([first, second])
+    assert stats.count == len(values)
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.variance == pytest.approx(values.var(ddof=1))
+
+
+def test_running_stats_merge_empty():
+    stats = RunningStats().update([1.0, 2.0, 3.0])
+    stats.merge(RunningStats())
+    assert stats.to_dict() == {"count": 3, "mean": 2.0, "std": 1.0}
+    assert RunningStats().merge(stats).to_dict() == {"count": 3, "mean": 2.0, "std": 1.0}
+    assert RunningStats().variance == 0.0